@@ -2,7 +2,7 @@
 This benchmark example uses the coco benchmark set of functions
 (<http://coco.gforge.inria.fr/>, <https://github.com/numbbo/coco>)
 to compare optimizers provided by fluentopt between themselves and also
-with CMA-ES[1].
+with CMA-ES[1], both the one of the package 'cma' and the one of fluentopt.
 To run these benchmarks, the package 'cocoex' must be installed,
 check <https://github.com/numbbo/coco> to see how to install it.
 Also, the package 'cma' is needed and can be installed by pip.
@@ -27,9 +27,10 @@ import pandas as pd
 from cocoex import Suite, Observer
 
 from fluentopt import BayesianOptimizer 
-from fluentopt.bayesianoptimizer import ucb_minimize
+from fluentopt.acquisition import ucb_minimize
 from fluentopt.transformers import Wrapper
 from fluentopt import RandomSearch
+from fluentopt.cmaes import CMAES
 
 from cma import fmin as cma_fmin
 from cma import CMAEvolutionStrategy
@@ -51,9 +52,24 @@ def cma(fun, budget):
     return xbest, ybest, nbeval
 
 
+def fluentopt_cma(fun, budget):
+    sigma0 = 0.02
+    range_ = fun.upper_bounds - fun.lower_bounds
+    center = fun.lower_bounds + range_ / 2
+    bounds = np.stack((fun.lower_bounds, fun.upper_bounds), axis=1)
+    opt = CMAES(center, sigma0=sigma0 * range_[0], bounds=bounds)
+    nbeval = 0
+    while nbeval < budget:
+        xlist = opt.suggest_many(min(opt.popsize, budget - nbeval))
+        opt.update_many(xlist, [fun(x) for x in xlist])
+        nbeval += len(xlist)
+    idx = np.argmin(opt.output_history_)
+    return opt.input_history_[idx], opt.output_history_[idx], nbeval
+
+
 def ucb(fun, budget):
     sampler = _uniform_sampler(low=fun.lower_bounds, high=fun.upper_bounds)
-    opt = BayesianOptimizer(sampler=sampler, score=ucb_minimize, nb_suggestions=100)
+    opt = BayesianOptimizer(sampler=sampler, score=ucb_minimize, nb_suggestions=100, maximize=False)
     return _run_opt(opt, fun, budget)
 
 
@@ -91,7 +107,7 @@ def main(nb_trials=15, budget_per_dim=100, output="benchmark.csv"):
     suite_name = "bbob"
     suite_options = ""
     suite = Suite(suite_name, suite_instance, suite_options)
-    algos = [random_search, cma, ucb]
+    algos = [random_search, cma, fluentopt_cma, ucb]
     stats = []
     for i, fun in enumerate(suite):
         print("Function {}".format(fun.name))
@@ -1,4 +1,5 @@
 from .random import RandomSearch
 from .bayesianoptimizer import BayesianOptimizer
+from .bandit import Bandit
 
-__all__ = ["RandomSearch", "Bandit"]
+__all__ = ["RandomSearch", "BayesianOptimizer", "Bandit"]
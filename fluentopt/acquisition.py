@@ -0,0 +1,357 @@
+"""
+This module contains the acquisition functions (scores) which can be
+used as the `score` parameter of `fluentopt.bayesianoptimizer.BayesianOptimizer`.
+A score takes the optimizer and the candidate inputs and returns
+one score per candidate, the candidate with the highest score is evaluated next.
+Each score exists in two flavors, `*_maximize` if the goal is to maximize
+the outputs, `*_minimize` if the goal is to minimize them.
+
+The scores which accept a `return_grad` parameter also return the
+gradient of the scores wrt the (vectorized) inputs, which is used by the
+local search of `BayesianOptimizer` (see `nb_local_search`). They need a
+model with a `predict_gradient` method.
+
+The functions `expected_improvement`, `log_expected_improvement` and
+`probability_of_improvement` work directly on the predicted means and
+stds, they can be used to build other scores.
+"""
+import numpy as np
+from scipy.special import erfcx
+from scipy.special import log_ndtr
+from scipy.stats import norm
+
+__all__ = [
+    "expected_improvement",
+    "log_expected_improvement",
+    "probability_of_improvement",
+    "best_output",
+    "ucb_maximize",
+    "ucb_minimize",
+    "ei_maximize",
+    "ei_minimize",
+    "log_ei_maximize",
+    "log_ei_minimize",
+    "pi_maximize",
+    "pi_minimize",
+    "thompson_maximize",
+    "thompson_minimize",
+    "knowledge_gradient_maximize",
+    "knowledge_gradient_minimize",
+    "mes_maximize",
+    "mes_minimize",
+    "ucb",
+    "ei",
+]
+
+# the stds are clipped to this value, to avoid divisions by zero
+MIN_STD = 1e-12
+
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+_LOG_SQRT_PI_2 = 0.5 * np.log(np.pi / 2)
+
+
+def best_output(opt, maximize=True):
+    """
+    best output evaluated by `opt` so far. If the history stores
+    its outputs in a `fluentopt.history.Column`, the incumbent is cached
+    by the column and this costs O(1), whatever the size of the history.
+    In trust region mode, it is the best output of the current run
+    of the region (see `fluentopt.bayesianoptimizer.TrustRegion`).
+    """
+    trust_region = getattr(opt, "trust_region", None)
+    if trust_region is not None and trust_region.is_active(opt):
+        return trust_region.best_output(opt, maximize=maximize)
+    outputs = opt.output_history_
+    if maximize:
+        return outputs.max() if hasattr(outputs, "max") else np.max(outputs)
+    return outputs.min() if hasattr(outputs, "min") else np.min(outputs)
+
+
+def _improvement_z(mu, std, best, maximize, xi):
+    # z = (mu - best - xi) / std for maximization, (best - mu - xi) / std
+    # for minimization, computed in a single preallocated array
+    z = np.subtract(mu, best, dtype=float)
+    if not maximize:
+        np.negative(z, out=z)
+    z -= xi
+    z /= std
+    return z
+
+
+def _log_h(z):
+    """
+    log(h(z)) with h(z) = phi(z) + z * Phi(z), the expected improvement
+    of a standard gaussian. It is computed without underflow for very
+    negative z (see Ament et al., Unexpected Improvements to Expected
+    Improvement for Bayesian Optimization, NeurIPS 2023).
+    """
+    z = np.asarray(z, dtype=float)
+    out = np.empty_like(z)
+    big = z > -1
+    zb = z[big]
+    out[big] = np.log(norm.pdf(zb) + zb * norm.cdf(zb))
+    small = ~big
+    zs = z[small]
+    # h(z) = phi(z) * (1 - |z| * erfcx(-z / sqrt(2)) * sqrt(pi / 2)) for z < 0
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        r = np.log(np.abs(zs) * erfcx(-zs / np.sqrt(2))) + _LOG_SQRT_PI_2
+        out[small] = -0.5 * zs ** 2 - _LOG_SQRT_2PI + np.log(-np.expm1(r))
+    # asymptotic expansion where the above is not accurate anymore,
+    # h(z) ~ phi(z) / z ** 2
+    tiny = small & (z < -1e6)
+    zt = z[tiny]
+    out[tiny] = -0.5 * zt ** 2 - _LOG_SQRT_2PI - 2 * np.log(-zt)
+    return out
+
+
+def expected_improvement(mu, std, best, maximize=True, xi=0.0):
+    """
+    expected improvement over `best` of gaussians with means `mu` and
+    stds `std`. `best` can be a scalar or an array broadcastable to `mu`.
+    If `maximize` is False, improvement means being lower than `best`.
+    `xi` is the minimal improvement, a higher value means more exploration.
+    """
+    std = np.maximum(std, MIN_STD)
+    z = _improvement_z(mu, std, best, maximize, xi)
+    scores = z * norm.cdf(z)
+    scores += norm.pdf(z)
+    scores *= std
+    return scores
+
+
+def log_expected_improvement(mu, std, best, maximize=True, xi=0.0):
+    """
+    logarithm of `expected_improvement`. Unlike the expected improvement,
+    which underflows to 0 far from the incumbent (so all the candidates
+    get the same score), it stays informative everywhere.
+    """
+    std = np.maximum(std, MIN_STD)
+    z = _improvement_z(mu, std, best, maximize, xi)
+    return _log_h(z) + np.log(std)
+
+
+def probability_of_improvement(mu, std, best, maximize=True, xi=0.0):
+    """probability of gaussians with means `mu` and stds `std` to improve over `best`"""
+    std = np.maximum(std, MIN_STD)
+    return norm.cdf(_improvement_z(mu, std, best, maximize, xi))
+
+
+def _predict(opt, inputs, return_grad):
+    if return_grad:
+        return opt.model.predict_gradient(inputs)
+    mu, std = opt.model.predict(inputs, return_std=True)
+    return mu, std, None, None
+
+
+def _z_grad(z, std, mu_grad, std_grad, maximize):
+    # gradient of z wrt the inputs
+    sign = 1.0 if maximize else -1.0
+    return (sign * mu_grad - z[:, np.newaxis] * std_grad) / std[:, np.newaxis]
+
+
+def _ucb(opt, inputs, kappa, return_grad, maximize):
+    sign = 1.0 if maximize else -1.0
+    mu, std, mu_grad, std_grad = _predict(opt, inputs, return_grad)
+    scores = sign * np.asarray(mu, dtype=float) + kappa * np.asarray(std, dtype=float)
+    if return_grad:
+        return scores, sign * mu_grad + kappa * std_grad
+    return scores
+
+
+def ucb_maximize(opt, inputs, kappa=1.96, return_grad=False):
+    """
+    upper confidence bound, mu + kappa * std.
+    `kappa` controls the tradeoff between exploration and exploitation
+    (higher value = more exploration).
+    UCB scores assume that the model can return std, that is,
+    `model.predict` shoud accept a `return_std` parameter.
+    """
+    return _ucb(opt, inputs, kappa, return_grad, maximize=True)
+
+
+def ucb_minimize(opt, inputs, kappa=1.96, return_grad=False):
+    """
+    lower confidence bound, the score is -(mu - kappa * std),
+    see `ucb_maximize`.
+    """
+    return _ucb(opt, inputs, kappa, return_grad, maximize=False)
+
+
+def _ei(opt, inputs, xi, return_grad, maximize):
+    best = best_output(opt, maximize=maximize)
+    mu, std, mu_grad, std_grad = _predict(opt, inputs, return_grad)
+    std = np.maximum(std, MIN_STD)
+    z = _improvement_z(mu, std, best, maximize, xi)
+    cdf = norm.cdf(z)
+    pdf = norm.pdf(z)
+    scores = std * (z * cdf + pdf)
+    if return_grad:
+        sign = 1.0 if maximize else -1.0
+        grad = pdf[:, np.newaxis] * std_grad + sign * cdf[:, np.newaxis] * mu_grad
+        return scores, grad
+    return scores
+
+
+def ei_maximize(opt, inputs, xi=0.0, return_grad=False):
+    """
+    expected improvement over the best output so far.
+    `xi` is the minimal improvement, a higher value means more exploration.
+    """
+    return _ei(opt, inputs, xi, return_grad, maximize=True)
+
+
+def ei_minimize(opt, inputs, xi=0.0, return_grad=False):
+    """expected improvement below the lowest output so far, see `ei_maximize`"""
+    return _ei(opt, inputs, xi, return_grad, maximize=False)
+
+
+def _log_ei(opt, inputs, xi, return_grad, maximize):
+    best = best_output(opt, maximize=maximize)
+    mu, std, mu_grad, std_grad = _predict(opt, inputs, return_grad)
+    std = np.maximum(std, MIN_STD)
+    z = _improvement_z(mu, std, best, maximize, xi)
+    log_h = _log_h(z)
+    scores = log_h + np.log(std)
+    if return_grad:
+        # d log h(z) / dz = Phi(z) / h(z)
+        ratio = np.exp(log_ndtr(z) - log_h)[:, np.newaxis]
+        grad = std_grad / std[:, np.newaxis]
+        grad += ratio * _z_grad(z, std, mu_grad, std_grad, maximize)
+        return scores, grad
+    return scores
+
+
+def log_ei_maximize(opt, inputs, xi=0.0, return_grad=False):
+    """
+    logarithm of the expected improvement, see `log_expected_improvement`.
+    It selects the same input as `ei_maximize`, but it does not
+    underflow, which matters when most candidates are unlikely to improve
+    (e.g. late in the optimization) and for the local search, whose
+    gradients vanish with `ei_maximize`.
+    """
+    return _log_ei(opt, inputs, xi, return_grad, maximize=True)
+
+
+def log_ei_minimize(opt, inputs, xi=0.0, return_grad=False):
+    """logarithm of the expected improvement, see `log_ei_maximize`"""
+    return _log_ei(opt, inputs, xi, return_grad, maximize=False)
+
+
+def _pi(opt, inputs, xi, return_grad, maximize):
+    best = best_output(opt, maximize=maximize)
+    mu, std, mu_grad, std_grad = _predict(opt, inputs, return_grad)
+    std = np.maximum(std, MIN_STD)
+    z = _improvement_z(mu, std, best, maximize, xi)
+    scores = norm.cdf(z)
+    if return_grad:
+        grad = norm.pdf(z)[:, np.newaxis] * _z_grad(z, std, mu_grad, std_grad, maximize)
+        return scores, grad
+    return scores
+
+
+def pi_maximize(opt, inputs, xi=0.01, return_grad=False):
+    """
+    probability of improvement over the best output so far by at least `xi`.
+    """
+    return _pi(opt, inputs, xi, return_grad, maximize=True)
+
+
+def pi_minimize(opt, inputs, xi=0.01, return_grad=False):
+    """probability of improvement below the lowest output so far, see `pi_maximize`"""
+    return _pi(opt, inputs, xi, return_grad, maximize=False)
+
+
+def _rng(opt):
+    return getattr(opt, "batch_rng", np.random)
+
+
+def thompson_maximize(opt, inputs):
+    """
+    thompson sampling: a sample of the predicted distribution of the
+    output of each input. The samples of the inputs are independent, the
+    correlations of the posterior are ignored.
+    The score is random, so it should not be used with the local search
+    (`nb_local_search`).
+    """
+    mu, std = opt.model.predict(inputs, return_std=True)
+    noise = _rng(opt).normal(size=len(mu))
+    noise *= std
+    noise += mu
+    return noise
+
+
+def thompson_minimize(opt, inputs):
+    """thompson sampling, see `thompson_maximize`"""
+    return -thompson_maximize(opt, inputs)
+
+
+def _knowledge_gradient(opt, inputs, noise, maximize):
+    sign = 1.0 if maximize else -1.0
+    mu, std = opt.model.predict(inputs, return_std=True)
+    mu = sign * np.asarray(mu, dtype=float)
+    var = np.asarray(std, dtype=float) ** 2
+    # std of the change of the posterior mean after an evaluation
+    sigma = np.maximum(var / np.sqrt(var + noise), MIN_STD)
+    # best mean among the other candidates and the evaluated inputs
+    best = max(sign * best_output(opt, maximize=maximize), mu.max())
+    order = np.argsort(-mu)
+    others = np.full(len(mu), best)
+    if len(mu) > 1:
+        others[order[0]] = max(sign * best_output(opt, maximize=maximize), mu[order[1]])
+    z = -np.abs(mu - others) / sigma
+    return sigma * (z * norm.cdf(z) + norm.pdf(z))
+
+
+def knowledge_gradient_maximize(opt, inputs, noise=1e-6):
+    """
+    knowledge gradient: expected increase of the best posterior mean
+    (over the candidates and the evaluated inputs) after evaluating an input.
+    It is computed with independent beliefs (Frazier et al., A Knowledge-Gradient
+    Policy for Sequential Information Collection, 2008), i.e. the evaluation
+    of an input only changes its own posterior mean.
+    `noise` is the variance of the noise of the evaluations.
+    """
+    return _knowledge_gradient(opt, inputs, noise, maximize=True)
+
+
+def knowledge_gradient_minimize(opt, inputs, noise=1e-6):
+    """knowledge gradient, see `knowledge_gradient_maximize`"""
+    return _knowledge_gradient(opt, inputs, noise, maximize=False)
+
+
+def _mes(opt, inputs, nb_samples, maximize):
+    sign = 1.0 if maximize else -1.0
+    mu, std = opt.model.predict(inputs, return_std=True)
+    mu = sign * np.asarray(mu, dtype=float)
+    std = np.maximum(std, MIN_STD)
+    # samples of the max value: max of samples of the posterior
+    # over the candidates, which is at least the best output so far
+    samples = _rng(opt).normal(size=(nb_samples, len(mu)))
+    samples *= std
+    samples += mu
+    y_max = np.maximum(samples.max(axis=1), sign * best_output(opt, maximize=maximize))
+    gamma = (y_max[:, np.newaxis] - mu) / std
+    log_cdf = log_ndtr(gamma)
+    # phi(gamma) / Phi(gamma) in log-space, Phi underflows for negative gamma
+    ratio = np.exp(norm.logpdf(gamma) - log_cdf)
+    return (gamma * ratio / 2 - log_cdf).mean(axis=0)
+
+
+def mes_maximize(opt, inputs, nb_samples=10):
+    """
+    max-value entropy search (Wang and Jegelka, Max-value Entropy Search for
+    Efficient Bayesian Optimization, ICML 2017): information gained about the
+    max value of the function by evaluating an input. The max value is
+    sampled `nb_samples` times from the posterior over the candidates.
+    """
+    return _mes(opt, inputs, nb_samples, maximize=True)
+
+
+def mes_minimize(opt, inputs, nb_samples=10):
+    """max-value entropy search for the min value, see `mes_maximize`"""
+    return _mes(opt, inputs, nb_samples, maximize=False)
+
+
+# short names, kept for backward compatibility
+ucb = ucb_maximize
+ei = ei_maximize
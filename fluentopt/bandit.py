@@ -0,0 +1,12 @@
+"""
+This module is kept for backward compatibility, `Bandit` is an alias
+of `fluentopt.bayesianoptimizer.BayesianOptimizer` and the scores
+are in `fluentopt.acquisition`.
+"""
+from .acquisition import ucb_maximize
+from .acquisition import ucb_minimize
+from .bayesianoptimizer import BayesianOptimizer
+
+__all__ = ["Bandit", "ucb_maximize", "ucb_minimize"]
+
+Bandit = BayesianOptimizer
@@ -5,6 +5,9 @@ should follow.
 """
 from .utils import check_types_coherence
 from .utils import check_if_list_of_scalars
+from .utils import index_of
+from .history import MemoryHistory
+from .pruning import LearningCurves
 
 __all__ = ["Optimizer", "OptimizerWithHistory", "OptimizerWithSurrogate"]
 
@@ -45,25 +48,188 @@ class Optimizer(object):
         """
         raise NotImplementedError()
 
+    def report(self, x, step, value):
+        """
+        Report the intermediate result `value` at `step` of
+        the evaluation of `x` (e.g. the validation loss after each epoch).
+        Returns True if the evaluation should be stopped.
+        By default, the evaluations are never stopped.
+        """
+        return False
+
+    def suggest_many(self, n):
+        """
+        Suggest `n` inputs to evaluate, e.g. to feed a batch of
+        workers in parallel.
+        By default, `suggest` is just called `n` times, optimizers
+        can override it to provide diverse batches.
+
+        Parameters
+        ----------
+        n : int
+            number of inputs to suggest
+
+        Returns
+        -------
+        list of dicts, list of lists or list of scalars
+        """
+        return [self.suggest() for _ in range(n)]
+
+    def add_pending(self, x):
+        """
+        Tell the optimizer that the input `x` is being evaluated, so that
+        it can take it into account in the next suggestions, e.g. to
+        avoid suggesting it again.
+        `x` is not pending anymore once it is passed to `update`, `update_many`
+        or `remove_pending`.
+        By default, pending inputs are ignored.
+
+        Parameters
+        ----------
+        x: dict, or list or scalar
+        """
+        pass
+
+    def remove_pending(self, x):
+        """
+        Tell the optimizer that the input `x` is not being evaluated anymore,
+        e.g. because the evaluation failed.
+
+        Parameters
+        ----------
+        x: dict, or list or scalar
+        """
+        pass
+
 
 class OptimizerWithHistory(Optimizer):
-    def __init__(self):
-        self.input_history_ = []
-        self.output_history_ = []
+    """
+    Base class of optimizers which keep the evaluations.
+
+    Parameters
+    ----------
+
+    history : history backend instance or None
+        where to store the evaluations, see `fluentopt.history`.
+        default is `MemoryHistory()`. If the backend already contains
+        evaluations (e.g. a `SQLiteHistory` of a previous run), the optimizer
+        starts from them.
+
+    Attributes
+    ----------
+        input_history_ : list of inputs evaluated
+        output_history_: outputs corresponding to the evaluated inputs
+        pending_ : list of inputs being evaluated
+        learning_curves : `fluentopt.pruning.LearningCurves` instance
+            the results given to `report`. Set its `pruner` to stop
+            the hopeless evaluations early.
+    """
+
+    def __init__(self, history=None):
+        self.history = MemoryHistory() if history is None else history
+        self.pending_ = []
+        self.learning_curves = LearningCurves()
+
+    @property
+    def input_history_(self):
+        return self.history.inputs
+
+    @property
+    def output_history_(self):
+        return self.history.outputs
 
     def update_many(self, xlist, ylist):
         assert len(xlist) == len(ylist), "xlist and ylist should have the same length"
-        check_types_coherence(self.input_history_[-1:] + xlist)
+        check_types_coherence(self.input_history_[-1:] + list(xlist))
         check_if_list_of_scalars(ylist)
-        self.input_history_.extend(xlist)
-        self.output_history_.extend(ylist)
+        self.history.extend(xlist, ylist)
+        if self.pending_:
+            for x in xlist:
+                self.remove_pending(x)
+
+    def report(self, x, step, value):
+        return self.learning_curves.report(x, step, value)
+
+    def add_pending(self, x):
+        self.pending_.append(x)
+
+    def remove_pending(self, x):
+        i = index_of(self.pending_, x)
+        if i is not None:
+            del self.pending_[i]
+
+    def refresh_history(self):
+        """
+        load the evaluations added to the history backend by other processes
+        (e.g. with a shared `SQLiteHistory`). Returns the nb of new evaluations.
+        """
+        return self.history.refresh()
 
 
 class OptimizerWithSurrogate(OptimizerWithHistory):
-    def __init__(self, model):
-        super(OptimizerWithSurrogate, self).__init__()
+    """
+    Base class of optimizers which use a surrogate `model`
+    fitted on the history.
+
+    Parameters
+    ----------
+
+    model : scikit-learn like model instance
+        the surrogate
+
+    lazy : bool, optional[default=False]
+        if True, `update` and `update_many` only add the evaluations to the
+        history, the model is fitted once when it is needed, that is,
+        when `fit_model` is called (e.g. by `suggest`).
+
+    refit_every : int, optional[default=1]
+        the model is fitted only when at least `refit_every` new evaluations
+        have been added since the last fit. Between two fits,
+        the model does not take into account the latest evaluations.
+
+    history : history backend instance or None
+        see `OptimizerWithHistory`. The evaluations already in the
+        history are fed to the model the first time it is needed.
+    """
+
+    def __init__(self, model, lazy=False, refit_every=1, history=None):
+        super(OptimizerWithSurrogate, self).__init__(history=history)
         self.model = model
+        self.lazy = lazy
+        self.refit_every = refit_every
+        self._nb_unfitted = len(self.history)
 
     def update_many(self, xlist, ylist):
+        n = len(self.history)
         super(OptimizerWithSurrogate, self).update_many(xlist, ylist)
-        self.model.fit(self.input_history_, self.output_history_)
+        # the history backend can also load evaluations added by other processes
+        self._nb_unfitted += len(self.history) - n
+        if not self.lazy:
+            self.fit_model()
+
+    def refresh_history(self):
+        n = super(OptimizerWithSurrogate, self).refresh_history()
+        self._nb_unfitted += n
+        return n
+
+    def fit_model(self, force=False):
+        """
+        Feed the evaluations that the model has not seen yet to the model,
+        if there are at least `refit_every` of them, or if the model
+        has never been fitted, or if `force` is True.
+        """
+        n = self._nb_unfitted
+        if n == 0:
+            return
+        is_fitted = n < len(self.input_history_)
+        if is_fitted and not force and n < self.refit_every:
+            return
+        if is_fitted and hasattr(self.model, "partial_fit"):
+            # only feed the new evaluations to the model, avoids
+            # a refit from scratch
+            self.model.partial_fit(
+                self.input_history_[-n:], self.output_history_[-n:]
+            )
+        else:
+            self.model.fit(self.input_history_, self.output_history_)
+        self._nb_unfitted = 0
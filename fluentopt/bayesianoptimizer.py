@@ -1,48 +1,44 @@
 """
 This module provides bayesian optimizers.
 """
+import inspect
+
 import numpy as np
-from sklearn.gaussian_process import GaussianProcessRegressor
-from scipy.stats import norm
+from scipy.optimize import minimize
 
+from .acquisition import ei
+from .acquisition import ei_maximize
+from .acquisition import ei_minimize
+from .acquisition import ucb
+from .acquisition import ucb_maximize
+from .acquisition import ucb_minimize
 from .base import OptimizerWithSurrogate
+from .history import MemoryHistory
 from .transformers import Wrapper
+from .transformers import vectorize
+from .transformers import Vectorizer
+from .transformers import take_inputs
+from .transformers import is_list_of_dicts
+from .transformers import is_list_of_varying_length_lists
+from .models import IncrementalGaussianProcessRegressor
+from .space import Space
 from .utils import check_random_state
 from .utils import check_sampler
-from .utils import argmax
-
-__all__ = ["BayesianOptimizer", "ucb", "ei"]
-
-def ei(opt, inputs, eps=1e-7):
-    #http://ash-aldujaili.github.io/blog/2018/02/01/ei/
-    cur_best = np.max(opt.output_history_)
-    mu, std = opt.model.predict(inputs, return_std=True)
-    z = (cur_best - mu) / (std + eps)
-    return (cur_best - mu) * norm.cdf(z) + std * norm.pdf(z)
+from .utils import check_batch_sampler
+from .utils import check_numpy_random_state
+from .utils import GrowableArray
 
-
-def ucb(opt, inputs, kappa=1.96):
-    """
-    UCB score that can be used as
-    the `score` parameter of the `BayesianOptimizer`.
-    Use this score if the objective is maximization with ucb.
-    UCB scores assume that the model can return std, that is,
-    `model.predict` shoud accept a `return_std` parameter.
-    An exception will be thrown if this is not the case.
-
-    Parameters
-    ==========
-
-    model : scikit-learn like estimator with return_std
-    inputs : numpy array
-    kappa : float
-        controls the tradeoff between exploration and exploitation
-        (higher value = more exploration)
-    """
-    # ucb scores assume that the model can return std
-    # an exception will be thrown if this is not the case
-    pred, std = opt.model.predict(inputs, return_std=True)
-    return pred + kappa * std
+__all__ = [
+    "BayesianOptimizer",
+    "TrustRegion",
+    "ucb",
+    "ucb_maximize",
+    "ucb_minimize",
+    "ei",
+    "ei_maximize",
+    "ei_minimize",
+    "local_penalization",
+]
 
 
 class BayesianOptimizer(OptimizerWithSurrogate):
@@ -56,14 +52,25 @@ class BayesianOptimizer(OptimizerWithSurrogate):
 
     Parameters
     ----------
-    sampler : callable
+    sampler : callable or fluentopt.space.Space or None
         a callable used to sample an input for further evaluation.
         it takes one argument, a random number generator following the API
         of numpy.random and returns a dict, a list or a scalar.
+        it can be None if `batch_sampler` is provided.
+        if it is a `fluentopt.space.Space`, the candidates are sampled
+        directly as encoded numpy arrays and the suggested inputs
+        are decoded into dicts. In that case, the default model uses
+        the space to vectorize the inputs, if you provide
+        your own model, use `Wrapper(your_model(), transform_X=space)`.
 
     model : scikit-learn like model instance, optional
-        default is fluentopt.transformers.Wrapper(GaussianProcessRegressor(normalize_y=True)).
+        default is fluentopt.transformers.Wrapper(fluentopt.models.IncrementalGaussianProcessRegressor(freeze=True)),
+        a gaussian process which is updated incrementally when new evaluations are added.
+        Its kernel hyper-parameters are warm-started from the previous fit and
+        only re-optimized every 10 evaluations (see `refit_every`, `freeze`
+        and `lml_tolerance` of `IncrementalGaussianProcessRegressor`).
         Alternatives :
+            - fluentopt.transformers.Wrapper(GaussianProcessRegressor(normalize_y=True))
             - fluentopt.transformers.Wrapper(fluentopt.utils.RandomForestRegressorWithUncertainty())
             - or use another model which supports returning uncertainty in prediction:
                 fluentopt.transformers.Wrapper(your_model())
@@ -74,15 +81,92 @@ class BayesianOptimizer(OptimizerWithSurrogate):
         number of random samples to draw from the `sampler` in each
         call of `suggest` to select the next input to evaluate.
 
-    score : callable, optional[default=ucb_maximize]
+    score : callable or None, optional
         score function to use when selecting the next input to evaluate.
-        it takes two arguments, a model and a list of inputs.
+        it takes two arguments, the optimizer and a list of inputs.
         it returns a list of scores.
-        Available scores are : `ucb`, `ei`.
+        The `*_maximize` scores should be used to maximize the outputs
+        and the `*_minimize` ones to minimize them (see `maximize`).
+        Available scores are in `fluentopt.acquisition`: `ucb_*`, `ei_*`,
+        `log_ei_*`, `pi_*`, `thompson_*`, `knowledge_gradient_*`, `mes_*`.
+        default is `ei_maximize` if `maximize` is True, `ei_minimize` otherwise.
 
     random_state : int or None, optional
         controls the random seed used by `sampler`.
 
+    lazy : bool, optional[default=False]
+        if True, the model is not fitted in `update` and `update_many`,
+        but only once in the next call to `suggest`.
+
+    refit_every : int, optional[default=1]
+        fit the model only when at least `refit_every` new evaluations
+        are available.
+
+    penalization_radius : float, optional[default=0.1]
+        used by `suggest_many`. Once an input is selected in a batch,
+        the scores of the candidates that are close to it are penalized
+        so that the batch is diverse. The radius is expressed relative
+        to the range of each (vectorized) input column.
+
+    batch_sampler : callable or None, optional
+        a callable used to sample all the candidates of a call of `suggest` at once,
+        instead of calling `sampler` `nb_suggestions` times.
+        it takes two arguments, a `numpy.random.RandomState` instance and the
+        number of inputs `n` to sample. It returns either:
+            - a 2D numpy array of shape (n, nb_features), each row is an input
+            - a 1D numpy array of shape (n,), each element is a scalar input
+            - a dict of 1D arrays of shape (n,), one array per key of the inputs
+        the candidates are given to the model as is, without building
+        an input per candidate. Only the selected inputs are converted to
+        numpy arrays, scalars or dicts respectively.
+        if provided, it is used instead of `sampler`.
+
+    nb_local_search : int, optional[default=0]
+        if strictly positive, the `nb_local_search` best candidates
+        are refined with a multi-start L-BFGS-B maximization of the score
+        over the box of the vectorized inputs (`Space.bounds` if `sampler`
+        is a `Space`, otherwise the box containing the candidates).
+        The refined candidates compete with the sampled ones.
+        Analytic gradients are used if the score accepts a `return_grad`
+        parameter and the model has a `predict_gradient` method, otherwise
+        they are estimated with finite differences.
+        Refinement is only done if the inputs are numeric (scalars, fixed length
+        lists, numpy arrays, or dicts of a `Space`).
+
+    local_search_maxiter : int, optional[default=20]
+        max nb of iterations of L-BFGS-B.
+
+    history : history backend instance or None
+        where to store the evaluations, see `fluentopt.history`.
+        default is `fluentopt.history.MemoryHistory()`.
+
+    trust_region : TrustRegion instance or None, optional
+        if provided, the optimizer works in trust region mode (see `TrustRegion`):
+        the model is fitted only on the evaluations inside a hyper-rectangle
+        around the best input and the candidates are sampled inside it.
+        `sampler` should be a `fluentopt.space.Space`.
+
+    batch_strategy : 'penalization' or 'thompson', optional[default='penalization']
+        how `suggest_many` builds the batches. With 'penalization', the
+        candidates are scored with `score` and the batch is built with
+        local penalization. With 'thompson', one function per input of the
+        batch is sampled from the posterior of the model and the best
+        candidate of each function is selected (batch thompson sampling,
+        `score` is not used, see `suggest_many_thompson`). This requires a model
+        with a `sample_functions` method (e.g. the default one), otherwise
+        the candidates values are sampled independently from the
+        predicted distributions.
+
+    nb_features : int, optional[default=1000]
+        nb of random Fourier features of the functions sampled
+        with `batch_strategy='thompson'`.
+
+    maximize : bool, optional[default=True]
+        whether the outputs are maximized or minimized. It should agree
+        with `score`, it is used by the parts of the optimizer which
+        do not go through `score`: the center of the trust region
+        and the batches of `batch_strategy='thompson'`.
+
     Attributes
     ----------
         input_history_ : list of inputs evaluated
@@ -93,27 +177,546 @@ class BayesianOptimizer(OptimizerWithSurrogate):
     def __init__(
         self,
         sampler,
-        model=Wrapper(GaussianProcessRegressor(normalize_y=True)),
+        model=None,
         nb_suggestions=100,
-        score=ei,
+        score=None,
         random_state=None,
+        lazy=False,
+        refit_every=1,
+        penalization_radius=0.1,
+        batch_sampler=None,
+        nb_local_search=0,
+        local_search_maxiter=20,
+        history=None,
+        trust_region=None,
+        batch_strategy="penalization",
+        nb_features=1000,
+        maximize=True,
     ):
-        super(BayesianOptimizer, self).__init__(model)
-        self.sampler = check_sampler(sampler)
+        assert batch_strategy in ("penalization", "thompson"), (
+            "batch_strategy should be 'penalization' or 'thompson'"
+        )
+        if isinstance(sampler, Space):
+            assert batch_sampler is None, "batch_sampler should be None if sampler is a Space"
+            self.space = sampler
+            batch_sampler = sampler.sample
+            transform_X = sampler
+        else:
+            self.space = None
+            transform_X = None
+        if trust_region is not None:
+            assert self.space is not None, "sampler should be a Space to use a trust region"
+        self.trust_region = trust_region
+        if model is None:
+            model = Wrapper(
+                IncrementalGaussianProcessRegressor(freeze=True), transform_X=transform_X
+            )
+        if history is None and self.space is not None:
+            # the inputs are encoded once, when they are added
+            history = MemoryHistory(encoder=self.space)
+        super(BayesianOptimizer, self).__init__(
+            model, lazy=lazy, refit_every=refit_every, history=history
+        )
+        self.batch_sampler = check_batch_sampler(sampler, batch_sampler)
+        self.sampler = check_sampler(sampler) if batch_sampler is None else sampler
         self.rng = check_random_state(random_state)
+        self.batch_rng = check_numpy_random_state(random_state)
         self.nb_suggestions = nb_suggestions
+        if score is None:
+            score = ei_maximize if maximize else ei_minimize
         self.score = score
+        self.maximize = maximize
+        self.penalization_radius = penalization_radius
+        self.nb_local_search = nb_local_search
+        self.local_search_maxiter = local_search_maxiter
+        self.batch_strategy = batch_strategy
+        self.nb_features = nb_features
+
+    def fit_model(self, force=False):
+        if self.trust_region is not None:
+            # the model is only fitted on the evaluations inside the region
+            self.trust_region.fit_model(self, force=force)
+        else:
+            super(BayesianOptimizer, self).fit_model(force=force)
 
     def get_scores(self, inputs):
         """ use `score` to get the list of scores of the `inputs`"""
+        self.fit_model()
         return self.score(self, inputs)
 
+    def sample_candidates(self, n):
+        """
+        sample `n` candidates, using `batch_sampler` if available,
+        otherwise `sampler`. In trust region mode, the candidates
+        are sampled inside the region.
+        """
+        if self.trust_region is not None and self.trust_region.is_active(self):
+            return self.trust_region.sample(self, n)
+        if self.batch_sampler is not None:
+            return self.batch_sampler(self.batch_rng, n)
+        else:
+            return [self.sampler(self.rng) for _ in range(n)]
+
+    def take_inputs(self, candidates, indices):
+        """
+        convert the candidates at `indices` into the inputs given to the user.
+        """
+        if self.space is not None:
+            return self.space.to_dicts(candidates[list(indices)])
+        else:
+            return take_inputs(candidates, indices)
+
+    def _has_surrogate(self):
+        if self.trust_region is not None:
+            return self.trust_region.is_active(self)
+        return len(self.input_history_) > 0
+
     def suggest(self):
 
         # if the history is empty, just sample randomly (because we don't have yet a surrogate)
-        if len(self.input_history_) == 0:
-            return self.sampler(self.rng)
+        if not self._has_surrogate():
+            return self.take_inputs(self.sample_candidates(1), [0])[0]
+        elif self.pending_:
+            # penalize the candidates close to the inputs being evaluated
+            return self.suggest_many(1)[0]
         else:
-            xnext = [self.sampler(self.rng) for _ in range(self.nb_suggestions)]
+            xnext = self.sample_candidates(self.nb_suggestions)
             scores = self.get_scores(xnext)
-            return xnext[argmax(scores)]
+            xnext, scores = self._refine(xnext, scores)
+            return self.take_inputs(xnext, [int(np.argmax(scores))])[0]
+
+    def suggest_many(self, n):
+        """
+        Suggest a batch of `n` diverse inputs using a single
+        scoring pass over the sampled candidates.
+        A total of `max(nb_suggestions, n)` candidates are sampled and
+        scored once, then the batch is built greedily with local penalization:
+        each time an input is selected, the scores of the candidates
+        near it are decreased, so that the next selected inputs are
+        far from the ones already in the batch.
+        The candidates near the pending inputs (see `add_pending`)
+        are penalized the same way.
+        With `batch_strategy='thompson'`, see `suggest_many_thompson`.
+        """
+        if not self._has_surrogate():
+            return self.take_inputs(self.sample_candidates(n), range(n))
+        if self.batch_strategy == "thompson":
+            return self.suggest_many_thompson(n)
+        xnext = self.sample_candidates(max(self.nb_suggestions, n))
+        scores = self.get_scores(xnext)
+        xnext, scores = self._refine(xnext, scores)
+        if self.space is not None:
+            vectorizer = self.space
+        else:
+            vectorizer = Vectorizer().fit(xnext)
+        X = vectorizer.transform(xnext)
+        X_pending = vectorizer.transform(self.pending_) if self.pending_ else None
+        selected = local_penalization(
+            X, scores, n, radius=self.penalization_radius, X_pending=X_pending
+        )
+        return self.take_inputs(xnext, selected)
+
+    def suggest_many_thompson(self, n):
+        """
+        Suggest a batch of `n` inputs with thompson sampling: `n` functions
+        are sampled from the posterior of the model (see
+        `IncrementalGaussianProcessRegressor.sample_functions`), and each
+        of them selects its best candidate among `max(nb_suggestions, n)`
+        sampled ones. The cost is linear in the nb of candidates.
+        The functions are maximized, or minimized if `maximize`
+        is False. The inputs of the batch are all different,
+        and the candidates near the pending inputs (see `add_pending`)
+        are penalized like in `suggest_many`.
+        """
+        self.fit_model()
+        xnext = self.sample_candidates(max(self.nb_suggestions, n))
+        values = None
+        if hasattr(self.model, "sample_functions"):
+            try:
+                functions = self.model.sample_functions(
+                    n, nb_features=self.nb_features, random_state=self.batch_rng
+                )
+            except NotImplementedError:
+                pass
+            else:
+                values = functions(xnext)
+        if values is None:
+            mu, std = self.model.predict(xnext, return_std=True)
+            values = mu + std * self.batch_rng.normal(size=(n, len(mu)))
+        values = np.asarray(values, dtype=float)
+        if not self.maximize:
+            values = -values
+        # the values of each function are rescaled to [0, 1],
+        # so that the penalization is the one of `local_penalization`
+        vmin = values.min(axis=1, keepdims=True)
+        vrange = values.max(axis=1, keepdims=True) - vmin
+        values = (values - vmin) / np.where(vrange > 0, vrange, 1.0)
+        if self.pending_:
+            vectorizer = self.space if self.space is not None else Vectorizer().fit(xnext)
+            values = values - _proximity(
+                vectorizer.transform(xnext),
+                vectorizer.transform(self.pending_),
+                self.penalization_radius,
+            )
+        selected = []
+        for f in values:
+            f[selected] = -np.inf
+            selected.append(int(np.argmax(f)))
+        return self.take_inputs(xnext, selected)
+
+    def _can_refine(self, candidates):
+        if self.nb_local_search <= 0:
+            return False
+        if self.space is not None or isinstance(candidates, np.ndarray):
+            return True
+        return (
+            type(candidates) == list
+            and not is_list_of_dicts(candidates)
+            and not is_list_of_varying_length_lists(candidates)
+        )
+
+    def _refine(self, candidates, scores):
+        """
+        maximize the score with L-BFGS-B starting from the `nb_local_search`
+        best candidates, and add the resulting inputs to the candidates.
+        """
+        if not self._can_refine(candidates):
+            return candidates, scores
+        scores = np.asarray(scores, dtype=float).ravel()
+        X = vectorize(candidates)
+        if self.trust_region is not None:
+            bounds = self.trust_region.bounds(self)
+        elif self.space is not None:
+            bounds = self.space.bounds
+        else:
+            bounds = np.stack((X.min(axis=0), X.max(axis=0)), axis=1)
+        k = min(self.nb_local_search, len(X))
+        starts = X[np.argsort(-scores)[:k]]
+        shape = starts.shape
+        use_grad = _accepts_return_grad(self.score) and hasattr(
+            self.model, "predict_gradient"
+        )
+        if use_grad:
+            try:
+                self.score(self, starts[:1], return_grad=True)
+            except NotImplementedError:
+                use_grad = False
+
+        # the starts are independent, so maximizing the sum of their scores
+        # optimizes all of them in a single L-BFGS-B run
+        def func(x):
+            x = x.reshape(shape)
+            if use_grad:
+                s, grad = self.score(self, x, return_grad=True)
+                return -np.sum(s), -np.asarray(grad).ravel()
+            return -np.sum(self.score(self, x))
+
+        res = minimize(
+            func,
+            starts.ravel(),
+            jac=use_grad,
+            method="L-BFGS-B",
+            bounds=np.tile(bounds, (k, 1)),
+            options={"maxiter": self.local_search_maxiter},
+        )
+        X_refined = res.x.reshape(shape)
+        if self.space is not None:
+            X_refined = self.space.project(X_refined)
+        scores_refined = np.asarray(self.get_scores(X_refined), dtype=float).ravel()
+        candidates = _extend_candidates(candidates, X_refined)
+        return candidates, np.concatenate((scores, scores_refined))
+
+
+class TrustRegion(object):
+    """
+    trust region mode of `BayesianOptimizer`, for high dimensional
+    problems (TuRBO, Eriksson et al. 2019).
+    The search is restricted to a hyper-rectangle centered on the best
+    input evaluated so far (according to `maximize` of the optimizer),
+    the model is only fitted on the evaluations inside it (so the fits
+    stay small) and the candidates are sampled inside it.
+    As the evaluations inside the region change when it moves, the model
+    is fitted from scratch (`partial_fit` is not used), at most once every
+    `refit_every` evaluations of the optimizer, or when the region
+    is resized or restarted.
+    Each time new evaluations are received, they are counted as a success
+    if they improve the best output, as a failure otherwise. After
+    `success_tolerance` consecutive successes the region is expanded, after
+    `failure_tolerance` consecutive failures it is shrunk. When it becomes
+    smaller than `min_length`, the search is restarted from scratch: the
+    evaluations done before are not used anymore by the surrogate.
+
+    The region is defined in the encoded space of the `Space`, where
+    each column is rescaled to [0, 1] using `Space.bounds`.
+
+    Parameters
+    ----------
+
+    length : float, optional[default=0.8]
+        initial side length of the region (in [0, 1] rescaled columns).
+
+    min_length : float, optional[default=0.5 ** 7]
+        the search is restarted when the length becomes smaller.
+
+    max_length : float, optional[default=1.6]
+
+    success_tolerance : int, optional[default=3]
+
+    failure_tolerance : int or None, optional
+        default is max(4, nb of encoded columns).
+
+    min_points : int, optional[default=10]
+        if there are less evaluations than `min_points` inside the region,
+        the model is fitted on the `min_points` evaluations closest to its center.
+
+    nb_init : int, optional[default=5]
+        nb of evaluations of each run (the first one and the ones after
+        each restart) sampled from the whole space before the region is used.
+
+    perturbation_prob : float or None, optional
+        probability of each column of the candidates to be sampled in the
+        region, the other ones take the value of the center. At least one
+        column is always sampled. Default is min(1, 20 / nb of encoded columns),
+        so that in high dimension the candidates only change a few columns.
+
+    Attributes
+    ----------
+        length_ : current side length of the region
+        center_ : rescaled encoded best input, center of the region
+        nb_success_ : nb of consecutive successes
+        nb_failure_ : nb of consecutive failures
+        nb_restarts_ : nb of restarts
+        start_ : index in the history of the first evaluation of the current run
+    """
+
+    def __init__(
+        self,
+        length=0.8,
+        min_length=0.5 ** 7,
+        max_length=1.6,
+        success_tolerance=3,
+        failure_tolerance=None,
+        min_points=10,
+        perturbation_prob=None,
+        nb_init=5,
+    ):
+        assert nb_init >= 1, "nb_init should be at least 1"
+        self.length = length
+        self.min_length = min_length
+        self.max_length = max_length
+        self.success_tolerance = success_tolerance
+        self.failure_tolerance = failure_tolerance
+        self.min_points = min_points
+        self.perturbation_prob = perturbation_prob
+        self.nb_init = nb_init
+        self.nb_restarts_ = 0
+        self._restart(0)
+
+    def _restart(self, start):
+        self.start_ = start
+        self.length_ = self.length
+        self.nb_success_ = 0
+        self.nb_failure_ = 0
+        self._best = None
+        self._nb_seen = start
+        self._fitted_key = None
+        # rescaled encoded inputs of the run, when the history does not encode them
+        self._encoded = None
+
+    def update(self, opt):
+        """update the region with the evaluations received since the last call"""
+        outputs = opt.output_history_
+        n = len(outputs)
+        if n <= self._nb_seen:
+            return
+        # the outputs are compared with their sign flipped when minimizing
+        sign = 1 if opt.maximize else -1
+        best = max(sign * y for y in outputs[self._nb_seen : n])
+        self._nb_seen = n
+        if self._best is None:
+            # first evaluations of the run
+            self._best = best
+            return
+        if best > self._best + 1e-3 * abs(self._best):
+            self.nb_success_ += 1
+            self.nb_failure_ = 0
+        else:
+            self.nb_failure_ += 1
+            self.nb_success_ = 0
+        self._best = max(self._best, best)
+        failure_tolerance = self.failure_tolerance
+        if failure_tolerance is None:
+            failure_tolerance = max(4, opt.space.n_columns)
+        if self.nb_success_ >= self.success_tolerance:
+            self.length_ = min(2 * self.length_, self.max_length)
+            self.nb_success_ = 0
+        elif self.nb_failure_ >= failure_tolerance:
+            self.length_ /= 2
+            self.nb_failure_ = 0
+        if self.length_ < self.min_length:
+            self.nb_restarts_ += 1
+            self._restart(n)
+
+    def is_active(self, opt):
+        """True if the current run has at least `nb_init` evaluations"""
+        self.update(opt)
+        return len(opt.output_history_) >= self.start_ + self.nb_init
+
+    def best_output(self, opt, maximize=True):
+        """best output of the current run"""
+        outputs = opt.output_history_[self.start_ :]
+        return np.max(outputs) if maximize else np.min(outputs)
+
+    def _rescaled_history(self, opt):
+        bounds = opt.space.bounds
+        if getattr(opt.history, "encoder", None) is opt.space:
+            X = opt.history.encoded_inputs[self.start_ :]
+            return (X - bounds[:, 0]) / (bounds[:, 1] - bounds[:, 0])
+        # only the new inputs are encoded
+        if self._encoded is None:
+            self._encoded = GrowableArray(opt.space.n_columns)
+        inputs = opt.input_history_[self.start_ + len(self._encoded) :]
+        if len(inputs):
+            X = opt.space.transform(inputs)
+            self._encoded.extend((X - bounds[:, 0]) / (bounds[:, 1] - bounds[:, 0]))
+        return self._encoded.array
+
+    @property
+    def center_(self):
+        return self._center
+
+    def _box(self, opt):
+        X = self._rescaled_history(opt)
+        outputs = opt.output_history_[self.start_ :]
+        best = np.argmax(outputs) if opt.maximize else np.argmin(outputs)
+        self._center = X[int(best)]
+        low = np.clip(self._center - self.length_ / 2, 0, 1)
+        high = np.clip(self._center + self.length_ / 2, 0, 1)
+        return X, low, high
+
+    def bounds(self, opt):
+        """bounds of the region in the encoded space, as `Space.bounds`"""
+        _, low, high = self._box(opt)
+        space_bounds = opt.space.bounds
+        scale = space_bounds[:, 1] - space_bounds[:, 0]
+        return np.stack((low, high), axis=1) * scale[:, np.newaxis] + space_bounds[:, [0]]
+
+    def sample(self, opt, n):
+        """sample `n` encoded candidates inside the region"""
+        _, low, high = self._box(opt)
+        rng = opt.batch_rng
+        d = len(low)
+        prob = self.perturbation_prob
+        if prob is None:
+            prob = min(1.0, 20.0 / d)
+        mask = rng.uniform(size=(n, d)) < prob
+        mask[np.arange(n), rng.randint(0, d, size=n)] = True
+        X = np.tile(self._center, (n, 1))
+        X[mask] = (low + rng.uniform(size=(n, d)) * (high - low))[mask]
+        space_bounds = opt.space.bounds
+        X = X * (space_bounds[:, 1] - space_bounds[:, 0]) + space_bounds[:, 0]
+        return opt.space.project(X)
+
+    def fit_model(self, opt, force=False):
+        """fit the model of `opt` on the evaluations inside the region"""
+        if not self.is_active(opt):
+            return
+        key = (len(opt.output_history_), self.start_, self.length_)
+        if self._fitted_key is not None and not force:
+            nb_fitted, start, length = self._fitted_key
+            if (start, length) == key[1:] and key[0] - nb_fitted < opt.refit_every:
+                return
+        X, low, high = self._box(opt)
+        inside = np.all((X >= low) & (X <= high), axis=1)
+        indices = np.flatnonzero(inside)
+        if len(indices) < self.min_points:
+            dist = np.abs(X - self._center).max(axis=1)
+            indices = np.argsort(dist)[: self.min_points]
+        inputs = opt.input_history_[self.start_ :]
+        outputs = opt.output_history_[self.start_ :]
+        opt.model.fit([inputs[i] for i in indices], [outputs[i] for i in indices])
+        self._fitted_key = key
+
+
+def _accepts_return_grad(score):
+    try:
+        params = inspect.signature(score).parameters
+    except (TypeError, ValueError):
+        return False
+    return "return_grad" in params
+
+
+def _extend_candidates(candidates, X):
+    """
+    add the rows of the 2D array `X` to `candidates`,
+    keeping the format of `candidates`.
+    """
+    if isinstance(candidates, np.ndarray):
+        if candidates.ndim == 1:
+            X = X[:, 0]
+        return np.concatenate((candidates, X), axis=0)
+    elif len(candidates) and isinstance(candidates[0], (list, tuple)):
+        return candidates + X.tolist()
+    else:
+        return candidates + X[:, 0].tolist()
+
+
+def local_penalization(X, scores, n, radius=0.1, X_pending=None):
+    """
+    Greedily select `n` rows of `X` with high `scores` while
+    penalizing the rows that are close to the already selected ones.
+
+    Parameters
+    ----------
+    X : 2D numpy array
+        vectorized candidates
+    scores : list or 1D numpy array
+        score of each candidate (higher is better)
+    n : int
+        number of candidates to select
+    radius : float
+        radius of the penalization, relative to the range of each column
+        of `X`.
+    X_pending : 2D numpy array or None
+        vectorized inputs which are being evaluated, the rows
+        of `X` close to them are penalized as if they were already selected.
+
+    Returns
+    -------
+    list of int, the indices of the selected rows
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    smin, smax = scores.min(), scores.max()
+    scores = (scores - smin) / (smax - smin if smax > smin else 1.0)
+    if X_pending is not None and len(X_pending):
+        scores = scores - _proximity(X, X_pending, radius)
+    X = _rescale(X)
+    selected = []
+    for _ in range(min(n, len(X))):
+        i = int(np.argmax(scores))
+        selected.append(i)
+        dist = ((X - X[i]) ** 2).sum(axis=1)
+        # scores are in [0, 1], so the candidates very close to the
+        # selected one get penalized below every other candidate
+        scores = scores - np.exp(-dist / (2 * radius ** 2))
+        scores[selected] = -np.inf
+    return selected
+
+
+def _rescale(X, X_other=None):
+    # rescale the columns of `X` (and of `X_other` with the
+    # same scaling) to [0, 1] according to the range of `X`
+    X = np.nan_to_num(np.asarray(X, dtype=float))
+    low, high = X.min(axis=0), X.max(axis=0)
+    scale = np.where(high > low, high - low, 1.0)
+    if X_other is None:
+        return (X - low) / scale
+    return (X - low) / scale, (np.nan_to_num(np.asarray(X_other, dtype=float)) - low) / scale
+
+
+def _proximity(X, X_pending, radius):
+    # sum over the rows of `X_pending` of a gaussian of the distance
+    # to each row of `X`, in the rescaled space of `X`
+    X, X_pending = _rescale(X, X_pending)
+    dist = ((X[:, np.newaxis, :] - X_pending[np.newaxis, :, :]) ** 2).sum(axis=2)
+    return np.exp(-dist / (2 * radius ** 2)).sum(axis=1)
@@ -0,0 +1,30 @@
+"""
+Benchmarks of the optimizers on synthetic test functions,
+which run offline, without any other dependency than fluentopt.
+Run `python -m fluentopt.benchmarks --help` for the command line.
+"""
+from .functions import Ackley
+from .functions import BenchmarkFunction
+from .functions import Branin
+from .functions import Hartmann
+from .functions import Levy
+from .functions import Rosenbrock
+from .runner import curves_to_csv
+from .runner import run_benchmark
+from .runner import run_one
+from .runner import to_csv
+from .runner import to_json
+
+__all__ = [
+    "Ackley",
+    "BenchmarkFunction",
+    "Branin",
+    "Hartmann",
+    "Levy",
+    "Rosenbrock",
+    "curves_to_csv",
+    "run_benchmark",
+    "run_one",
+    "to_csv",
+    "to_json",
+]
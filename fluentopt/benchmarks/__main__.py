@@ -0,0 +1,64 @@
+"""
+command line of the benchmarks, e.g.:
+
+    python -m fluentopt.benchmarks --algos random_search cmaes \
+        --functions branin hartmann6 --seeds 5 --budget 100 --workers 4 \
+        --noise-std 0.1 --csv benchmark.csv --json benchmark.json
+"""
+import argparse
+
+import numpy as np
+
+from .runner import FUNCTIONS
+from .runner import OPTIMIZERS
+from .runner import curves_to_csv
+from .runner import run_benchmark
+from .runner import to_csv
+from .runner import to_json
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fluentopt.benchmarks")
+    parser.add_argument("--algos", nargs="+", default=sorted(OPTIMIZERS))
+    parser.add_argument("--functions", nargs="+", default=sorted(FUNCTIONS))
+    parser.add_argument("--seeds", type=int, default=5, help="nb of seeds")
+    parser.add_argument("--budget", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--noise-std", type=float, default=0.0)
+    parser.add_argument(
+        "--memory", action="store_true", help="track the peak memory, slows down the runs"
+    )
+    parser.add_argument("--csv", default="benchmark.csv")
+    parser.add_argument("--curves-csv", default=None)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args(argv)
+    functions = [FUNCTIONS[name](noise_std=args.noise_std) for name in args.functions]
+    results = run_benchmark(
+        args.algos,
+        functions,
+        seeds=range(args.seeds),
+        budget=args.budget,
+        nb_workers=args.workers,
+        track_memory=args.memory,
+    )
+    for func in args.functions:
+        for algo in args.algos:
+            runs = [r for r in results if r["func"] == func and r["algo"] == algo]
+            print(
+                "{:<12} {:<20} regret={:.4g} overhead={:.3f}s eval={:.3f}s".format(
+                    func,
+                    algo,
+                    np.mean([r["regret"] for r in runs]),
+                    np.mean([r["overhead"] for r in runs]),
+                    np.mean([r["eval_time"] for r in runs]),
+                )
+            )
+    to_csv(results, args.csv)
+    if args.curves_csv:
+        curves_to_csv(results, args.curves_csv)
+    if args.json:
+        to_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
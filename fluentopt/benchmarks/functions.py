@@ -0,0 +1,215 @@
+"""
+This module contains synthetic test functions to benchmark the optimizers.
+They are all minimized, they are vectorized (they can evaluate a 2D numpy
+array of inputs at once) and their optimum is known, so the regret of
+an optimizer can be computed. Each function can be made noisy with
+`noise_std`, the regret is then computed on the noise free values.
+"""
+import numpy as np
+
+from ..space import Real
+from ..space import Space
+from ..utils import check_numpy_random_state
+
+__all__ = [
+    "BenchmarkFunction",
+    "Branin",
+    "Hartmann",
+    "Rosenbrock",
+    "Ackley",
+    "Levy",
+]
+
+
+class BenchmarkFunction(object):
+    """
+    Base class of the test functions.
+    The inputs can be 1D numpy arrays (or lists), dicts sampled from
+    `space` (with keys `names`), or a 2D numpy array of inputs.
+
+    Parameters
+    ----------
+
+    noise_std : float, optional[default=0]
+        std of the gaussian noise added to the outputs.
+
+    random_state : int or None, optional
+        random state of the noise.
+
+    Attributes
+    ----------
+        name : str
+        dimension : int
+        bounds : 2D numpy array of shape (dimension, 2), low and high bounds
+        optimum : float, the min value of the function
+        argmin : 1D numpy array, a minimizer of the function
+    """
+
+    name = None
+
+    def __init__(self, noise_std=0.0, random_state=None):
+        self.noise_std = noise_std
+        self.rng = check_numpy_random_state(random_state)
+
+    @property
+    def dimension(self):
+        return len(self.bounds)
+
+    @property
+    def names(self):
+        return ["x{}".format(i) for i in range(self.dimension)]
+
+    @property
+    def space(self):
+        """a `fluentopt.space.Space` with a `Real` per dimension"""
+        return Space(
+            [(name, Real(low, high)) for name, (low, high) in zip(self.names, self.bounds)]
+        )
+
+    def to_array(self, x):
+        """convert an input into a 1D numpy array"""
+        if isinstance(x, dict):
+            return np.array([x[name] for name in self.names], dtype=float)
+        return np.asarray(x, dtype=float)
+
+    def __call__(self, x):
+        """
+        evaluate `x` (with noise), returns a float for a single
+        input and a 1D numpy array for a 2D numpy array of inputs.
+        """
+        X = self.to_array(x)
+        y = self.evaluate(np.atleast_2d(X))
+        if self.noise_std:
+            y = y + self.noise_std * self.rng.normal(size=len(y))
+        return float(y[0]) if X.ndim == 1 else y
+
+    def evaluate(self, X):
+        """noise free values of the rows of the 2D numpy array `X`"""
+        raise NotImplementedError()
+
+    def regret(self, x):
+        """noise free value of `x` minus the optimum"""
+        return float(self.evaluate(self.to_array(x)[np.newaxis, :])[0] - self.optimum)
+
+
+class Branin(BenchmarkFunction):
+    """Branin-Hoo function, 2D with three global minima"""
+
+    name = "branin"
+    bounds = np.array([[-5.0, 10.0], [0.0, 15.0]])
+    optimum = 0.397887357729739
+    argmin = np.array([np.pi, 2.275])
+
+    def evaluate(self, X):
+        x1, x2 = X[:, 0], X[:, 1]
+        b = 5.1 / (4 * np.pi ** 2)
+        c = 5 / np.pi
+        t = 1 / (8 * np.pi)
+        return (x2 - b * x1 ** 2 + c * x1 - 6) ** 2 + 10 * (1 - t) * np.cos(x1) + 10
+
+
+class Hartmann(BenchmarkFunction):
+    """
+    Hartmann function on [0, 1]^dimension, `dimension` is 3 or 6.
+    """
+
+    _alpha = np.array([1.0, 1.2, 3.0, 3.2])
+    _params = {
+        3: (
+            np.array([[3.0, 10, 30], [0.1, 10, 35], [3.0, 10, 30], [0.1, 10, 35]]),
+            1e-4
+            * np.array(
+                [[3689, 1170, 2673], [4699, 4387, 7470], [1091, 8732, 5547], [381, 5743, 8828]]
+            ),
+            -3.86278214782076,
+            np.array([0.114614, 0.555649, 0.852547]),
+        ),
+        6: (
+            np.array(
+                [
+                    [10, 3, 17, 3.5, 1.7, 8],
+                    [0.05, 10, 17, 0.1, 8, 14],
+                    [3, 3.5, 1.7, 10, 17, 8],
+                    [17, 8, 0.05, 10, 0.1, 14],
+                ]
+            ),
+            1e-4
+            * np.array(
+                [
+                    [1312, 1696, 5569, 124, 8283, 5886],
+                    [2329, 4135, 8307, 3736, 1004, 9991],
+                    [2348, 1451, 3522, 2883, 3047, 6650],
+                    [4047, 8828, 8732, 5743, 1091, 381],
+                ]
+            ),
+            -3.32236801141551,
+            np.array([0.20169, 0.150011, 0.476874, 0.275332, 0.311652, 0.6573]),
+        ),
+    }
+
+    def __init__(self, dimension=6, noise_std=0.0, random_state=None):
+        super(Hartmann, self).__init__(noise_std=noise_std, random_state=random_state)
+        assert dimension in self._params, "dimension should be 3 or 6"
+        self.name = "hartmann{}".format(dimension)
+        self.bounds = np.tile([0.0, 1.0], (dimension, 1))
+        self._A, self._P, self.optimum, self.argmin = self._params[dimension]
+
+    def evaluate(self, X):
+        dist = (self._A * (X[:, np.newaxis, :] - self._P) ** 2).sum(axis=2)
+        return -np.exp(-dist).dot(self._alpha)
+
+
+class _ScalableFunction(BenchmarkFunction):
+    # functions defined for any dimension, on a hypercube
+    low = None
+    high = None
+    argmin_value = None
+    optimum = 0.0
+
+    def __init__(self, dimension=2, noise_std=0.0, random_state=None):
+        super(_ScalableFunction, self).__init__(
+            noise_std=noise_std, random_state=random_state
+        )
+        self.bounds = np.tile([self.low, self.high], (dimension, 1))
+        self.argmin = np.full(dimension, self.argmin_value)
+
+
+class Rosenbrock(_ScalableFunction):
+    """Rosenbrock function on [-5, 10]^dimension"""
+
+    name = "rosenbrock"
+    low, high = -5.0, 10.0
+    argmin_value = 1.0
+
+    def evaluate(self, X):
+        return (100 * (X[:, 1:] - X[:, :-1] ** 2) ** 2 + (X[:, :-1] - 1) ** 2).sum(axis=1)
+
+
+class Ackley(_ScalableFunction):
+    """Ackley function on [-32.768, 32.768]^dimension"""
+
+    name = "ackley"
+    low, high = -32.768, 32.768
+    argmin_value = 0.0
+
+    def evaluate(self, X):
+        a = -20 * np.exp(-0.2 * np.sqrt((X ** 2).mean(axis=1)))
+        b = -np.exp(np.cos(2 * np.pi * X).mean(axis=1))
+        return a + b + 20 + np.e
+
+
+class Levy(_ScalableFunction):
+    """Levy function on [-10, 10]^dimension"""
+
+    name = "levy"
+    low, high = -10.0, 10.0
+    argmin_value = 1.0
+
+    def evaluate(self, X):
+        W = 1 + (X - 1) / 4
+        first = np.sin(np.pi * W[:, 0]) ** 2
+        middle = ((W[:, :-1] - 1) ** 2 * (1 + 10 * np.sin(np.pi * W[:, :-1] + 1) ** 2)).sum(
+            axis=1
+        )
+        last = (W[:, -1] - 1) ** 2 * (1 + np.sin(2 * np.pi * W[:, -1]) ** 2)
+        return first + middle + last
@@ -0,0 +1,273 @@
+"""
+This module runs optimizers on the test functions of
+`fluentopt.benchmarks.functions` and records, for each run:
+    - the time spent in the optimizer (`suggest` and `update`),
+      separately from the time spent evaluating the function
+    - the anytime regret curve
+    - optionally, the peak memory allocated during the run (with `tracemalloc`)
+The results are lists of dicts, which can be exported to CSV or JSON
+to track regressions.
+
+Example
+-------
+
+>>> results = run_benchmark(
+...     ["random_search", "bayesian_optimizer"],
+...     [Branin(), Hartmann(6, noise_std=0.1)],
+...     seeds=range(5),
+...     budget=50,
+...     nb_workers=4,
+... )
+>>> to_csv(results, "benchmark.csv")
+"""
+import copy
+import csv
+import json
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..bayesianoptimizer import BayesianOptimizer
+from ..cmaes import CMAES
+from ..random import RandomSearch
+from ..tpe import TPE
+from ..utils import check_numpy_random_state
+from .functions import Ackley
+from .functions import Branin
+from .functions import Hartmann
+from .functions import Levy
+from .functions import Rosenbrock
+
+__all__ = [
+    "COLUMNS",
+    "OPTIMIZERS",
+    "FUNCTIONS",
+    "random_search",
+    "bayesian_optimizer",
+    "cmaes",
+    "tpe",
+    "run_one",
+    "run_benchmark",
+    "to_csv",
+    "curves_to_csv",
+    "to_json",
+]
+
+# the columns of the CSV export, the regret curves are exported
+# separately by `curves_to_csv`
+COLUMNS = [
+    "func",
+    "algo",
+    "seed",
+    "dimension",
+    "noise_std",
+    "budget",
+    "ybest",
+    "regret",
+    "suggest_time",
+    "update_time",
+    "overhead",
+    "eval_time",
+    "duration",
+    "peak_memory",
+]
+
+
+def random_search(function, random_state):
+    return RandomSearch(function.space, random_state=random_state)
+
+
+def bayesian_optimizer(function, random_state):
+    return BayesianOptimizer(function.space, maximize=False, random_state=random_state)
+
+
+def cmaes(function, random_state):
+    return CMAES(function.space, random_state=random_state)
+
+
+def tpe(function, random_state):
+    return TPE(function.space, maximize=False, random_state=random_state)
+
+
+# optimizer factories, they take the function and a seed
+# and return an optimizer which minimizes the function
+OPTIMIZERS = {
+    "random_search": random_search,
+    "bayesian_optimizer": bayesian_optimizer,
+    "cmaes": cmaes,
+    "tpe": tpe,
+}
+
+FUNCTIONS = {
+    "branin": Branin,
+    "hartmann3": lambda **kwargs: Hartmann(3, **kwargs),
+    "hartmann6": lambda **kwargs: Hartmann(6, **kwargs),
+    "rosenbrock": Rosenbrock,
+    "ackley": Ackley,
+    "levy": Levy,
+}
+
+
+def run_one(algo, function, seed, budget, track_memory=False):
+    """
+    run the optimizer `algo` on `function` for `budget` evaluations.
+
+    Parameters
+    ----------
+
+    algo : str or (str, callable) pair
+        name of an optimizer of `OPTIMIZERS`, or a name and a factory
+        which takes the function and a seed and returns the optimizer.
+
+    function : BenchmarkFunction instance
+        it is copied, and its noise is seeded with `seed`.
+
+    seed : int
+        random state of the optimizer and of the noise.
+
+    budget : int
+        nb of evaluations.
+
+    track_memory : bool, optional[default=False]
+        if True, the peak memory is recorded with `tracemalloc`. It slows
+        down every allocation (by more than an order of magnitude for the
+        optimizers which allocate many small objects), so the timings
+        of such runs are not meaningful, use separate runs to measure
+        the time and the memory.
+
+    Returns
+    -------
+    a dict, see `COLUMNS`. The regret curve (`regret_curve`) is the
+    regret of the best input (according to the noise free values) after
+    each evaluation. `peak_memory` is in bytes, None if `track_memory`
+    is False.
+    """
+    name, factory = _check_algo(algo)
+    function = copy.deepcopy(function)
+    function.rng = check_numpy_random_state(seed)
+    tracing = track_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    t_start = time.perf_counter()
+    suggest_time = update_time = eval_time = 0.0
+    opt = factory(function, seed)
+    regrets = np.empty(budget)
+    ybest = np.inf
+    for i in range(budget):
+        t0 = time.perf_counter()
+        x = opt.suggest()
+        t1 = time.perf_counter()
+        y = function(x)
+        t2 = time.perf_counter()
+        opt.update(x, y)
+        t3 = time.perf_counter()
+        suggest_time += t1 - t0
+        eval_time += t2 - t1
+        update_time += t3 - t2
+        ybest = min(ybest, y)
+        regrets[i] = function.regret(x)
+    duration = time.perf_counter() - t_start
+    peak_memory = None
+    if tracing:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    curve = np.minimum.accumulate(regrets)
+    return {
+        "func": function.name,
+        "algo": name,
+        "seed": seed,
+        "dimension": function.dimension,
+        "noise_std": function.noise_std,
+        "budget": budget,
+        "ybest": float(ybest),
+        "regret": float(curve[-1]),
+        "suggest_time": suggest_time,
+        "update_time": update_time,
+        "overhead": suggest_time + update_time,
+        "eval_time": eval_time,
+        "duration": duration,
+        "peak_memory": peak_memory,
+        "regret_curve": curve.tolist(),
+    }
+
+
+def _check_algo(algo):
+    if isinstance(algo, str):
+        assert algo in OPTIMIZERS, "Unknown optimizer {}".format(algo)
+        return algo, OPTIMIZERS[algo]
+    return algo
+
+
+def _run_one(args):
+    return run_one(*args)
+
+
+def run_benchmark(
+    algos, functions, seeds=range(5), budget=50, nb_workers=1, track_memory=False
+):
+    """
+    run each optimizer of `algos` on each function of `functions`
+    with each seed of `seeds`, see `run_one`.
+    The runs are done in a process pool if `nb_workers` > 1, so the
+    factories of the optimizers should then be picklable
+    (e.g. functions defined at the top level of a module).
+
+    Parameters
+    ----------
+
+    algos : list of str or (str, callable) pairs
+        see `run_one`.
+
+    functions : list of BenchmarkFunction instances or str
+        the str are the names of the functions of `FUNCTIONS`,
+        with the default dimension.
+
+    seeds : list of int
+
+    budget : int
+
+    nb_workers : int, optional[default=1]
+
+    track_memory : bool, optional[default=False]
+
+    Returns
+    -------
+    list of dicts, one per run, see `run_one`.
+    """
+    functions = [FUNCTIONS[f]() if isinstance(f, str) else f for f in functions]
+    jobs = [
+        (_check_algo(algo), function, seed, budget, track_memory)
+        for function in functions
+        for algo in algos
+        for seed in seeds
+    ]
+    if nb_workers > 1:
+        with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+            return list(executor.map(_run_one, jobs))
+    return [_run_one(job) for job in jobs]
+
+
+def to_csv(results, path):
+    """write one row per run, with the columns `COLUMNS`"""
+    with open(path, "w") as fd:
+        writer = csv.DictWriter(fd, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def curves_to_csv(results, path):
+    """write the regret curves, one row per run and per evaluation"""
+    with open(path, "w") as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["func", "algo", "seed", "nbeval", "regret"])
+        for r in results:
+            for i, regret in enumerate(r["regret_curve"]):
+                writer.writerow([r["func"], r["algo"], r["seed"], i + 1, regret])
+
+
+def to_json(results, path):
+    """write the results, including the regret curves"""
+    with open(path, "w") as fd:
+        json.dump(results, fd, indent=2)
@@ -0,0 +1,238 @@
+"""
+This module contains the CMAES class, an implementation of the
+covariance matrix adaptation evolution strategy[1] which follows the
+`Optimizer` API. It does not use a surrogate, its cost per evaluation
+is negligible, so it is well suited to cheap to evaluate functions.
+
+[1] Nikolaus Hansen, The CMA Evolution Strategy: A Tutorial, arXiv:1604.00772
+[2] Raymond Ros and Nikolaus Hansen, A Simple Modification in CMA-ES Achieving
+    Linear Time and Space Complexity, PPSN 2008
+"""
+import numpy as np
+
+from .base import OptimizerWithHistory
+from .space import Space
+from .utils import check_numpy_random_state
+from .utils import index_of
+
+__all__ = ["CMAES"]
+
+
+class CMAES(OptimizerWithHistory):
+    """
+    CMA-ES optimizer, it minimizes the outputs by default.
+    The inputs are sampled by populations of `popsize`, `suggest_many(popsize)`
+    returns a whole population. The distribution is updated each time
+    `popsize` results of the current population have been received
+    with `update` or `update_many`, in any order. If more inputs are
+    suggested than `popsize` before the update, the extra ones are sampled
+    from the same distribution and the first `popsize` results received are used.
+    The results of inputs which were not suggested by the optimizer (or
+    which come from an older population) are only added to the history.
+
+    Parameters
+    ----------
+
+    x0 : 1D numpy array or fluentopt.space.Space
+        initial mean of the distribution. If it is a `Space`, the search
+        is done in its encoded space (the inputs are dicts), starting from the
+        center of `Space.bounds`, and `sigma0` is relative to the range
+        of each column.
+
+    sigma0 : float, optional[default=0.3]
+        initial step size.
+
+    popsize : int or None, optional
+        size of the populations, default is 4 + floor(3 * log(dimension)).
+
+    bounds : 2D numpy array of shape (dimension, 2) or None, optional
+        the low and high bound of each dimension, the sampled inputs are
+        clipped to them. Ignored if `x0` is a `Space`, whose bounds are used.
+
+    diagonal : bool, optional[default=False]
+        if True, use sep-CMA-ES[2], which only adapts a diagonal covariance
+        matrix, with a cost linear in the dimension instead of quadratic
+        (cubic for the eigen decomposition). Useful in high dimension.
+
+    maximize : bool, optional[default=False]
+        if True, maximize the outputs instead of minimizing them.
+
+    random_state : int or None, optional
+
+    history : history backend instance or None
+        where to store the evaluations, see `fluentopt.history`.
+
+    Attributes
+    ----------
+        input_history_ : list of inputs evaluated
+        output_history_ : outputs corresponding to the evaluated inputs
+        mean_ : 1D numpy array, mean of the distribution
+        sigma_ : float, step size
+        C_ : covariance matrix, a 1D numpy array of its diagonal if `diagonal` is True
+        generation_ : nb of updates of the distribution
+    """
+
+    def __init__(
+        self,
+        x0,
+        sigma0=0.3,
+        popsize=None,
+        bounds=None,
+        diagonal=False,
+        maximize=False,
+        random_state=None,
+        history=None,
+    ):
+        super(CMAES, self).__init__(history=history)
+        if isinstance(x0, Space):
+            self.space = x0
+            bounds = x0.bounds
+            self._scale = bounds[:, 1] - bounds[:, 0]
+            x0 = bounds.mean(axis=1)
+        else:
+            self.space = None
+            x0 = np.asarray(x0, dtype=float).ravel()
+            self._scale = np.ones(len(x0))
+        if bounds is not None:
+            bounds = np.asarray(bounds, dtype=float)
+            assert bounds.shape == (len(x0), 2), "bounds should have shape {}".format(
+                (len(x0), 2)
+            )
+        self.bounds = bounds
+        self.diagonal = diagonal
+        self.maximize = maximize
+        self.rng = check_numpy_random_state(random_state)
+
+        n = len(x0)
+        self.popsize = popsize if popsize is not None else 4 + int(3 * np.log(n))
+        mu = self.popsize // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self._weights = weights / weights.sum()
+        mueff = 1.0 / (self._weights ** 2).sum()
+        self._mueff = mueff
+        self._cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        self._cs = (mueff + 2) / (n + mueff + 5)
+        self._c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        self._cmu = min(
+            1 - self._c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff)
+        )
+        if diagonal:
+            # the diagonal covariance can be learned faster
+            self._c1 = min(1.0, self._c1 * (n + 2) / 3.0)
+            self._cmu = min(1 - self._c1, self._cmu * (n + 2) / 3.0)
+        self._damps = 1 + 2 * max(0, np.sqrt((mueff - 1) / (n + 1)) - 1) + self._cs
+        self._chi_n = np.sqrt(n) * (1 - 1.0 / (4 * n) + 1.0 / (21 * n ** 2))
+        # eigen decomposition of the covariance, only done every few
+        # generations as it costs O(n^3)
+        self._eigen_every = max(1, int(1.0 / ((self._c1 + self._cmu) * n * 10)))
+
+        # the search is done with all the columns in the same scale,
+        # `_scale` maps it to the scale of the inputs
+        self.mean_ = x0 / self._scale
+        self.sigma_ = float(sigma0)
+        self.C_ = np.ones(n) if diagonal else np.eye(n)
+        self._B = np.eye(n)
+        self._D = np.ones(n)
+        self._pc = np.zeros(n)
+        self._ps = np.zeros(n)
+        self.generation_ = 0
+        self._queue = []
+        self._asked = []
+        self._asked_X = []
+        self._told_X = []
+        self._told_y = []
+
+    def _sample(self):
+        n = len(self.mean_)
+        z = self.rng.normal(size=(self.popsize, n))
+        if self.diagonal:
+            y = z * np.sqrt(self.C_)
+        else:
+            y = (z * self._D).dot(self._B.T)
+        X = (self.mean_ + self.sigma_ * y) * self._scale
+        if self.bounds is not None:
+            X = np.clip(X, self.bounds[:, 0], self.bounds[:, 1])
+        if self.space is not None:
+            X = self.space.project(X)
+        return X
+
+    def suggest(self):
+        if not self._queue:
+            self._queue = list(self._sample())
+        x = self._queue.pop(0)
+        if self.space is not None:
+            inp = self.space.to_dicts(x[np.newaxis, :])[0]
+        else:
+            inp = x.copy()
+        self._asked.append(inp)
+        self._asked_X.append(x)
+        return inp
+
+    def update_many(self, xlist, ylist):
+        super(CMAES, self).update_many(xlist, ylist)
+        for x, y in zip(xlist, ylist):
+            i = index_of(self._asked, x)
+            if i is None:
+                continue
+            self._asked.pop(i)
+            self._told_X.append(self._asked_X.pop(i))
+            self._told_y.append(y)
+            if len(self._told_y) == self.popsize:
+                self._tell(np.array(self._told_X), np.array(self._told_y, dtype=float))
+                self._told_X = []
+                self._told_y = []
+
+    def _tell(self, X, y):
+        n = len(self.mean_)
+        mu = len(self._weights)
+        w = self._weights
+        cs, cc, c1, cmu = self._cs, self._cc, self._c1, self._cmu
+        if self.maximize:
+            y = -y
+        X = X[np.argsort(y)[:mu]] / self._scale
+        Y = (X - self.mean_) / self.sigma_
+        y_w = w.dot(Y)
+        self.mean_ = self.mean_ + self.sigma_ * y_w
+
+        # step size
+        if self.diagonal:
+            c_inv_sqrt_y = y_w / np.sqrt(self.C_)
+        else:
+            c_inv_sqrt_y = self._B.dot(self._B.T.dot(y_w) / self._D)
+        self._ps = (1 - cs) * self._ps + np.sqrt(cs * (2 - cs) * self._mueff) * c_inv_sqrt_y
+        ps_norm = np.linalg.norm(self._ps)
+        self.generation_ += 1
+        hsig = ps_norm / np.sqrt(1 - (1 - cs) ** (2 * self.generation_)) / self._chi_n < (
+            1.4 + 2.0 / (n + 1)
+        )
+        self.sigma_ *= np.exp((cs / self._damps) * (ps_norm / self._chi_n - 1))
+
+        # covariance
+        self._pc = (1 - cc) * self._pc + hsig * np.sqrt(cc * (2 - cc) * self._mueff) * y_w
+        delta = (1 - hsig) * cc * (2 - cc)
+        if self.diagonal:
+            self.C_ = (
+                (1 - c1 - cmu) * self.C_
+                + c1 * (self._pc ** 2 + delta * self.C_)
+                + cmu * w.dot(Y ** 2)
+            )
+        else:
+            self.C_ = (
+                (1 - c1 - cmu) * self.C_
+                + c1 * (np.outer(self._pc, self._pc) + delta * self.C_)
+                + cmu * (Y.T * w).dot(Y)
+            )
+            if self.generation_ % self._eigen_every == 0:
+                self._update_eigen()
+        # the inputs of the population which are not evaluated yet
+        # were sampled from the old distribution, forget them
+        self._queue = []
+        self._asked = []
+        self._asked_X = []
+
+    def _update_eigen(self):
+        C = np.triu(self.C_) + np.triu(self.C_, 1).T
+        D2, B = np.linalg.eigh(C)
+        self._D = np.sqrt(np.clip(D2, 1e-20, np.inf))
+        self._B = B
+        self.C_ = C
@@ -0,0 +1,246 @@
+"""
+This module contains the backends used by the optimizers
+to store the history of the evaluations (the inputs and
+their outputs).
+"""
+import operator
+import pickle
+import sqlite3
+import threading
+
+import numpy as np
+
+from .utils import GrowableArray
+
+__all__ = ["MemoryHistory", "SQLiteHistory", "Column"]
+
+
+class Column(object):
+    """
+    a list-like column of floats, stored in a numpy array which grows
+    with an amortized constant cost (see `fluentopt.utils.GrowableArray`).
+    It behaves like a list of floats (indexing, slicing which returns
+    a list, iteration, comparison with lists), and it can be converted to a
+    numpy array without copying the values one by one.
+    The max and the min of the values are updated when values are
+    added, so that the incumbent is available in constant time.
+    """
+
+    def __init__(self, values=()):
+        self._data = GrowableArray()
+        self._max = -np.inf
+        self._min = np.inf
+        self.extend(values)
+
+    @property
+    def array(self):
+        """view of the values as a 1D numpy array"""
+        return self._data.array
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.array[i].tolist()
+        return self.array[operator.index(i)].item()
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.array
+        if dtype is not None:
+            array = array.astype(dtype)
+        return array.copy() if copy else array
+
+    def __eq__(self, other):
+        if isinstance(other, Column):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Column({})".format(self.tolist())
+
+    def tolist(self):
+        return self.array.tolist()
+
+    def max(self):
+        if not len(self):
+            raise ValueError("max of an empty column")
+        return float(self._max)
+
+    def min(self):
+        if not len(self):
+            raise ValueError("min of an empty column")
+        return float(self._min)
+
+    def append(self, value):
+        self.extend([value])
+
+    def extend(self, values):
+        if not isinstance(values, (list, tuple, np.ndarray)):
+            values = list(values)
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values):
+            self._max = np.maximum(self._max, values.max())
+            self._min = np.minimum(self._min, values.min())
+        self._data.extend(values)
+
+
+class MemoryHistory(object):
+    """
+    history stored in memory. This is the default backend.
+    The inputs are kept in a list, the outputs in a `Column`,
+    a numpy array with amortized growth.
+
+    Parameters
+    ----------
+
+    encoder : transformer instance or None, optional
+        if provided (e.g. a `fluentopt.space.Space`), the inputs are
+        also encoded with `encoder.transform` when they are added, and
+        kept in the 2D numpy array `encoded_inputs`, so that they are
+        never encoded again.
+
+    Attributes
+    ----------
+        inputs : list of inputs
+        outputs : `Column` of outputs
+        encoded_inputs : 2D numpy array of the encoded inputs, or None
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder
+        self.inputs = []
+        self.outputs = Column()
+        self._encoded = None
+
+    def __len__(self):
+        return len(self.outputs)
+
+    @property
+    def encoded_inputs(self):
+        if self.encoder is None:
+            return None
+        if self._encoded is None:
+            return np.empty((0, 0))
+        return self._encoded.array
+
+    def extend(self, xlist, ylist):
+        """append the inputs `xlist` and their outputs `ylist`"""
+        self._append(xlist, ylist)
+
+    def _append(self, xlist, ylist):
+        self.inputs.extend(xlist)
+        self.outputs.extend(ylist)
+        if self.encoder is not None and len(xlist):
+            X = self.encoder.transform(list(xlist))
+            if self._encoded is None:
+                self._encoded = GrowableArray(X.shape[1])
+            self._encoded.extend(X)
+
+    def refresh(self):
+        """
+        load the evaluations added by other processes, returns
+        the nb of new evaluations. Nothing to do in memory.
+        """
+        return 0
+
+
+class SQLiteHistory(MemoryHistory):
+    """
+    append-only history stored in an SQLite database, so that it
+    survives restarts and can be shared between processes.
+    The evaluations already in the database are loaded when the history
+    is created, so an optimizer using it is warm-started with them.
+    `extend` writes all the evaluations in a single transaction, a crash
+    during a write never leaves a partially written batch.
+    The inputs are pickled, so they can be anything picklable
+    (dicts, lists, scalars, numpy arrays).
+
+    Parameters
+    ----------
+
+    path : str
+        path of the database file, it is created if it does not exist.
+
+    table : str, optional[default="history"]
+        name of the table, several histories can live in the same file.
+
+    encoder : transformer instance or None, optional
+        see `MemoryHistory`.
+
+    Attributes
+    ----------
+        inputs : list of inputs
+        outputs : `Column` of outputs
+        encoded_inputs : 2D numpy array of the encoded inputs, or None
+    """
+
+    def __init__(self, path, table="history", encoder=None):
+        super(SQLiteHistory, self).__init__(encoder=encoder)
+        self.path = path
+        self.table = table
+        self._last_id = 0
+        self._lock = threading.Lock()
+        # autocommit mode, the transactions are handled explicitly in `extend`
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS {} "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, input BLOB, output REAL)".format(
+                table
+            )
+        )
+        self.refresh()
+
+    def extend(self, xlist, ylist):
+        rows = [
+            (sqlite3.Binary(pickle.dumps(x, protocol=pickle.HIGHEST_PROTOCOL)), float(y))
+            for x, y in zip(xlist, ylist)
+        ]
+        with self._lock:
+            # the write lock of the database is taken for the whole transaction,
+            # so that no other process can write between the moment we load what
+            # the other processes wrote and the moment we insert the new rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_new_rows()
+                self._conn.executemany(
+                    "INSERT INTO {} (input, output) VALUES (?, ?)".format(self.table),
+                    rows,
+                )
+                self._last_id = self._conn.execute(
+                    "SELECT MAX(id) FROM {}".format(self.table)
+                ).fetchone()[0] or 0
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._append(xlist, ylist)
+
+    def refresh(self):
+        with self._lock:
+            return self._load_new_rows()
+
+    def _load_new_rows(self):
+        rows = self._conn.execute(
+            "SELECT id, input, output FROM {} WHERE id > ? ORDER BY id".format(
+                self.table
+            ),
+            (self._last_id,),
+        ).fetchall()
+        if not rows:
+            return 0
+        self._append([pickle.loads(x) for _, x, _ in rows], [y for _, _, y in rows])
+        self._last_id = rows[-1][0]
+        return len(rows)
+
+    def close(self):
+        self._conn.close()
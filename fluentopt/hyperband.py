@@ -1,10 +1,25 @@
+"""
+This module provides hyperband, which optimizes inputs that can be
+evaluated with a varying budget (e.g. nb of training iterations).
+"""
+import os
+import pickle
+
 import numpy as np
 
+from .base import OptimizerWithHistory
+from .bayesianoptimizer import BayesianOptimizer
+from .bayesianoptimizer import ucb
+from .utils import index_of
+
+__all__ = ["hyperband", "bohb", "Hyperband", "BOHB", "Trial", "ASHA"]
+
 
 def hyperband(sample, run_batch, max_iter=81, eta=3, random_state=None):
     """
     Implementation of hyperband.
     Based on: <https://people.eecs.berkeley.edu/~kjamieson/hyperband.html>
+    See `Hyperband` for a resumable version.
     
     Parameters
     ----------
@@ -19,24 +34,414 @@ def hyperband(sample, run_batch, max_iter=81, eta=3, random_state=None):
 
     random_state :
     """
-    rng = np.random.RandomState(random_state)
-    s_max = int(np.log(max_iter) / np.log(eta))
-    B = (s_max + 1) * max_iter
-    input_history_ = []
-    output_history_ = []
-    for s in reversed(range(s_max + 1)):
-        n = int(np.ceil(B / max_iter / (s + 1) * eta ** s))
-        r = max_iter * eta ** (-s)
-        T = [sample(rng) for _ in range(n)]
-        for i in range(s + 1):
-            n_i = n * eta ** (-i)
-            r_i = r * eta ** (i)
-            keep = int(n_i / eta)
-            values = run_batch([(r_i, t) for t in T])
-            values = list(values)
-            input_history_.extend([(r_i, t) for t in T])
-            output_history_.extend(values)
-            ind = np.argsort(values)
-            values = [values[i] for i in ind][0:keep]
-            T = [T[i] for i in ind][0:keep]
-    return input_history_, output_history_
+    opt = Hyperband(sample, max_iter=max_iter, eta=eta, random_state=random_state)
+    return opt.run(run_batch)
+
+
+def bohb(
+    sample,
+    run_batch,
+    max_iter=81,
+    eta=3,
+    random_state=None,
+    model=None,
+    nb_suggestions=100,
+    random_fraction=1.0 / 3.0,
+    min_points=5,
+):
+    """
+    Model-based hyperband, similar to BOHB.
+    See `BOHB` for the details and for a resumable version.
+
+    Returns
+    -------
+
+    input_history, output_history as in `hyperband`
+    """
+    opt = BOHB(
+        sample,
+        max_iter=max_iter,
+        eta=eta,
+        random_state=random_state,
+        model=model,
+        nb_suggestions=nb_suggestions,
+        random_fraction=random_fraction,
+        min_points=min_points,
+    )
+    return opt.run(run_batch)
+
+
+class Trial(object):
+    """
+    a handle on a configuration evaluated by `Hyperband` with `resumable=True`.
+    `run_batch` can use it to continue the training of a promoted configuration
+    from the budget it was already trained with, instead of starting from scratch.
+
+    Attributes
+    ----------
+        config : the configuration
+        budget : the budget the configuration was already evaluated with (0 at first)
+        state : anything (picklable) that `run_batch` wants to keep, e.g. a model
+                or the path of a checkpoint of a model. It is None at first.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.budget = 0
+        self.state = None
+
+
+class Hyperband(object):
+    """
+    Implementation of hyperband, which state can be saved to disk
+    after each rung, so that a run can be resumed after a crash.
+    Based on: <https://people.eecs.berkeley.edu/~kjamieson/hyperband.html>
+
+    Parameters
+    ----------
+
+    sample : callable
+        takes a numpy random state and returns a configuration
+
+    max_iter : int, optional[default=81]
+        maximum budget
+
+    eta : int, optional[default=3]
+        reduction factor
+
+    random_state : int or None, optional
+
+    checkpoint : str or None, optional
+        path of the file where the state is pickled after each rung.
+        if the file exists, the state is loaded from it, so `run`
+        resumes from the last rung completed.
+        The configurations (and the `Trial.state`) should be picklable.
+
+    resumable : bool, optional[default=False]
+        if True, `run_batch` receives `(r, t, trial)` triplets instead of `(r, t)`
+        pairs, where `trial` is a `Trial` handle.
+
+    Attributes
+    ----------
+        input_history_ : list of the (r, t) pairs evaluated
+        output_history_ : list of the outputs
+    """
+
+    def __init__(
+        self,
+        sample,
+        max_iter=81,
+        eta=3,
+        random_state=None,
+        checkpoint=None,
+        resumable=False,
+    ):
+        self.sample = sample
+        self.max_iter = max_iter
+        self.eta = eta
+        self.checkpoint = checkpoint
+        self.resumable = resumable
+        self.rng = np.random.RandomState(random_state)
+        self.s_max = int(np.log(max_iter) / np.log(eta))
+        self.input_history_ = []
+        self.output_history_ = []
+        # current bracket, current rung and the trials of the rung
+        self.bracket_ = self.s_max
+        self.rung_ = 0
+        self.trials_ = None
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load(checkpoint)
+
+    def sample_bracket(self, n):
+        """sample the `n` configurations of a new bracket"""
+        return [self.sample(self.rng) for _ in range(n)]
+
+    def run(self, run_batch):
+        """
+        run (or resume) hyperband.
+
+        Parameters
+        ----------
+
+        run_batch : callable
+            takes a list of `(r, t)` pairs (budget and configuration), or of
+            `(r, t, trial)` triplets if `resumable` is True, and returns the
+            list of their outputs (which are minimized).
+
+        Returns
+        -------
+            input_history_, output_history_
+        """
+        eta = self.eta
+        B = (self.s_max + 1) * self.max_iter
+        while self.bracket_ >= 0:
+            s = self.bracket_
+            n = int(np.ceil(B / self.max_iter / (s + 1) * eta ** s))
+            r = self.max_iter * eta ** (-s)
+            if self.trials_ is None:
+                self.trials_ = [Trial(t) for t in self.sample_bracket(n)]
+                self.rung_ = 0
+            while self.rung_ <= s:
+                i = self.rung_
+                n_i = n * eta ** (-i)
+                r_i = r * eta ** (i)
+                keep = int(n_i / eta)
+                trials = self.trials_
+                if self.resumable:
+                    batch = [(r_i, trial.config, trial) for trial in trials]
+                else:
+                    batch = [(r_i, trial.config) for trial in trials]
+                values = list(run_batch(batch))
+                for trial in trials:
+                    trial.budget = r_i
+                self.input_history_.extend([(r_i, trial.config) for trial in trials])
+                self.output_history_.extend(values)
+                ind = np.argsort(values)
+                self.trials_ = [trials[j] for j in ind][0:keep]
+                self.rung_ += 1
+                self.save()
+            self.bracket_ -= 1
+            self.trials_ = None
+        self.save()
+        return self.input_history_, self.output_history_
+
+    def state_dict(self):
+        """returns the state of the run as a (picklable) dict"""
+        return {
+            "bracket": self.bracket_,
+            "rung": self.rung_,
+            "trials": self.trials_,
+            "input_history": self.input_history_,
+            "output_history": self.output_history_,
+            "rng": self.rng.get_state(),
+        }
+
+    def load_state_dict(self, state):
+        self.bracket_ = state["bracket"]
+        self.rung_ = state["rung"]
+        self.trials_ = state["trials"]
+        self.input_history_ = state["input_history"]
+        self.output_history_ = state["output_history"]
+        self.rng.set_state(state["rng"])
+
+    def save(self, path=None):
+        """
+        pickle the state into `path` (default is `checkpoint`).
+        The file is written atomically, so a crash while saving does not
+        corrupt the previous checkpoint.
+        """
+        path = path or self.checkpoint
+        if path is None:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fd:
+            pickle.dump(self.state_dict(), fd)
+        os.replace(tmp, path)
+
+    def load(self, path=None):
+        """load the state pickled into `path` (default is `checkpoint`)"""
+        with open(path or self.checkpoint, "rb") as fd:
+            self.load_state_dict(pickle.load(fd))
+
+
+class BOHB(Hyperband):
+    """
+    Model-based hyperband, similar to BOHB.
+    Based on: <https://arxiv.org/abs/1807.01774>
+
+    Same as `Hyperband`, except that the configurations of each bracket are not
+    all sampled randomly: a `BayesianOptimizer` is fitted on the results obtained
+    so far with the largest budget that has at least `min_points` results, and a
+    batch of configurations is suggested with `suggest_many`. A fraction
+    `random_fraction` of the configurations are still sampled randomly.
+
+    Parameters
+    ----------
+
+    sample, max_iter, eta, random_state, checkpoint, resumable :
+        see `Hyperband`
+
+    model : scikit-learn like model instance, optional
+        the surrogate, default is the default of `BayesianOptimizer`.
+
+    nb_suggestions : int, optional[default=100]
+        nb of candidates scored by the surrogate for each bracket.
+
+    random_fraction : float, optional[default=1/3]
+        fraction of the configurations of a bracket which are sampled randomly.
+
+    min_points : int, optional[default=5]
+        min nb of results with a given budget to fit the surrogate.
+        The results with the large budgets are only the ones of the promoted
+        configurations, which are close to each other, a bigger `min_points`
+        fits the surrogate on a smaller budget whose results cover more
+        of the space.
+    """
+
+    def __init__(
+        self,
+        sample,
+        max_iter=81,
+        eta=3,
+        random_state=None,
+        checkpoint=None,
+        resumable=False,
+        model=None,
+        nb_suggestions=100,
+        random_fraction=1.0 / 3.0,
+        min_points=5,
+    ):
+        super(BOHB, self).__init__(
+            sample,
+            max_iter=max_iter,
+            eta=eta,
+            random_state=random_state,
+            checkpoint=checkpoint,
+            resumable=resumable,
+        )
+        self.model = model
+        self.nb_suggestions = nb_suggestions
+        self.random_fraction = random_fraction
+        self.min_points = min_points
+
+    def sample_bracket(self, n):
+        nb_random = int(np.ceil(n * self.random_fraction))
+        T = [self.sample(self.rng) for _ in range(nb_random)]
+        input_history = self.input_history_
+        output_history = self.output_history_
+        budgets = sorted(set(r for r, _ in input_history), reverse=True)
+        for budget in budgets:
+            inds = [i for i, (r, _) in enumerate(input_history) if r == budget]
+            if len(inds) >= self.min_points:
+                opt = BayesianOptimizer(
+                    lambda _: self.sample(self.rng),
+                    model=self.model,
+                    nb_suggestions=self.nb_suggestions,
+                    score=ucb,
+                    lazy=True,
+                )
+                # the optimizer maximizes, hyperband minimizes
+                opt.update_many(
+                    [input_history[i][1] for i in inds],
+                    [-output_history[i] for i in inds],
+                )
+                T.extend(opt.suggest_many(n - nb_random))
+                return T
+        T.extend(self.sample(self.rng) for _ in range(n - nb_random))
+        return T
+
+
+class ASHA(OptimizerWithHistory):
+    """
+    Asynchronous successive halving (ASHA), and asynchronous hyperband
+    when `nb_brackets` > 1.
+    Based on: <https://arxiv.org/abs/1810.05934>
+
+    Contrary to `hyperband`, there is no synchronization barrier: a
+    configuration is promoted to the next rung (budget) as soon as it is
+    among the top `1 / eta` of the results available at its rung,
+    otherwise a new configuration is sampled. Thus `suggest` always returns
+    a job and the workers never wait for the stragglers.
+
+    The inputs are `(r, t)` pairs like in `hyperband`, where `r` is the budget
+    and `t` the configuration, and the outputs are minimized. The same
+    configuration object `t` is used for all the budgets of a configuration,
+    the results are attributed to it by identity, so that two equal
+    configurations are not mixed up. Copies of the configurations (e.g.
+    sent to other processes) are matched by value, which is slower.
+    It can be used with `fluentopt.runner.run`.
+
+    Parameters
+    ----------
+
+    sample : callable
+        takes a numpy random state and returns a configuration
+
+    max_iter : int, optional[default=81]
+        maximum budget
+
+    eta : int, optional[default=3]
+        reduction factor, only the top `1 / eta` configurations
+        of a rung are promoted to the next one, which has a budget
+        `eta` times bigger.
+
+    min_iter : int, optional[default=1]
+        minimum budget
+
+    nb_brackets : int, optional[default=1]
+        nb of brackets. The bracket `s` starts its configurations
+        with the budget `min_iter * eta ** s`. The new configurations
+        are assigned to the brackets in a round robin way.
+
+    random_state : int or None, optional
+
+    Attributes
+    ----------
+        configs_ : list of the configurations sampled so far
+        rungs_ : for each bracket, for each rung, the list of the
+                 (configuration index, output) results
+        budgets_ : for each bracket, the budget of each rung
+    """
+
+    def __init__(
+        self, sample, max_iter=81, eta=3, min_iter=1, nb_brackets=1, random_state=None
+    ):
+        super(ASHA, self).__init__()
+        self.sample = sample
+        self.max_iter = max_iter
+        self.eta = eta
+        self.min_iter = min_iter
+        self.nb_brackets = nb_brackets
+        self.rng = np.random.RandomState(random_state)
+        self.budgets_ = []
+        for s in range(nb_brackets):
+            budgets = []
+            r = min_iter * eta ** s
+            while r <= max_iter:
+                budgets.append(r)
+                r *= eta
+            assert len(budgets) > 0, "Too many brackets"
+            self.budgets_.append(budgets)
+        self.rungs_ = [[[] for _ in budgets] for budgets in self.budgets_]
+        self._promoted = [[set() for _ in budgets] for budgets in self.budgets_]
+        self.configs_ = []
+        # index of each configuration by its id, the configurations
+        # are kept in `configs_` so their ids are not reused
+        self._index = {}
+        self._bracket_of = []
+        self._next_bracket = 0
+
+    def suggest(self):
+        b = self._next_bracket
+        self._next_bracket = (b + 1) % self.nb_brackets
+        job = self._promotion(b)
+        if job is not None:
+            return job
+        t = self.sample(self.rng)
+        self._index[id(t)] = len(self.configs_)
+        self.configs_.append(t)
+        self._bracket_of.append(b)
+        return (self.budgets_[b][0], t)
+
+    def _promotion(self, b):
+        rungs = self.rungs_[b]
+        for k in reversed(range(len(rungs) - 1)):
+            results = sorted(rungs[k], key=lambda r: r[1])
+            top = results[0 : len(results) // self.eta]
+            for i, _ in top:
+                if i not in self._promoted[b][k]:
+                    self._promoted[b][k].add(i)
+                    return (self.budgets_[b][k + 1], self.configs_[i])
+        return None
+
+    def update_many(self, xlist, ylist):
+        super(ASHA, self).update_many(xlist, ylist)
+        for (r, t), y in zip(xlist, ylist):
+            i = self._index.get(id(t))
+            if i is None or self.configs_[i] is not t:
+                # a copy of the configuration (e.g. received from another process)
+                i = index_of(self.configs_, t)
+            assert i is not None, "Unknown configuration : {}".format(t)
+            b = self._bracket_of[i]
+            k = int(np.argmin(np.abs(np.array(self.budgets_[b]) - r)))
+            self.rungs_[b][k].append((i, y))
@@ -0,0 +1,593 @@
+"""
+This module contains surrogate models that can be used by
+the optimizers (through `fluentopt.transformers.Wrapper`)
+in addition to the scikit-learn ones.
+"""
+import numpy as np
+from scipy.linalg import cholesky
+from scipy.linalg import cho_solve
+from scipy.linalg import solve_triangular
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import RBF
+from sklearn.gaussian_process.kernels import ConstantKernel
+from sklearn.gaussian_process.kernels import Product
+from sklearn.gaussian_process.kernels import Sum
+from sklearn.gaussian_process.kernels import WhiteKernel
+
+from .utils import check_numpy_random_state
+
+__all__ = [
+    "IncrementalGaussianProcessRegressor",
+    "SparseGaussianProcessRegressor",
+    "rbf_parameters",
+]
+
+
+class IncrementalGaussianProcessRegressor(object):
+    """
+    a gaussian process regressor which supports `partial_fit`.
+    `fit` uses scikit-learn's `GaussianProcessRegressor` to optimize
+    the kernel hyper-parameters, then `partial_fit` adds new observations
+    by extending the cholesky factor of the kernel matrix, which costs
+    O(n^2) instead of the O(n^3) of a full fit.
+    The kernel hyper-parameters are kept fixed during the partial fits,
+    they are re-optimized with a full fit every `refit_every` new observations.
+
+    Parameters
+    ----------
+
+    kernel : kernel instance, optional
+        the kernel, as in `GaussianProcessRegressor`.
+        default is `ConstantKernel() * RBF()`.
+
+    alpha : float, optional[default=1e-10]
+        value added to the diagonal of the kernel matrix.
+
+    normalize_y : bool, optional[default=True]
+        whether to normalize the outputs to zero mean and unit variance.
+
+    n_restarts_optimizer : int, optional[default=0]
+        number of restarts of the optimizer of the kernel
+        hyper-parameters, as in `GaussianProcessRegressor`.
+
+    refit_every : int or None, optional[default=10]
+        number of observations added with `partial_fit` after which
+        a full fit is done. If None, the hyper-parameters are never
+        re-optimized after the first `fit`.
+
+    random_state : int or None, optional
+        random state used by the optimizer of the kernel hyper-parameters.
+
+    warm_start : bool, optional[default=True]
+        if True, the optimization of the hyper-parameters also starts from
+        the ones of the previous optimization, next to the one starting
+        from `kernel`, and the hyper-parameters with the best log marginal
+        likelihood are kept. The cold start avoids staying stuck at the
+        (possibly degenerate) hyper-parameters fitted on few observations.
+        The warm start is only done once there are at least twice as many
+        observations as input columns, and a start whose kernel matrix is
+        not positive definite is skipped.
+
+    freeze : bool, optional[default=False]
+        if True, `fit` also keeps the hyper-parameters of the previous fit
+        (it only computes the cholesky factor of the new kernel matrix),
+        they are re-optimized once `refit_every` observations have been
+        added since the last optimization (each `fit` counts as
+        the difference of the nb of observations with the previous fit,
+        and at least one).
+
+    lml_tolerance : float or None, optional
+        if not None, the hyper-parameters kept fixed by `partial_fit`
+        (or by `fit` if `freeze` is True) are re-optimized as soon as the
+        log marginal likelihood per observation drops by more than
+        `lml_tolerance` below its value after the last optimization,
+        i.e. when the new observations are badly explained by them.
+
+    Attributes
+    ----------
+        kernel_ : the kernel with the optimized hyper-parameters
+        X_train_ : 2D numpy array of the training inputs
+        y_train_ : 1D numpy array of the training outputs
+        L_ : lower cholesky factor of the kernel matrix of `X_train_`
+        alpha_ : dual coefficients of the training points
+        nb_optimizations_ : nb of optimizations of the hyper-parameters
+        log_marginal_likelihood_ : log marginal likelihood per observation
+            after the last optimization
+    """
+
+    def __init__(
+        self,
+        kernel=None,
+        alpha=1e-10,
+        normalize_y=True,
+        n_restarts_optimizer=0,
+        refit_every=10,
+        random_state=None,
+        warm_start=True,
+        freeze=False,
+        lml_tolerance=None,
+    ):
+        self.kernel = kernel
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.n_restarts_optimizer = n_restarts_optimizer
+        self.refit_every = refit_every
+        self.random_state = random_state
+        self.warm_start = warm_start
+        self.freeze = freeze
+        self.lml_tolerance = lml_tolerance
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        if self.freeze and hasattr(self, "kernel_"):
+            # reuse the hyper-parameters of the previous fit, unless
+            # enough observations were added or the fit is bad
+            self.nb_partial_fit_ += max(len(X) - len(self.X_train_), 1)
+            if not (self.refit_every and self.nb_partial_fit_ >= self.refit_every):
+                self.X_train_ = X
+                self.y_train_ = y
+                try:
+                    self._update_cholesky()
+                except np.linalg.LinAlgError:
+                    return self._optimize(X, y)
+                if not self._likelihood_degraded():
+                    return self
+        return self._optimize(X, y)
+
+    def _optimize(self, X, y):
+        """fit with an optimization of the kernel hyper-parameters"""
+        kernels = [self.kernel]
+        if self.warm_start and hasattr(self, "kernel_") and len(X) >= 2 * X.shape[1]:
+            kernels.append(self.kernel_)
+        best = None
+        error = None
+        for kernel in kernels:
+            gp = GaussianProcessRegressor(
+                kernel=kernel,
+                alpha=self.alpha,
+                normalize_y=self.normalize_y,
+                n_restarts_optimizer=self.n_restarts_optimizer,
+                random_state=self.random_state,
+            )
+            try:
+                gp.fit(X, y)
+            except np.linalg.LinAlgError as e:
+                # the start is not positive definite on the new observations
+                # (e.g. a warm start with a long length scale), keep the others
+                error = e
+                continue
+            lml = gp.log_marginal_likelihood_value_
+            if best is None or lml > best.log_marginal_likelihood_value_:
+                best = gp
+        if best is None:
+            raise error
+        self.kernel_ = best.kernel_
+        self.X_train_ = X
+        self.y_train_ = y
+        self._update_cholesky()
+        self.nb_partial_fit_ = 0
+        self.nb_optimizations_ = getattr(self, "nb_optimizations_", 0) + 1
+        self.log_marginal_likelihood_ = self._log_marginal_likelihood()
+        return self
+
+    def _update_cholesky(self):
+        K = self.kernel_(self.X_train_)
+        K[np.diag_indices_from(K)] += self.alpha
+        self.L_ = cholesky(K, lower=True)
+        self._update_alpha()
+
+    def _log_marginal_likelihood(self):
+        """log marginal likelihood of the (normalized) outputs per observation"""
+        y = (self.y_train_ - self._y_mean) / self._y_std
+        n = len(y)
+        lml = -0.5 * y.dot(self.alpha_) - np.log(np.diag(self.L_)).sum()
+        return lml / n - 0.5 * np.log(2 * np.pi)
+
+    def _likelihood_degraded(self):
+        if self.lml_tolerance is None:
+            return False
+        lml = self._log_marginal_likelihood()
+        return lml < self.log_marginal_likelihood_ - self.lml_tolerance
+
+    def partial_fit(self, X, y):
+        """
+        add the observations `X` and `y` to the training set,
+        without re-optimizing the kernel hyper-parameters.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        if not hasattr(self, "L_"):
+            return self.fit(X, y)
+        X_all = np.concatenate((self.X_train_, X), axis=0)
+        y_all = np.concatenate((self.y_train_, y), axis=0)
+        self.nb_partial_fit_ += len(X)
+        if self.refit_every and self.nb_partial_fit_ >= self.refit_every:
+            return self._optimize(X_all, y_all)
+        K12 = self.kernel_(self.X_train_, X)
+        K22 = self.kernel_(X)
+        K22[np.diag_indices_from(K22)] += self.alpha
+        L12 = solve_triangular(self.L_, K12, lower=True)
+        try:
+            L22 = cholesky(K22 - L12.T.dot(L12), lower=True)
+        except np.linalg.LinAlgError:
+            # the new points make the kernel matrix badly conditioned,
+            # fall back to a full fit
+            return self._optimize(X_all, y_all)
+        n, k = len(self.X_train_), len(X)
+        L = np.zeros((n + k, n + k))
+        L[:n, :n] = self.L_
+        L[n:, :n] = L12.T
+        L[n:, n:] = L22
+        self.L_ = L
+        self.X_train_ = X_all
+        self.y_train_ = y_all
+        self._update_alpha()
+        if self._likelihood_degraded():
+            return self._optimize(X_all, y_all)
+        return self
+
+    def _update_alpha(self):
+        y = self.y_train_
+        if self.normalize_y:
+            self._y_mean = y.mean()
+            self._y_std = y.std()
+            if self._y_std == 0:
+                self._y_std = 1.0
+        else:
+            self._y_mean = 0.0
+            self._y_std = 1.0
+        y = (y - self._y_mean) / self._y_std
+        self.alpha_ = cho_solve((self.L_, True), y)
+
+    def predict(self, X, return_std=False):
+        X = np.asarray(X, dtype=float)
+        K_trans = self.kernel_(X, self.X_train_)
+        mean = K_trans.dot(self.alpha_) * self._y_std + self._y_mean
+        if not return_std:
+            return mean
+        v = solve_triangular(self.L_, K_trans.T, lower=True)
+        var = self.kernel_.diag(X) - (v ** 2).sum(axis=0)
+        var = np.clip(var, 0, np.inf)
+        std = np.sqrt(var) * self._y_std
+        return mean, std
+
+    def sample_functions(self, nb_samples=1, nb_features=1000, random_state=None):
+        """
+        draw `nb_samples` functions from the (approximate) posterior with
+        decoupled pathwise sampling[1]: a function of the prior is
+        approximated with `nb_features` random Fourier features, then
+        it is conditioned on the training set with the exact GP update.
+        Evaluating the functions costs O(nb_features + n_train) per input,
+        so they can be evaluated on many inputs, unlike the joint posterior
+        whose cost is cubic in the nb of inputs.
+        Only RBF kernels (optionally multiplied by a `ConstantKernel`
+        and summed with a `WhiteKernel`) are supported.
+
+        [1] James T. Wilson et al., Efficiently Sampling Functions
+            from Gaussian Process Posteriors, ICML 2020
+
+        Returns
+        -------
+        a callable which takes a 2D numpy array of n inputs and returns
+        a 2D numpy array of shape (nb_samples, n), the values of each function.
+        """
+        amplitude, length_scale = rbf_parameters(self.kernel_)
+        rng = check_numpy_random_state(random_state)
+        X_train = self.X_train_
+        n, d = X_train.shape
+        # the diagonal of the kernel matrix also contains the noise
+        noise = self.kernel_.diag(X_train[:1])[0] - amplitude + self.alpha
+        W = rng.normal(size=(nb_features, d)) / length_scale
+        b = rng.uniform(0, 2 * np.pi, size=nb_features)
+        scale = np.sqrt(2 * amplitude / nb_features)
+        theta = rng.normal(size=(nb_features, nb_samples))
+
+        def prior(X):
+            return (scale * np.cos(X.dot(W.T) + b)).dot(theta)
+
+        y = (self.y_train_ - self._y_mean) / self._y_std
+        eps = rng.normal(size=(n, nb_samples)) * np.sqrt(max(noise, 0))
+        v = cho_solve((self.L_, True), y[:, np.newaxis] - prior(X_train) - eps)
+
+        def functions(X):
+            X = np.asarray(X, dtype=float)
+            f = prior(X) + self.kernel_(X, X_train).dot(v)
+            return (f * self._y_std + self._y_mean).T
+
+        return functions
+
+    def predict_gradient(self, X):
+        """
+        predict the mean and the std as `predict` and their gradients
+        with respect to the inputs.
+        Only RBF kernels (optionally multiplied by a `ConstantKernel`
+        and summed with a `WhiteKernel`) are supported.
+
+        Returns
+        -------
+        mean : 1D numpy array of shape (n,)
+        std : 1D numpy array of shape (n,)
+        mean_grad : 2D numpy array of shape (n, nb_features)
+        std_grad : 2D numpy array of shape (n, nb_features)
+        """
+        _, length_scale = rbf_parameters(self.kernel_)
+        X = np.asarray(X, dtype=float)
+        K_trans = self.kernel_(X, self.X_train_)
+        # gradient of the RBF kernel wrt the inputs, shape (n, n_train, nb_features)
+        diff = (X[:, np.newaxis, :] - self.X_train_[np.newaxis, :, :]) / length_scale ** 2
+        K_trans_grad = -K_trans[:, :, np.newaxis] * diff
+        mean = K_trans.dot(self.alpha_) * self._y_std + self._y_mean
+        mean_grad = np.einsum("ijk,j->ik", K_trans_grad, self.alpha_) * self._y_std
+        K_inv_k = cho_solve((self.L_, True), K_trans.T)
+        # the prior variance includes the noise, as in `predict`
+        var = self.kernel_.diag(X) - (K_trans.T * K_inv_k).sum(axis=0)
+        var = np.clip(var, 0, np.inf)
+        var_grad = -2 * np.einsum("ijk,ji->ik", K_trans_grad, K_inv_k)
+        std = np.sqrt(var) * self._y_std
+        # the std is not differentiable where it is zero
+        sqrt_var = np.sqrt(var)[:, np.newaxis]
+        safe = np.where(sqrt_var > 0, sqrt_var, 1.0)
+        std_grad = np.where(sqrt_var > 0, var_grad / (2 * safe), 0.0) * self._y_std
+        return mean, std, mean_grad, std_grad
+
+
+class SparseGaussianProcessRegressor(object):
+    """
+    a sparse gaussian process regressor, for large histories.
+    The posterior is approximated with `nb_inducing` inducing points
+    chosen among the training inputs (the "deterministic training
+    conditional" approximation), so that fitting costs O(n m^2) and
+    predicting O(m^2) per point instead of O(n^3) and O(n^2), where
+    n is the nb of training points and m the nb of inducing points.
+    When n <= m, it is equivalent to an exact gaussian process with
+    a noise of variance `alpha`.
+
+    The kernel matrices are only built between the inducing points and the
+    training points (by chunks), the model then keeps m x m sufficient
+    statistics of the training set, so `partial_fit` costs O(k m^2) for
+    k new observations, whatever the size of the history. The kernel
+    hyper-parameters are optimized with scikit-learn's
+    `GaussianProcessRegressor` on a random subset of at most
+    `nb_hyperopt` training points.
+    By default, the training set is also kept (O(n d) memory) to be able
+    to refit, with `keep_training_set=False` it is dropped once it is
+    accumulated in the statistics, and the memory is O(m^2 + m d).
+
+    Parameters
+    ----------
+
+    kernel : kernel instance, optional
+        the kernel, as in `GaussianProcessRegressor`.
+        default is `ConstantKernel() * RBF()`. The noise should be
+        given with `alpha` rather than with a `WhiteKernel`.
+
+    nb_inducing : int, optional[default=200]
+        max nb of inducing points.
+
+    alpha : float, optional[default=1e-6]
+        variance of the noise, in the normalized output scale
+        if `normalize_y` is True.
+
+    normalize_y : bool, optional[default=True]
+        whether to normalize the outputs to zero mean and unit variance.
+
+    nb_hyperopt : int, optional[default=500]
+        max nb of training points used to optimize the kernel
+        hyper-parameters.
+
+    n_restarts_optimizer : int, optional[default=0]
+        number of restarts of the optimizer of the kernel
+        hyper-parameters, as in `GaussianProcessRegressor`.
+
+    refit_every : int or None, optional[default=None]
+        number of observations added with `partial_fit` after which
+        a full fit is done (the hyper-parameters are re-optimized and the
+        inducing points chosen again). If None, it is never done.
+        Before there are `nb_inducing` training points, the new points
+        of `partial_fit` are always added to the inducing points.
+
+    random_state : int or None, optional
+        random state used to choose the inducing points and the
+        points used to optimize the hyper-parameters.
+
+    keep_training_set : bool, optional[default=True]
+        if False, the training points are dropped once there are
+        `nb_inducing` inducing points, so `refit_every` should be None
+        (the hyper-parameters can only be optimized again with `fit`).
+
+    Attributes
+    ----------
+        kernel_ : the kernel with the optimized hyper-parameters
+        inducing_points_ : 2D numpy array of the inducing points
+        X_train_ : 2D numpy array of the training inputs, None if dropped
+        y_train_ : 1D numpy array of the training outputs, None if dropped
+        nb_train_ : nb of training points
+        alpha_ : coefficients of the inducing points
+    """
+
+    def __init__(
+        self,
+        kernel=None,
+        nb_inducing=200,
+        alpha=1e-6,
+        normalize_y=True,
+        nb_hyperopt=500,
+        n_restarts_optimizer=0,
+        refit_every=None,
+        random_state=None,
+        keep_training_set=True,
+    ):
+        assert keep_training_set or not refit_every, (
+            "refit_every should be None if keep_training_set is False"
+        )
+        self.kernel = kernel
+        self.nb_inducing = nb_inducing
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.nb_hyperopt = nb_hyperopt
+        self.n_restarts_optimizer = n_restarts_optimizer
+        self.refit_every = refit_every
+        self.random_state = random_state
+        self.keep_training_set = keep_training_set
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        if not hasattr(self, "rng_"):
+            self.rng_ = check_numpy_random_state(self.random_state)
+        ind = self._subset(len(X), self.nb_hyperopt)
+        gp = GaussianProcessRegressor(
+            kernel=self.kernel,
+            alpha=self.alpha,
+            normalize_y=self.normalize_y,
+            n_restarts_optimizer=self.n_restarts_optimizer,
+            random_state=self.rng_,
+        )
+        gp.fit(X[ind], y[ind])
+        self.kernel_ = gp.kernel_
+        self.X_train_ = X
+        self.y_train_ = y
+        self.nb_train_ = 0
+        self._select_inducing_points()
+        self.nb_partial_fit_ = 0
+        self._drop_training_set()
+        return self
+
+    def partial_fit(self, X, y):
+        """
+        add the observations `X` and `y` to the training set,
+        without re-optimizing the kernel hyper-parameters.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        if not hasattr(self, "kernel_"):
+            return self.fit(X, y)
+        if self.X_train_ is not None:
+            self.X_train_ = np.concatenate((self.X_train_, X), axis=0)
+            self.y_train_ = np.concatenate((self.y_train_, y), axis=0)
+        self.nb_partial_fit_ += len(X)
+        if self.refit_every and self.nb_partial_fit_ >= self.refit_every:
+            return self.fit(self.X_train_, self.y_train_)
+        if len(self.inducing_points_) < self.nb_inducing:
+            self._select_inducing_points()
+        else:
+            self._accumulate(X, y)
+            self._update_alpha()
+        self._drop_training_set()
+        return self
+
+    def _drop_training_set(self):
+        # the training set is only needed to choose the inducing points
+        if not self.keep_training_set and len(self.inducing_points_) >= self.nb_inducing:
+            self.X_train_ = None
+            self.y_train_ = None
+
+    def _subset(self, n, size):
+        if n <= size:
+            return np.arange(n)
+        return np.sort(self.rng_.choice(n, size=size, replace=False))
+
+    def _select_inducing_points(self):
+        ind = self._subset(len(self.X_train_), self.nb_inducing)
+        self.inducing_points_ = self.X_train_[ind]
+        self._compute_statistics()
+
+    def _compute_statistics(self):
+        m = len(self.inducing_points_)
+        self._Kmm = self.kernel_(self.inducing_points_)
+        # Kmn Knm, Kmn y and Kmn 1, where n are the training points.
+        # Kmn 1 is needed to normalize y without going through
+        # the training points again.
+        self._KK = np.zeros((m, m))
+        self._Ky = np.zeros(m)
+        self._K1 = np.zeros(m)
+        # mean of the outputs and sum of their squared deviations, to normalize them
+        self._y_running_mean = 0.0
+        self._y_m2 = 0.0
+        self.nb_train_ = 0
+        self._accumulate(self.X_train_, self.y_train_)
+        self._update_alpha()
+
+    def _accumulate(self, X, y, chunk_size=1000):
+        # in chunks, so that the memory is bounded by O(chunk_size * m)
+        for start in range(0, len(X), chunk_size):
+            Kmn = self.kernel_(self.inducing_points_, X[start : start + chunk_size])
+            self._KK += Kmn.dot(Kmn.T)
+            self._Ky += Kmn.dot(y[start : start + chunk_size])
+            self._K1 += Kmn.sum(axis=1)
+        if len(y):
+            # pairwise update of the mean and of the squared deviations
+            n, k = self.nb_train_, len(y)
+            delta = y.mean() - self._y_running_mean
+            self._y_running_mean += delta * k / (n + k)
+            self._y_m2 += ((y - y.mean()) ** 2).sum() + delta ** 2 * n * k / (n + k)
+            self.nb_train_ = n + k
+
+    def _update_alpha(self):
+        if self.normalize_y:
+            self._y_mean = self._y_running_mean
+            self._y_std = np.sqrt(self._y_m2 / self.nb_train_)
+            if self._y_std == 0:
+                self._y_std = 1.0
+        else:
+            self._y_mean = 0.0
+            self._y_std = 1.0
+        self.L_mm_ = _jittered_cholesky(self._Kmm)
+        self.L_ = _jittered_cholesky(self.alpha * self._Kmm + self._KK)
+        Ky = (self._Ky - self._y_mean * self._K1) / self._y_std
+        self.alpha_ = cho_solve((self.L_, True), Ky)
+
+    def predict(self, X, return_std=False):
+        X = np.asarray(X, dtype=float)
+        K_trans = self.kernel_(X, self.inducing_points_)
+        mean = K_trans.dot(self.alpha_) * self._y_std + self._y_mean
+        if not return_std:
+            return mean
+        v_mm = solve_triangular(self.L_mm_, K_trans.T, lower=True)
+        v = solve_triangular(self.L_, K_trans.T, lower=True)
+        var = (
+            self.kernel_.diag(X)
+            - (v_mm ** 2).sum(axis=0)
+            + self.alpha * (v ** 2).sum(axis=0)
+        )
+        var = np.clip(var, 0, np.inf)
+        std = np.sqrt(var) * self._y_std
+        return mean, std
+
+
+def _jittered_cholesky(K, max_tries=5):
+    # add an increasing jitter to the diagonal until K is positive definite
+    jitter = 0.0
+    scale = max(np.mean(np.diag(K)), 1e-12)
+    for _ in range(max_tries):
+        try:
+            return cholesky(K + jitter * np.eye(len(K)), lower=True)
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+    return cholesky(K + jitter * np.eye(len(K)), lower=True)
+
+
+def rbf_parameters(kernel):
+    """
+    returns the amplitude and the length scale of a kernel
+    which is an RBF kernel, optionally multiplied by a `ConstantKernel` and
+    summed with a `WhiteKernel` (which is ignored, it does not affect
+    the covariance between distinct points).
+    Raises `NotImplementedError` for other kernels.
+    """
+    if isinstance(kernel, Sum) and isinstance(kernel.k2, WhiteKernel):
+        return rbf_parameters(kernel.k1)
+    if isinstance(kernel, Sum) and isinstance(kernel.k1, WhiteKernel):
+        return rbf_parameters(kernel.k2)
+    if isinstance(kernel, RBF):
+        return 1.0, np.asarray(kernel.length_scale, dtype=float)
+    if isinstance(kernel, Product):
+        if isinstance(kernel.k1, ConstantKernel) and isinstance(kernel.k2, RBF):
+            constant, rbf = kernel.k1, kernel.k2
+        elif isinstance(kernel.k2, ConstantKernel) and isinstance(kernel.k1, RBF):
+            constant, rbf = kernel.k2, kernel.k1
+        else:
+            raise NotImplementedError("Unsupported kernel : {}".format(kernel))
+        return constant.constant_value, np.asarray(rbf.length_scale, dtype=float)
+    raise NotImplementedError("Unsupported kernel : {}".format(kernel))
@@ -0,0 +1,227 @@
+"""
+This module provides a cost-aware multi-fidelity bayesian optimizer,
+which uses cheap low budget evaluations (e.g. few training iterations)
+to decide which configurations deserve an expensive high budget one.
+"""
+import numpy as np
+
+from .acquisition import expected_improvement
+from .base import OptimizerWithSurrogate
+from .bayesianoptimizer import local_penalization
+from .models import IncrementalGaussianProcessRegressor
+from .space import Space
+from .transformers import Vectorizer
+from .transformers import Wrapper
+from .utils import check_random_state
+from .utils import check_sampler
+
+__all__ = ["MultiFidelityBayesianOptimizer", "BudgetTransformer"]
+
+
+class BudgetTransformer(object):
+    """
+    transformer of `(r, t)` inputs, where `r` is a budget and `t` a
+    configuration, into a 2D numpy array whose first column is log(r)
+    and the other ones are the configuration transformed by `transform_t`.
+
+    Parameters
+    ----------
+
+    transform_t : transformer instance or None
+        stateful transformer of the configurations, with `fit`, `partial_fit`
+        and `transform` methods (like `Vectorizer` or `fluentopt.space.Space`).
+        Default is a new `Vectorizer`.
+    """
+
+    def __init__(self, transform_t=None):
+        self.transform_t = Vectorizer() if transform_t is None else transform_t
+
+    def fit(self, X, y=None):
+        self.transform_t.fit([t for _, t in X])
+        return self
+
+    def partial_fit(self, X, y=None):
+        self.transform_t.partial_fit([t for _, t in X])
+        return self
+
+    def transform(self, X):
+        log_r = np.log(np.array([r for r, _ in X], dtype=float))
+        return np.column_stack((log_r, self.transform_t.transform([t for _, t in X])))
+
+
+class MultiFidelityBayesianOptimizer(OptimizerWithSurrogate):
+    """
+    cost-aware multi-fidelity bayesian optimization.
+    The inputs are `(r, t)` pairs like in `fluentopt.hyperband`,
+    where `r` is a budget among `budgets` and `t` a configuration.
+    The budget is an input of the surrogate (as log(r)), so the evaluations
+    at all the budgets are used to predict the output of a configuration
+    at any budget.
+    Each time `suggest` is called, `nb_suggestions` configurations are sampled
+    and each (budget, configuration) pair is scored by its expected improvement
+    over the best output at the same budget, divided by the predicted
+    cost of the budget. So the cheap budgets are preferred, unless the
+    surrogate is confident at them and uncertain at the expensive ones.
+
+    The cost of an evaluation is predicted with a least squares fit
+    of log(cost) as a linear function of log(r) on the costs given
+    to `update`/`update_many`, the default is a cost proportional to `r`.
+
+    Parameters
+    ----------
+
+    sampler : callable or fluentopt.space.Space
+        samples a configuration `t`.
+
+    budgets : list of numbers
+        the possible budgets, e.g. the budgets of the rungs of hyperband.
+
+    model : scikit-learn like model instance, optional
+        surrogate, it takes `(r, t)` pairs and should support `return_std`.
+        default is `Wrapper(IncrementalGaussianProcessRegressor(),
+        transform_X=BudgetTransformer(...))`.
+
+    nb_suggestions : int, optional[default=100]
+        nb of configurations sampled in each call of `suggest`.
+
+    maximize : bool, optional[default=False]
+        if True, maximize the outputs, otherwise minimize them
+        (like `fluentopt.hyperband`).
+
+    random_state : int or None, optional
+
+    penalization_radius : float, optional[default=0.1]
+        radius of the local penalization of `suggest_many` (see
+        `fluentopt.bayesianoptimizer.local_penalization`), relative to
+        the range of each column of the transformed configurations.
+
+    lazy, refit_every, history :
+        see `fluentopt.base.OptimizerWithSurrogate`.
+
+    Attributes
+    ----------
+        input_history_ : list of (r, t) evaluated
+        output_history_ : outputs corresponding to the evaluated inputs
+        cost_history_ : list of the (r, cost) given to `update_many`
+    """
+
+    def __init__(
+        self,
+        sampler,
+        budgets,
+        model=None,
+        nb_suggestions=100,
+        maximize=False,
+        random_state=None,
+        lazy=False,
+        refit_every=1,
+        history=None,
+        penalization_radius=0.1,
+    ):
+        self.maximize = maximize
+        self._sign = 1.0 if maximize else -1.0
+        if model is None:
+            transform_t = sampler if isinstance(sampler, Space) else None
+            model = Wrapper(
+                IncrementalGaussianProcessRegressor(),
+                transform_X=BudgetTransformer(transform_t),
+                transform_y=self._reward,
+            )
+        super(MultiFidelityBayesianOptimizer, self).__init__(
+            model, lazy=lazy, refit_every=refit_every, history=history
+        )
+        self.space = sampler if isinstance(sampler, Space) else None
+        self.sampler = check_sampler(sampler)
+        self.budgets = sorted(budgets)
+        self.nb_suggestions = nb_suggestions
+        self.rng = check_random_state(random_state)
+        self.penalization_radius = penalization_radius
+        self.cost_history_ = []
+
+    def _reward(self, y):
+        # the model is fitted on rewards, which are maximized
+        return self._sign * np.asarray(y, dtype=float)
+
+    def update(self, x, y, cost=None):
+        self.update_many([x], [y], costs=None if cost is None else [cost])
+
+    def update_many(self, xlist, ylist, costs=None):
+        """
+        add evaluations, `costs` is an optional list with the cost
+        (e.g. duration) of each evaluation.
+        """
+        super(MultiFidelityBayesianOptimizer, self).update_many(xlist, ylist)
+        if costs is not None:
+            assert len(costs) == len(xlist), "costs should have the same length as xlist"
+            self.cost_history_.extend((x[0], c) for x, c in zip(xlist, costs))
+
+    def predict_cost(self, budgets):
+        """predict the cost of evaluations with each budget of `budgets`"""
+        log_r = np.log(np.asarray(budgets, dtype=float))
+        if self.cost_history_:
+            r, c = np.array(self.cost_history_, dtype=float).T
+            if len(np.unique(r)) > 1:
+                A = np.column_stack((np.ones(len(r)), np.log(r)))
+                coefs, _, _, _ = np.linalg.lstsq(A, np.log(c), rcond=None)
+                return np.exp(coefs[0] + coefs[1] * log_r)
+            # a single budget, only the scale can be estimated
+            return np.exp(log_r + np.mean(np.log(c) - np.log(r)))
+        return np.exp(log_r)
+
+    def get_scores(self, inputs):
+        """
+        expected improvement of each (r, t) in `inputs` over the best
+        output at the budget r, divided by the predicted cost of r.
+        """
+        self.fit_model()
+        mu, std = self.model.predict(inputs, return_std=True)
+        budgets = np.array([r for r, _ in inputs], dtype=float)
+        rewards = self._reward(self.output_history_)
+        done = np.array([r for r, _ in self.input_history_], dtype=float)
+        best = np.full(len(inputs), rewards.max())
+        for r in np.unique(budgets):
+            if (done == r).any():
+                best[budgets == r] = rewards[done == r].max()
+        improvement = expected_improvement(mu, std, best)
+        return improvement / self.predict_cost(budgets)
+
+    def suggest(self):
+        return self.suggest_many(1)[0]
+
+    def suggest_many(self, n):
+        """
+        suggest `n` (r, t) pairs with the best scores, each configuration
+        with its best budget. The batch is built with local penalization
+        over the configurations, like `BayesianOptimizer.suggest_many`:
+        the configurations of the batch are all different, and the ones
+        near the configurations already selected or pending (see
+        `add_pending`) are penalized.
+        """
+        if len(self.input_history_) == 0:
+            return [(self.budgets[0], self.sampler(self.rng)) for _ in range(n)]
+        configs = [self.sampler(self.rng) for _ in range(max(self.nb_suggestions, n))]
+        inputs = [(r, t) for t in configs for r in self.budgets]
+        scores = self.get_scores(inputs)
+        scores = scores.reshape((len(configs), len(self.budgets)))
+        best_budget = scores.argmax(axis=1)
+        if self.space is not None:
+            vectorizer = self.space
+        else:
+            vectorizer = Vectorizer().fit(configs)
+        pending = [t for _, t in self.pending_]
+        selected = local_penalization(
+            vectorizer.transform(configs),
+            scores.max(axis=1),
+            n,
+            radius=self.penalization_radius,
+            X_pending=vectorizer.transform(pending) if pending else None,
+        )
+        return [(self.budgets[best_budget[i]], configs[i]) for i in selected]
+
+    @property
+    def incumbent_(self):
+        """the best configuration evaluated with the biggest budget so far"""
+        rewards = self._reward(self.output_history_)
+        done = np.array([r for r, _ in self.input_history_], dtype=float)
+        ind = np.flatnonzero(done == done.max())
+        return self.input_history_[ind[np.argmax(rewards[ind])]][1]
@@ -0,0 +1,261 @@
+"""
+This module provides early stopping of the evaluations which report
+intermediate results (e.g. the validation loss after each epoch of
+a training run). The intermediate results are stored as learning curves
+by `LearningCurves`, and a pruner decides after each new result whether
+the evaluation is hopeless and should be aborted.
+
+Example
+-------
+
+>>> opt.learning_curves.pruner = MedianPruner()
+>>> def feval(x, report):
+...     for epoch in range(100):
+...         loss = train_one_epoch(x)
+...         if report(epoch, loss):
+...             break
+...     return loss
+>>> run(opt, feval, nb_evaluations=100, nb_workers=4, report=True)
+"""
+import numpy as np
+
+from .utils import GrowableArray
+from .utils import index_of
+
+__all__ = [
+    "LearningCurves",
+    "MedianPruner",
+    "SuccessiveHalvingPruner",
+    "CurveExtrapolationPruner",
+]
+
+
+class LearningCurves(object):
+    """
+    stores the intermediate results of the evaluations
+    and asks `pruner` whether an evaluation should be stopped.
+
+    Parameters
+    ----------
+
+    pruner : pruner instance or None
+        if None, the evaluations are never stopped.
+
+    Attributes
+    ----------
+        inputs_ : list of the inputs which reported results
+        curves_ : list of (steps, values) pairs of `GrowableArray`, one per input
+        pruned_ : list of bool, whether each input was pruned
+    """
+
+    def __init__(self, pruner=None):
+        self.pruner = pruner
+        self.inputs_ = []
+        self.curves_ = []
+        self.pruned_ = []
+        # index of the inputs by key, see `_key`
+        self._index = {}
+
+    def report(self, x, step, value):
+        """
+        add the intermediate result `value` at `step` of the evaluation of `x`.
+        Returns True if the evaluation should be stopped.
+        """
+        i = self._find(x)
+        if i is None:
+            i = len(self.inputs_)
+            key = _key(x)
+            if key is not None:
+                self._index[key] = i
+            self.inputs_.append(x)
+            self.curves_.append((GrowableArray(), GrowableArray()))
+            self.pruned_.append(False)
+        steps, values = self.curves_[i]
+        steps.extend([step])
+        values.extend([value])
+        if self.pruner is None:
+            return False
+        others = [_as_arrays(c) for j, c in enumerate(self.curves_) if j != i]
+        prune = bool(self.pruner.prune(_as_arrays(self.curves_[i]), others))
+        self.pruned_[i] = self.pruned_[i] or prune
+        return prune
+
+    def curve(self, x):
+        """returns the steps and the values reported for `x`, as numpy arrays"""
+        i = self._find(x)
+        assert i is not None, "No result reported for {}".format(x)
+        return _as_arrays(self.curves_[i])
+
+    def _find(self, x):
+        key = _key(x)
+        if key is not None:
+            return self._index.get(key)
+        return index_of(self.inputs_, x)
+
+
+def _key(x):
+    """hashable key of the input `x`, or None if it has none"""
+    try:
+        key = _hashable(x)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _hashable(x):
+    if isinstance(x, dict):
+        return frozenset((k, _hashable(v)) for k, v in x.items())
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return tuple(_hashable(v) for v in x)
+    if isinstance(x, np.generic):
+        return x.item()
+    return x
+
+
+def _as_arrays(curve):
+    # views of the arrays, they are not copied
+    steps, values = curve
+    return steps.array, values.array
+
+
+def _value_at(curve, step, maximize):
+    """best value of `curve` up to `step`, or None if it did not reach `step`"""
+    steps, values = curve
+    if not len(steps) or steps.max() < step:
+        return None
+    values = values[steps <= step]
+    if not len(values):
+        return None
+    return values.max() if maximize else values.min()
+
+
+class MedianPruner(object):
+    """
+    median stopping rule: an evaluation is stopped if its best value
+    so far is worse than the median of the best values of the other
+    evaluations at the same step.
+
+    Parameters
+    ----------
+
+    warmup_steps : int, optional[default=0]
+        no evaluation is stopped before this step.
+
+    min_trials : int, optional[default=5]
+        no evaluation is stopped while less than `min_trials` other
+        evaluations have reached the step.
+
+    maximize : bool, optional[default=False]
+        if True, the values are maximized, otherwise minimized.
+    """
+
+    def __init__(self, warmup_steps=0, min_trials=5, maximize=False):
+        self.warmup_steps = warmup_steps
+        self.min_trials = min_trials
+        self.maximize = maximize
+
+    def prune(self, curve, others):
+        step = curve[0][-1]
+        if step < self.warmup_steps:
+            return False
+        ref = [_value_at(c, step, self.maximize) for c in others]
+        ref = [v for v in ref if v is not None]
+        if len(ref) < self.min_trials:
+            return False
+        value = _value_at(curve, step, self.maximize)
+        median = np.median(ref)
+        return value < median if self.maximize else value > median
+
+
+class SuccessiveHalvingPruner(object):
+    """
+    successive halving thresholds, as in `fluentopt.hyperband.ASHA`:
+    the rungs are at the steps `min_step * eta ** k`. When an evaluation
+    reaches a rung, it is stopped unless its best value so far is among
+    the top `1 / eta` of the values of all the evaluations which reached the rung
+    (the evaluations alone at a rung are never stopped).
+
+    Parameters
+    ----------
+
+    min_step : int, optional[default=1]
+        step of the first rung.
+
+    eta : int, optional[default=3]
+        reduction factor.
+
+    maximize : bool, optional[default=False]
+        if True, the values are maximized, otherwise minimized.
+    """
+
+    def __init__(self, min_step=1, eta=3, maximize=False):
+        self.min_step = min_step
+        self.eta = eta
+        self.maximize = maximize
+
+    def prune(self, curve, others):
+        steps = curve[0]
+        step = steps[-1]
+        previous = steps[-2] if len(steps) > 1 else -np.inf
+        if step < self.min_step:
+            return False
+        rung = self.min_step * self.eta ** int(
+            np.floor(np.log(step / self.min_step) / np.log(self.eta) + 1e-9)
+        )
+        if previous >= rung:
+            # the rung was already checked
+            return False
+        values = [_value_at(c, rung, self.maximize) for c in others]
+        values = [v for v in values if v is not None]
+        value = _value_at(curve, rung, self.maximize)
+        values.append(value)
+        sign = -1 if self.maximize else 1
+        rank = int((sign * np.array(values) < sign * value).sum())
+        return rank >= max(1, len(values) // self.eta)
+
+
+class CurveExtrapolationPruner(object):
+    """
+    an evaluation is stopped if the extrapolation of its learning curve
+    at `target_step` is worse than the best value reached by the
+    other evaluations. The curve is extrapolated with a least squares
+    fit of the values as a linear function of log(step), which keeps
+    improving without bound, so the extrapolation is optimistic
+    and the pruning conservative.
+
+    Parameters
+    ----------
+
+    target_step : int
+        step at which the curves are extrapolated, e.g. the last epoch.
+
+    min_points : int, optional[default=3]
+        no evaluation is stopped before it reported `min_points` results.
+
+    maximize : bool, optional[default=False]
+        if True, the values are maximized, otherwise minimized.
+    """
+
+    def __init__(self, target_step, min_points=3, maximize=False):
+        self.target_step = target_step
+        self.min_points = min_points
+        self.maximize = maximize
+
+    def prune(self, curve, others):
+        steps, values = curve
+        if len(steps) < self.min_points or not others:
+            return False
+        ref = [c[1].max() if self.maximize else c[1].min() for c in others if len(c[1])]
+        if not ref:
+            return False
+        best = max(ref) if self.maximize else min(ref)
+        log_steps = np.log(np.maximum(steps, 1))
+        A = np.column_stack((np.ones(len(steps)), log_steps))
+        coefs, _, _, _ = np.linalg.lstsq(A, values, rcond=None)
+        pred = coefs[0] + coefs[1] * np.log(max(self.target_step, 1))
+        # the extrapolation can not be worse than the current best value
+        # of the curve, which is already reached
+        if self.maximize:
+            return max(pred, values.max()) < best
+        return min(pred, values.min()) > best
@@ -28,6 +28,8 @@ class RandomSearch(OptimizerWithHistory):
         of numpy.random and returns a dict, a list or a scalar.
     random_state : int or None, optional
         controls the random seed used by `sampler`.
+    history : history backend instance or None
+        where to store the evaluations, see `fluentopt.history`.
 
     Attributes
     ----------
@@ -36,8 +38,8 @@ class RandomSearch(OptimizerWithHistory):
         `output_history_` : outputs corresponding to the evaluated inputs
     """
 
-    def __init__(self, sampler, random_state=None):
-        super(RandomSearch, self).__init__()
+    def __init__(self, sampler, random_state=None, history=None):
+        super(RandomSearch, self).__init__(history=history)
         self.sampler = check_sampler(sampler)
         self.rng = check_random_state(random_state)
 
@@ -0,0 +1,144 @@
+"""
+This module provides helpers to drive the optimization loop,
+that is, suggesting inputs, evaluating them and feeding back
+the results to the optimizer.
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+__all__ = ["run"]
+
+
+def run(
+    optimizer,
+    feval,
+    nb_evaluations,
+    nb_workers=1,
+    executor="thread",
+    callback=None,
+    report=False,
+    on_error="raise",
+):
+    """
+    Run the optimization loop with `nb_workers` evaluations in parallel.
+    Each time an evaluation finishes, its result is given to the optimizer
+    with `update_many` and a new input is suggested, so that all the
+    workers are always busy. The inputs being evaluated are given to the
+    optimizer with `add_pending`, so that it can avoid suggesting them again.
+
+    Parameters
+    ----------
+
+    optimizer : Optimizer instance
+
+    feval : callable
+        the function to optimize, it takes an input and returns a scalar.
+        if `executor` is "process", it should be picklable.
+
+    nb_evaluations : int
+        total nb of evaluations.
+
+    nb_workers : int, optional[default=1]
+        max nb of evaluations running at the same time.
+
+    executor : "thread" or "process" or concurrent.futures.Executor instance
+        where to run the evaluations. "thread" and "process" create
+        a `ThreadPoolExecutor` (resp. `ProcessPoolExecutor`) with
+        `nb_workers` workers, which is shut down at the end.
+
+    callback : callable or None
+        called as `callback(optimizer, xlist, ylist)` each time
+        results are given to the optimizer.
+
+    report : bool, optional[default=False]
+        if True, `feval` is called as `feval(x, report)`, where `report(step, value)`
+        gives an intermediate result of the evaluation to `optimizer.report`
+        and returns True if the evaluation should be stopped, see
+        `fluentopt.pruning`. `feval` should then return its last result.
+        It can not be used with a "process" executor.
+
+    on_error : "raise" or "skip", optional[default="raise"]
+        what to do when `feval` raises an exception. In both cases, the
+        failed input is removed from the pending inputs and the results
+        of the other finished evaluations are given to the optimizer.
+        With "raise", the exception is then re-raised, with "skip" the
+        failed evaluation is dropped (it still counts in `nb_evaluations`)
+        and the loop continues.
+
+    Returns
+    -------
+
+    the optimizer
+    """
+    assert on_error in ("raise", "skip"), "on_error should be 'raise' or 'skip'"
+    own_executor = not hasattr(executor, "submit")
+    if executor == "thread":
+        executor = ThreadPoolExecutor(max_workers=nb_workers)
+    elif executor == "process":
+        executor = ProcessPoolExecutor(max_workers=nb_workers)
+    else:
+        assert not own_executor, "executor should be 'thread', 'process' or an Executor"
+    # the workers can report concurrently with the main loop,
+    # and the optimizer is not thread-safe
+    lock = threading.Lock()
+    if report:
+        assert not isinstance(
+            executor, ProcessPoolExecutor
+        ), "report can not be used with a process executor"
+
+        def submit(x):
+            def report_(step, value):
+                with lock:
+                    return optimizer.report(x, step, value)
+
+            return executor.submit(feval, x, report_)
+
+    else:
+
+        def submit(x):
+            return executor.submit(feval, x)
+
+    running = {}
+    nb_submitted = 0
+    try:
+        while nb_submitted < nb_evaluations or running:
+            n = min(nb_workers - len(running), nb_evaluations - nb_submitted)
+            if n > 0:
+                with lock:
+                    xlist = optimizer.suggest_many(n) if n > 1 else [optimizer.suggest()]
+                    for x in xlist:
+                        optimizer.add_pending(x)
+                for x in xlist:
+                    running[submit(x)] = x
+                nb_submitted += len(xlist)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            xlist = []
+            ylist = []
+            errors = []
+            for future in done:
+                x = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    xlist.append(x)
+                    ylist.append(future.result())
+                else:
+                    errors.append((x, error))
+            with lock:
+                for x, _ in errors:
+                    optimizer.remove_pending(x)
+                if xlist:
+                    optimizer.update_many(xlist, ylist)
+            if xlist and callback is not None:
+                callback(optimizer, xlist, ylist)
+            if errors and on_error == "raise":
+                raise errors[0][1]
+    finally:
+        for future, x in running.items():
+            if future.cancel():
+                optimizer.remove_pending(x)
+        if own_executor:
+            executor.shutdown(wait=True)
+    return optimizer
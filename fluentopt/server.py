@@ -0,0 +1,392 @@
+"""
+This module provides a small HTTP server which exposes an optimizer
+to other processes, and a client implementing the `Optimizer` API
+on top of it, so that many workers can share the same optimizer
+(and the same surrogate) without each holding a copy.
+
+Example
+-------
+
+In the process holding the optimizer:
+
+>>> server = OptimizerServer(BayesianOptimizer(sampler), port=8000).start()
+
+In the workers:
+
+>>> opt = OptimizerClient("http://127.0.0.1:8000")
+>>> x = opt.suggest()
+>>> opt.update(x, feval(x))
+
+The inputs and outputs are sent as JSON, so they should be made
+of dicts, lists, strings and numbers (numpy arrays and scalars are
+converted to lists and numbers).
+"""
+import json
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import ThreadingHTTPServer
+    from queue import Empty
+    from queue import Queue
+    from urllib.error import HTTPError
+    from urllib.request import Request
+    from urllib.request import urlopen
+except ImportError:  # python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+    from Queue import Empty
+    from Queue import Queue
+    from urllib2 import HTTPError
+    from urllib2 import Request
+    from urllib2 import urlopen
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+import numpy as np
+
+from .base import Optimizer
+from .utils import check_if_list_of_scalars
+from .utils import check_types_coherence
+from .utils import index_of
+
+__all__ = ["OptimizerServer", "OptimizerClient"]
+
+
+class OptimizerServer(object):
+    """
+    HTTP server which exposes `optimizer`.
+    All the calls to the optimizer are done by a single dispatcher
+    thread, so the optimizer does not need to be thread-safe.
+    The requests received during `batch_window` seconds are
+    processed together: the updates are given to the optimizer with
+    a single call to `update_many`, then the suggestions are done with
+    a single call to `suggest_many`, so that concurrent workers share
+    the same surrogate fit and scoring pass.
+
+    Parameters
+    ----------
+
+    optimizer : Optimizer instance
+
+    host : str, optional[default="127.0.0.1"]
+
+    port : int, optional[default=0]
+        if 0, a free port is used, see `url`.
+
+    batch_window : float, optional[default=0.01]
+        nb of seconds to wait for other requests before processing a batch.
+
+    track_pending : bool, optional[default=True]
+        if True, the suggested inputs are given to the optimizer
+        with `add_pending` until their result is received.
+        They are given as the clients receive them (e.g. tuples become
+        lists), so that they match the inputs sent back by the clients.
+    """
+
+    def __init__(
+        self, optimizer, host="127.0.0.1", port=0, batch_window=0.01, track_pending=True
+    ):
+        self.optimizer = optimizer
+        self.batch_window = batch_window
+        self.track_pending = track_pending
+        self._queue = Queue()
+        self._stopped = threading.Event()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self._queue))
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """start serving in background threads"""
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever),
+            threading.Thread(target=self._dispatch_loop),
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _dispatch_loop(self):
+        while not self._stopped.is_set():
+            try:
+                requests = [self._queue.get(timeout=0.1)]
+            except Empty:
+                continue
+            deadline = time.time() + self.batch_window
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    requests.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+            try:
+                self._process(requests)
+            except Exception as ex:
+                # the dispatcher thread should never die, the requests
+                # which are not answered yet get the error
+                for request in requests:
+                    if not request.done:
+                        request.finish(error=ex)
+
+    def _process(self, requests):
+        opt = self.optimizer
+        by_route = {}
+        for request in requests:
+            try:
+                _check_payload(request.route, request.payload)
+            except Exception as ex:
+                request.finish(error=ex)
+            else:
+                by_route.setdefault(request.route, []).append(request)
+        for request in by_route.get("/pending", []):
+            _call(request, self._pending, request.payload)
+        for request in by_route.get("/report", []):
+            payload = request.payload
+            try:
+                stop = opt.report(payload["x"], payload["step"], payload["value"])
+            except Exception as ex:
+                request.finish(error=ex)
+            else:
+                request.finish(result={"stop": bool(stop)})
+        updates = by_route.get("/update", [])
+        if updates:
+            self._update(updates)
+        suggestions = by_route.get("/suggest", [])
+        if suggestions:
+            sizes = [int(r.payload.get("n", 1)) for r in suggestions]
+            total = sum(sizes)
+            try:
+                xlist = opt.suggest_many(total) if total > 1 else [opt.suggest()]
+                xlist = _from_json(xlist)
+                if self.track_pending:
+                    for x in xlist:
+                        opt.add_pending(x)
+            except Exception as ex:
+                for request in suggestions:
+                    request.finish(error=ex)
+            else:
+                start = 0
+                for request, size in zip(suggestions, sizes):
+                    request.finish(result={"xlist": xlist[start : start + size]})
+                    start += size
+        for request in by_route.get(None, []):
+            request.finish(error=ValueError("Unknown route"))
+
+    def _update(self, updates):
+        opt = self.optimizer
+        xlist = [x for r in updates for x in r.payload["xlist"]]
+        ylist = [y for r in updates for y in r.payload["ylist"]]
+        nb_rows = _nb_rows(opt)
+        try:
+            opt.update_many(xlist, ylist)
+        except Exception as ex:
+            nb_added = _nb_rows(opt) - nb_rows if nb_rows is not None else None
+            start = 0
+            for request in updates:
+                size = len(request.payload["xlist"])
+                if nb_added is None or start < nb_added:
+                    # the rows of the request are (or may be) in the history
+                    # already, retrying it would duplicate them
+                    request.finish(error=ex)
+                else:
+                    # find which requests are invalid rather than failing them all
+                    payload = request.payload
+                    _call(request, opt.update_many, payload["xlist"], payload["ylist"])
+                start += size
+        else:
+            for request in updates:
+                request.finish(result={})
+
+    def _pending(self, payload):
+        if payload.get("remove"):
+            self.optimizer.remove_pending(payload["x"])
+        elif index_of(getattr(self.optimizer, "pending_", []), payload["x"]) is None:
+            # the suggested inputs are already pending if `track_pending` is True,
+            # so that clients driven by `fluentopt.runner.run` can call
+            # `add_pending` on them without adding them twice
+            self.optimizer.add_pending(payload["x"])
+
+
+class _Request(object):
+    def __init__(self, route, payload):
+        self.route = route
+        self.payload = payload
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+
+
+def _check_payload(route, payload):
+    # the payloads come from the clients, they are checked before
+    # being merged so that an invalid request only fails itself
+    assert isinstance(payload, dict), "The payload should be a JSON object"
+    if route == "/update":
+        assert "xlist" in payload and "ylist" in payload, "xlist and ylist are required"
+        xlist, ylist = payload["xlist"], payload["ylist"]
+        assert isinstance(xlist, list) and isinstance(
+            ylist, list
+        ), "xlist and ylist should be lists"
+        assert len(xlist) == len(ylist), "xlist and ylist should have the same length"
+        check_types_coherence(xlist)
+        check_if_list_of_scalars(ylist)
+    elif route == "/suggest":
+        n = payload.get("n", 1)
+        assert (
+            isinstance(n, int) and not isinstance(n, bool) and n >= 1
+        ), "n should be a positive int"
+    elif route == "/report":
+        for key in ("x", "step", "value"):
+            assert key in payload, "{} is required".format(key)
+    elif route == "/pending":
+        assert "x" in payload, "x is required"
+
+
+def _nb_rows(optimizer):
+    # nb of evaluations in the history of the optimizer, None if unknown
+    history = getattr(optimizer, "history", None)
+    return len(history) if history is not None else None
+
+
+def _call(request, func, *args):
+    try:
+        func(*args)
+    except Exception as ex:
+        request.finish(error=ex)
+    else:
+        request.finish(result={})
+
+
+def _make_handler(queue):
+    routes = ("/suggest", "/update", "/pending", "/report")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+            except ValueError:
+                # rejected by `_check_payload`
+                payload = None
+            request = _Request(self.path if self.path in routes else None, payload)
+            queue.put(request)
+            request.wait()
+            if request.error is not None:
+                status = 400
+                body = {
+                    "error": "{}: {}".format(type(request.error).__name__, request.error)
+                }
+            else:
+                status = 200
+                body = request.result
+            data = json.dumps(body, default=_to_json).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _from_json(obj):
+    # `obj` as decoded by the clients, e.g. the `(r, t)`
+    # pairs of `fluentopt.hyperband` become lists
+    return json.loads(json.dumps(obj, default=_to_json))
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("{} is not JSON serializable".format(type(obj).__name__))
+
+
+class OptimizerClient(Optimizer):
+    """
+    an optimizer which forwards all the calls to an `OptimizerServer`.
+
+    Parameters
+    ----------
+
+    url : str
+        url of the server, see `OptimizerServer.url`
+
+    timeout : float or None, optional
+        timeout of the requests in seconds
+    """
+
+    def __init__(self, url, timeout=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, route, payload):
+        data = json.dumps(payload, default=_to_json).encode("utf-8")
+        request = Request(
+            self.url + route, data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            response = urlopen(request, timeout=self.timeout)
+        except HTTPError as ex:
+            message = json.loads(ex.read().decode("utf-8"))["error"]
+            raise RuntimeError("The optimizer server failed: {}".format(message))
+        return json.loads(response.read().decode("utf-8"))
+
+    def suggest(self):
+        return self.suggest_many(1)[0]
+
+    def suggest_many(self, n):
+        return self._post("/suggest", {"n": n})["xlist"]
+
+    def update_many(self, xlist, ylist):
+        self._post("/update", {"xlist": list(xlist), "ylist": list(ylist)})
+
+    def report(self, x, step, value):
+        payload = {"x": x, "step": step, "value": value}
+        return self._post("/report", payload)["stop"]
+
+    def add_pending(self, x):
+        self._post("/pending", {"x": x})
+
+    def remove_pending(self, x):
+        self._post("/pending", {"x": x, "remove": True})
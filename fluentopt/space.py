@@ -0,0 +1,456 @@
+"""
+This module provides a declarative way to define search spaces.
+Contrary to a `sampler` function, a `Space` knows the structure
+of the inputs, so it can sample a batch of inputs directly into
+a numpy array (the encoded representation of the inputs), convert
+the rows of such an array back to the dict format that the
+user functions receive, and provide the bounds of each column.
+
+Example
+-------
+
+>>> space = Space({
+...     "model": Categorical(["rf", "svm"]),
+...     "n_estimators": Conditional(Integer(10, 500), parent="model", values=["rf"]),
+...     "C": Conditional(LogReal(1e-3, 1e3), parent="model", values=["svm"]),
+... })
+>>> X = space.sample(np.random.RandomState(42), 100)
+>>> inputs = space.to_dicts(X)
+
+A `Space` can be used as a `sampler` (it is callable), and
+`BayesianOptimizer` uses it directly to sample and score its
+candidates as a numpy array.
+"""
+import numpy as np
+
+__all__ = [
+    "Dimension",
+    "Real",
+    "LogReal",
+    "Integer",
+    "Categorical",
+    "Conditional",
+    "Space",
+]
+
+
+class Dimension(object):
+    """
+    Base class of the dimensions of a search space.
+    A dimension is encoded into `n_columns` real valued columns.
+    """
+
+    n_columns = 1
+
+    def sample(self, rng, n, out=None):
+        """
+        Sample `n` encoded values.
+
+        Parameters
+        ----------
+        rng : numpy.random.RandomState instance
+        n : int
+            nb of values to sample
+        out : 2D numpy array of shape (n, n_columns) or None
+            array where to write the samples, if None a new array is allocated.
+
+        Returns
+        -------
+        2D numpy array of shape (n, n_columns)
+        """
+        out = _check_out(out, n, self.n_columns)
+        self._sample(rng, out)
+        return out
+
+    def _sample(self, rng, out):
+        raise NotImplementedError()
+
+    def encode(self, values, out=None):
+        """
+        Encode a list of values into a 2D numpy array
+        of shape (len(values), n_columns).
+        """
+        raise NotImplementedError()
+
+    def decode(self, X):
+        """
+        Decode a 2D numpy array of shape (n, n_columns)
+        into a 1D numpy array of n values.
+        """
+        raise NotImplementedError()
+
+    def project(self, X):
+        """
+        Project the rows of an encoded array, which could come from e.g
+        a local search over the encoded box, to the closest valid encoding.
+        """
+        return self.encode(self.decode(X))
+
+    def isin(self, X, values):
+        """
+        returns a boolean mask which is True for the rows of the
+        encoded array `X` whose decoded value is in `values`.
+        """
+        return np.isin(self.decode(X), values)
+
+    @property
+    def bounds(self):
+        """2D numpy array of shape (n_columns, 2) with the low and high bound of each column"""
+        raise NotImplementedError()
+
+
+class Real(Dimension):
+    """
+    a real valued dimension, sampled uniformly between `low` and `high`.
+    """
+
+    def __init__(self, low, high):
+        assert low < high, "low should be lower than high"
+        self.low = low
+        self.high = high
+
+    def _sample(self, rng, out):
+        out[:, 0] = rng.uniform(self.low, self.high, size=len(out))
+
+    def encode(self, values, out=None):
+        out = _check_out(out, len(values), 1)
+        out[:, 0] = values
+        return out
+
+    def decode(self, X):
+        return np.clip(X[:, 0], self.low, self.high)
+
+    @property
+    def bounds(self):
+        return np.array([[self.low, self.high]], dtype=float)
+
+
+class LogReal(Dimension):
+    """
+    a positive real valued dimension, sampled log-uniformly
+    between `low` and `high`. It is encoded in log-scale.
+    """
+
+    def __init__(self, low, high):
+        assert 0 < low < high, "low should be positive and lower than high"
+        self.low = low
+        self.high = high
+
+    def _sample(self, rng, out):
+        out[:, 0] = rng.uniform(np.log(self.low), np.log(self.high), size=len(out))
+
+    def encode(self, values, out=None):
+        out = _check_out(out, len(values), 1)
+        out[:, 0] = np.log(np.asarray(values, dtype=float))
+        return out
+
+    def decode(self, X):
+        return np.clip(np.exp(X[:, 0]), self.low, self.high)
+
+    @property
+    def bounds(self):
+        return np.log(np.array([[self.low, self.high]], dtype=float))
+
+
+class Integer(Dimension):
+    """
+    an integer valued dimension, sampled uniformly between
+    `low` and `high` (both included).
+    """
+
+    def __init__(self, low, high):
+        assert low <= high, "low should be lower or equal than high"
+        self.low = int(low)
+        self.high = int(high)
+
+    def _sample(self, rng, out):
+        out[:, 0] = rng.randint(self.low, self.high + 1, size=len(out))
+
+    def encode(self, values, out=None):
+        out = _check_out(out, len(values), 1)
+        out[:, 0] = values
+        return out
+
+    def decode(self, X):
+        return np.clip(np.rint(X[:, 0]), self.low, self.high).astype(int)
+
+    @property
+    def bounds(self):
+        return np.array([[self.low, self.high]], dtype=float)
+
+
+class Categorical(Dimension):
+    """
+    a categorical dimension, which takes one of the values of `choices`.
+    It is one-hot encoded.
+
+    Parameters
+    ----------
+
+    choices : list
+        the possible values, they should be hashable.
+
+    prior : list of float or None
+        probability of each choice. If None, the choices are
+        sampled uniformly.
+    """
+
+    def __init__(self, choices, prior=None):
+        assert len(choices) > 0, "choices should not be empty"
+        self.choices = list(choices)
+        self.prior = prior
+        self.n_columns = len(self.choices)
+        self._choices = np.empty(len(self.choices), dtype=object)
+        self._choices[:] = self.choices
+        self._index = {c: i for i, c in enumerate(self.choices)}
+
+    def _sample(self, rng, out):
+        ind = rng.choice(self.n_columns, size=len(out), p=self.prior)
+        out[:] = 0
+        out[np.arange(len(out)), ind] = 1
+
+    def encode(self, values, out=None):
+        out = _check_out(out, len(values), self.n_columns)
+        ind = [self._index[v] for v in values]
+        out[:] = 0
+        out[np.arange(len(out)), ind] = 1
+        return out
+
+    def decode(self, X):
+        return self._choices[np.argmax(X, axis=1)]
+
+    def project(self, X):
+        out = np.zeros_like(X, dtype=float)
+        out[np.arange(len(X)), np.argmax(X, axis=1)] = 1
+        return out
+
+    def isin(self, X, values):
+        ind = [self._index[v] for v in values if v in self._index]
+        return np.isin(np.argmax(X, axis=1), ind)
+
+    @property
+    def bounds(self):
+        return np.array([[0.0, 1.0]] * self.n_columns)
+
+
+class Conditional(Dimension):
+    """
+    a dimension that only exists when the dimension `parent`
+    of the same `Space` takes one of the values in `values`.
+    When it does not exist, the key is absent from the dicts
+    returned by `Space.to_dicts` and its columns take their
+    lower bound in the encoded array.
+
+    Parameters
+    ----------
+
+    dimension : Dimension instance
+
+    parent : str
+        name of the parent dimension in the space.
+
+    values : list
+        values of the parent for which `dimension` is active.
+    """
+
+    def __init__(self, dimension, parent, values):
+        self.dimension = dimension
+        self.parent = parent
+        self.values = list(values)
+        self.n_columns = dimension.n_columns
+
+    def _sample(self, rng, out):
+        self.dimension._sample(rng, out)
+
+    def encode(self, values, out=None):
+        return self.dimension.encode(values, out=out)
+
+    def decode(self, X):
+        return self.dimension.decode(X)
+
+    def project(self, X):
+        return self.dimension.project(X)
+
+    def isin(self, X, values):
+        return self.dimension.isin(X, values)
+
+    @property
+    def bounds(self):
+        return self.dimension.bounds
+
+
+class Space(Dimension):
+    """
+    a search space, made of named dimensions.
+    The inputs are dicts with a key per (active) dimension.
+    A `Space` can itself be used as a dimension of another space,
+    to represent nested dicts.
+
+    Parameters
+    ----------
+
+    dimensions : dict or list of (name, dimension) pairs
+        the dimensions of the space. The columns of the encoded
+        arrays follow the order of `dimensions`.
+    """
+
+    def __init__(self, dimensions):
+        if isinstance(dimensions, dict):
+            dimensions = list(dimensions.items())
+        self.dimensions = list(dimensions)
+        self.names = [name for name, _ in self.dimensions]
+        self._slices = {}
+        start = 0
+        for name, dim in self.dimensions:
+            assert isinstance(dim, Dimension), "{} is not a Dimension".format(name)
+            self._slices[name] = slice(start, start + dim.n_columns)
+            start += dim.n_columns
+        self.n_columns = start
+        for name, dim in self.dimensions:
+            if isinstance(dim, Conditional):
+                assert dim.parent in self._slices, "Unknown parent {} of {}".format(
+                    dim.parent, name
+                )
+                parent = dict(self.dimensions)[dim.parent]
+                while isinstance(parent, Conditional):
+                    parent = parent.dimension
+                assert not isinstance(
+                    parent, Space
+                ), "The parent {} of {} can not be a Space".format(dim.parent, name)
+
+    def __call__(self, rng):
+        """
+        sample one input (a dict), so that a `Space` can be used
+        as a `sampler`.
+        """
+        return self.to_dicts(self.sample(_check_numpy_rng(rng), 1))[0]
+
+    def _sample(self, rng, out):
+        for name, dim in self.dimensions:
+            dim._sample(rng, out[:, self._slices[name]])
+        self._fill_inactive(out)
+
+    def _active_masks(self, X):
+        masks = {}
+
+        def mask(name):
+            if name not in masks:
+                dim = self.dimension(name)
+                if isinstance(dim, Conditional):
+                    parent = self.dimension(dim.parent)
+                    cols = X[:, self._slices[dim.parent]]
+                    m = parent.isin(cols, dim.values)
+                    parent_mask = mask(dim.parent)
+                    masks[name] = m if parent_mask is None else m & parent_mask
+                else:
+                    masks[name] = None
+            return masks[name]
+
+        for name in self.names:
+            mask(name)
+        return masks
+
+    def _fill_inactive(self, X):
+        masks = self._active_masks(X)
+        for name, dim in self.dimensions:
+            m = masks[name]
+            if m is not None:
+                X[~m, self._slices[name]] = dim.bounds[:, 0]
+        return X
+
+    def dimension(self, name):
+        """returns the dimension called `name`"""
+        return self.dimensions[self.names.index(name)][1]
+
+    def to_dicts(self, X):
+        """
+        Decode the rows of an encoded array into a list of dicts.
+        The inactive conditional dimensions are not included in the dicts.
+        """
+        X = np.atleast_2d(X)
+        masks = self._active_masks(X)
+        columns = [
+            (name, dim.decode(X[:, self._slices[name]]).tolist(), masks[name])
+            for name, dim in self.dimensions
+        ]
+        return [
+            {name: values[i] for name, values, m in columns if m is None or m[i]}
+            for i in range(len(X))
+        ]
+
+    def from_dicts(self, dlist, out=None):
+        """
+        Encode a list of dicts into a 2D numpy array of
+        shape (len(dlist), n_columns).
+        """
+        out = _check_out(out, len(dlist), self.n_columns)
+        for name, dim in self.dimensions:
+            sl = self._slices[name]
+            present = np.array([name in d for d in dlist], dtype=bool)
+            if present.all():
+                dim.encode([d[name] for d in dlist], out=out[:, sl])
+            else:
+                out[:, sl] = dim.bounds[:, 0]
+                if present.any():
+                    values = [d[name] for d in dlist if name in d]
+                    out[present, sl] = dim.encode(values)
+        return out
+
+    def fit(self, X, y=None):
+        # the encoding is fixed by the dimensions, there is nothing to learn,
+        # `fit` and `partial_fit` are only here so that a space can be used
+        # as the `transform_X` of `fluentopt.transformers.Wrapper`
+        return self
+
+    def partial_fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        """
+        Encode `X` into a 2D numpy array.
+        `X` can be a list of dicts, a single dict, or an already encoded array.
+        """
+        if isinstance(X, np.ndarray):
+            return np.atleast_2d(X.astype(float))
+        if isinstance(X, dict):
+            X = [X]
+        return self.from_dicts(X)
+
+    def encode(self, values, out=None):
+        return self.from_dicts(values, out=out)
+
+    def decode(self, X):
+        values = np.empty(len(X), dtype=object)
+        values[:] = self.to_dicts(X)
+        return values
+
+    def project(self, X):
+        X = np.array(X, dtype=float)
+        for name, dim in self.dimensions:
+            sl = self._slices[name]
+            X[:, sl] = dim.project(X[:, sl])
+        return self._fill_inactive(X)
+
+    def isin(self, X, values):
+        raise NotImplementedError("A Space can not be the parent of a Conditional")
+
+    @property
+    def bounds(self):
+        return np.concatenate([dim.bounds for _, dim in self.dimensions], axis=0)
+
+
+def _check_out(out, n, n_columns):
+    if out is None:
+        out = np.empty((n, n_columns))
+    assert out.shape == (n, n_columns), "out should have shape {}".format(
+        (n, n_columns)
+    )
+    return out
+
+
+def _check_numpy_rng(rng):
+    # samplers receive a `random.Random` instance (see `utils.check_random_state`),
+    # use it to seed a numpy random state
+    if isinstance(rng, np.random.RandomState):
+        return rng
+    return np.random.RandomState(rng.randint(0, 2 ** 31 - 1))
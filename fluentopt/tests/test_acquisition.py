@@ -0,0 +1,105 @@
+import pytest
+
+import numpy as np
+
+from fluentopt import BayesianOptimizer
+from fluentopt import acquisition
+from fluentopt.acquisition import expected_improvement
+from fluentopt.acquisition import log_expected_improvement
+from fluentopt.space import Space
+from fluentopt.space import Real
+
+scores_with_grad = [
+    acquisition.ucb_maximize,
+    acquisition.ucb_minimize,
+    acquisition.ei_maximize,
+    acquisition.ei_minimize,
+    acquisition.log_ei_maximize,
+    acquisition.log_ei_minimize,
+    acquisition.pi_maximize,
+    acquisition.pi_minimize,
+]
+
+scores = scores_with_grad + [
+    acquisition.thompson_maximize,
+    acquisition.thompson_minimize,
+    acquisition.knowledge_gradient_maximize,
+    acquisition.knowledge_gradient_minimize,
+    acquisition.mes_maximize,
+    acquisition.mes_minimize,
+]
+
+
+def _fitted_optimizer(score=acquisition.ei_maximize):
+    space = Space({"x": Real(-2, 2), "y": Real(-2, 2)})
+    rng = np.random.RandomState(0)
+    xlist = space.to_dicts(space.sample(rng, 10))
+    ylist = [np.sin(2 * d["x"]) + np.cos(3 * d["y"]) for d in xlist]
+    opt = BayesianOptimizer(space, score=score, random_state=42)
+    opt.update_many(xlist, ylist)
+    return opt, space
+
+
+def test_log_expected_improvement():
+    mu = np.array([0.0, -1.0, -5.0, -40.0, -1e8])
+    std = np.ones(len(mu))
+    ei = expected_improvement(mu, std, 0.0)
+    log_ei = log_expected_improvement(mu, std, 0.0)
+    assert np.all(np.isfinite(log_ei))
+    assert np.all(np.diff(log_ei) < 0)
+    assert np.allclose(log_ei[:3], np.log(ei[:3]))
+    # ei underflows to 0 far from the incumbent
+    assert ei[-1] == 0
+    assert np.allclose(
+        log_expected_improvement(-mu, std, 0.0, maximize=False), log_ei
+    )
+
+
+@pytest.mark.parametrize("score", scores_with_grad)
+def test_gradients(score):
+    opt, space = _fitted_optimizer()
+    X = space.sample(np.random.RandomState(1), 5)
+    values, grad = score(opt, X, return_grad=True)
+    assert np.allclose(values, score(opt, X))
+    eps = 1e-6
+    for j in range(X.shape[1]):
+        dX = np.zeros_like(X)
+        dX[:, j] = eps
+        num_grad = (score(opt, X + dX) - score(opt, X - dX)) / (2 * eps)
+        assert np.allclose(grad[:, j], num_grad, rtol=1e-3, atol=1e-5)
+
+
+@pytest.mark.parametrize("score", scores)
+def test_scores(score):
+    opt, space = _fitted_optimizer(score=score)
+    X = space.sample(np.random.RandomState(1), 50)
+    values = score(opt, X)
+    assert values.shape == (50,)
+    assert np.all(np.isfinite(values))
+    x = opt.suggest()
+    assert set(x.keys()) == set(["x", "y"])
+
+
+def test_minimize():
+    def feval(x):
+        return (x - 0.3) ** 2
+
+    opt = BayesianOptimizer(
+        lambda rng: rng.uniform(-1, 1),
+        score=acquisition.ei_minimize,
+        maximize=False,
+        random_state=42,
+    )
+    for _ in range(15):
+        x = opt.suggest()
+        opt.update(x=x, y=feval(x))
+    assert min(opt.output_history_) < 1e-2
+
+
+def test_incumbent_is_cached():
+    opt, _ = _fitted_optimizer()
+    outputs = opt.output_history_
+    assert acquisition.best_output(opt) == max(outputs)
+    assert acquisition.best_output(opt, maximize=False) == min(outputs)
+    opt.update_many([{"x": 0.0, "y": 1.0}], [-10.0])
+    assert acquisition.best_output(opt, maximize=False) == -10.0
@@ -0,0 +1,362 @@
+import pytest
+
+import numpy as np
+
+from fluentopt import BayesianOptimizer
+from fluentopt import RandomSearch
+from fluentopt.acquisition import best_output
+from fluentopt.bayesianoptimizer import local_penalization
+from fluentopt.bayesianoptimizer import TrustRegion
+from fluentopt.bayesianoptimizer import ucb
+from fluentopt.bayesianoptimizer import ei
+from fluentopt.space import Space
+from fluentopt.space import Real
+
+
+def unif_sampler(rng):
+    return rng.uniform(-1, 1)
+
+
+def feval(x):
+    return -(x ** 2)
+
+
+@pytest.mark.parametrize("optimizer_cls", [RandomSearch, BayesianOptimizer])
+def test_suggest_many(optimizer_cls):
+    opt = optimizer_cls(unif_sampler, random_state=42)
+    xlist = opt.suggest_many(5)
+    assert len(xlist) == 5
+    opt.update_many(xlist, [feval(x) for x in xlist])
+    xlist = opt.suggest_many(8)
+    assert len(xlist) == 8
+    assert len(set(xlist)) == 8
+
+
+def test_default_model_long_run():
+    # the warm start of the hyper-parameters must not crash once the
+    # kernel matrix of the previous hyper-parameters is not positive definite
+    opt = BayesianOptimizer(unif_sampler, random_state=0)
+    for _ in range(100):
+        x = opt.suggest()
+        opt.update(x=x, y=feval(x))
+    assert len(opt.output_history_) == 100
+    assert best_output(opt, maximize=True) > -1e-2
+
+
+def test_suggest_many_is_diverse():
+    opt = BayesianOptimizer(unif_sampler, score=ucb, nb_suggestions=200, random_state=42)
+    xlist = [-0.8, -0.3, 0.1, 0.5, 0.9]
+    opt.update_many(xlist, [feval(x) for x in xlist])
+    batch = np.array(opt.suggest_many(4))
+    dist = np.abs(batch[:, np.newaxis] - batch[np.newaxis, :])
+    dist = dist[~np.eye(len(batch), dtype=bool)]
+    assert dist.min() > 0.05
+
+
+def test_local_penalization():
+    X = np.array([[0.0], [0.01], [1.0]])
+    scores = [1.0, 0.99, 0.5]
+    assert local_penalization(X, scores, 2) == [0, 2]
+    assert local_penalization(X, scores, 5) == [0, 2, 1]
+
+
+class _CountingModel(object):
+    def __init__(self):
+        self.nb_fit = 0
+        self.nb_partial_fit = 0
+
+    def fit(self, X, y):
+        self.nb_fit += 1
+
+    def partial_fit(self, X, y):
+        self.nb_partial_fit += 1
+
+    def predict(self, X, return_std=False):
+        mean = np.zeros(len(X))
+        return (mean, np.ones(len(X))) if return_std else mean
+
+
+def test_lazy():
+    model = _CountingModel()
+    opt = BayesianOptimizer(unif_sampler, model=model, lazy=True)
+    for x in [0.1, 0.2, 0.3]:
+        opt.update(x=x, y=feval(x))
+    assert model.nb_fit == 0
+    opt.suggest()
+    opt.suggest()
+    assert model.nb_fit == 1
+    opt.update(x=0.4, y=feval(0.4))
+    opt.suggest()
+    assert model.nb_fit == 1
+    assert model.nb_partial_fit == 1
+
+
+def test_refit_every():
+    model = _CountingModel()
+    opt = BayesianOptimizer(unif_sampler, model=model, refit_every=3)
+    for x in [0.1, 0.2, 0.3]:
+        opt.update(x=x, y=feval(x))
+    assert model.nb_fit == 1
+    assert model.nb_partial_fit == 0
+    opt.update(x=0.4, y=feval(0.4))
+    assert model.nb_partial_fit == 1
+    opt.update_many([0.5, 0.6], [feval(0.5), feval(0.6)])
+    assert model.nb_partial_fit == 1
+    opt.suggest()
+    assert model.nb_partial_fit == 1
+    opt.fit_model(force=True)
+    assert model.nb_partial_fit == 2
+
+
+def array_batch_sampler(rng, n):
+    return rng.uniform(-1, 1, size=(n, 2))
+
+
+def dict_batch_sampler(rng, n):
+    return {"a": rng.uniform(-1, 1, size=n), "b": rng.uniform(-1, 1, size=n)}
+
+
+def test_batch_sampler_array():
+    opt = BayesianOptimizer(None, batch_sampler=array_batch_sampler, random_state=42)
+    for _ in range(5):
+        x = opt.suggest()
+        assert x.shape == (2,)
+        opt.update(x=x, y=-(x ** 2).sum())
+    xlist = opt.suggest_many(3)
+    assert len(xlist) == 3
+    assert all(x.shape == (2,) for x in xlist)
+
+
+def test_batch_sampler_dict():
+    opt = BayesianOptimizer(
+        None, batch_sampler=dict_batch_sampler, nb_suggestions=1000, random_state=42
+    )
+    for _ in range(5):
+        x = opt.suggest()
+        assert set(x.keys()) == set(["a", "b"])
+        assert isinstance(x["a"], float)
+        opt.update(x=x, y=-x["a"] ** 2 - x["b"] ** 2)
+
+
+def test_sampler_or_batch_sampler_required():
+    pytest.raises(AssertionError, BayesianOptimizer, None)
+
+
+@pytest.mark.parametrize("score", [ei, ucb])
+def test_local_search(score):
+    space = Space({"x": Real(-2, 2), "y": Real(-2, 2)})
+    rng = np.random.RandomState(0)
+    xlist = space.to_dicts(space.sample(rng, 10))
+    ylist = [-d["x"] ** 2 - (d["y"] - 1) ** 2 for d in xlist]
+    suggestions = []
+    for nb_local_search in (0, 5):
+        opt = BayesianOptimizer(
+            space,
+            score=score,
+            nb_suggestions=20,
+            nb_local_search=nb_local_search,
+            random_state=42,
+        )
+        opt.update_many(xlist, ylist)
+        suggestions.append(opt.suggest())
+    s_random, s_refined = opt.get_scores(suggestions)
+    assert s_refined >= s_random
+    assert all(-2 <= v <= 2 for v in suggestions[1].values())
+    assert len(opt.suggest_many(3)) == 3
+
+
+def test_local_search_scalars():
+    opt = BayesianOptimizer(unif_sampler, nb_local_search=3, random_state=42)
+    xlist = [-0.8, -0.3, 0.1, 0.5, 0.9]
+    opt.update_many(xlist, [feval(x) for x in xlist])
+    x = opt.suggest()
+    assert isinstance(x, float)
+    assert -1 <= x <= 1
+
+
+class _GPWithoutGradient(object):
+    # a model which is not a `Wrapper` and has no `predict_gradient`
+    def __init__(self):
+        from sklearn.gaussian_process import GaussianProcessRegressor
+
+        self.gp = GaussianProcessRegressor(normalize_y=True)
+
+    def fit(self, X, y):
+        self.gp.fit(np.asarray(X, dtype=float).reshape((len(X), -1)), y)
+
+    def predict(self, X, return_std=False):
+        X = np.asarray(X, dtype=float).reshape((len(X), -1))
+        return self.gp.predict(X, return_std=return_std)
+
+
+def test_local_search_without_gradient():
+    opt = BayesianOptimizer(
+        unif_sampler, model=_GPWithoutGradient(), nb_local_search=3, random_state=42
+    )
+    xlist = [-0.8, -0.3, 0.1, 0.5, 0.9]
+    opt.update_many(xlist, [feval(x) for x in xlist])
+    x = opt.suggest()
+    assert -1 <= x <= 1
+
+
+def test_trust_region():
+    d = 20
+    space = Space([("x{}".format(i), Real(-1, 1)) for i in range(d)])
+
+    def feval(x):
+        return -sum((x["x{}".format(i)] - 0.3) ** 2 for i in range(d))
+
+    tr = TrustRegion()
+    opt = BayesianOptimizer(space, score=ucb, trust_region=tr, random_state=42)
+    rs = RandomSearch(space, random_state=42)
+    for o in (opt, rs):
+        for _ in range(60):
+            x = o.suggest()
+            o.update(x, feval(x))
+    assert max(opt.output_history_) > max(rs.output_history_)
+    # the model is only fitted on the evaluations around the best input
+    assert len(opt.model.X_) < 60
+    bounds = tr.bounds(opt)
+    x = opt.suggest()
+    X = space.transform(x)[0]
+    assert np.all((X >= bounds[:, 0] - 1e-8) & (X <= bounds[:, 1] + 1e-8))
+
+
+def test_trust_region_minimize():
+    d = 10
+    space = Space([("x{}".format(i), Real(-1, 1)) for i in range(d)])
+
+    def feval(x):
+        return sum((x["x{}".format(i)] - 0.3) ** 2 for i in range(d))
+
+    tr = TrustRegion()
+    opt = BayesianOptimizer(space, trust_region=tr, maximize=False, random_state=42)
+    rs = RandomSearch(space, random_state=42)
+    for o in (opt, rs):
+        for _ in range(40):
+            x = o.suggest()
+            o.update(x, feval(x))
+    assert min(opt.output_history_) < min(rs.output_history_)
+    # the region is centered on the input with the lowest output
+    best = int(np.argmin(opt.output_history_))
+    tr.bounds(opt)
+    assert np.allclose(tr.center_ * 2 - 1, space.transform(opt.input_history_[best])[0])
+    assert best_output(opt, maximize=False) == min(opt.output_history_)
+
+
+def test_trust_region_refit_every():
+    space = Space({"x": Real(-1, 1)})
+    model = _CountingModel()
+    tr = TrustRegion(nb_init=2, min_points=2)
+    opt = BayesianOptimizer(space, model=model, trust_region=tr, refit_every=3)
+    opt.update_many([{"x": 0.1}, {"x": 0.2}], [0.0, 1.0])
+    assert model.nb_fit == 1
+    # the region keeps its size after a single failure
+    opt.update({"x": 0.3}, 0.0)
+    opt.update({"x": 0.4}, 0.0)
+    assert model.nb_fit == 1
+    opt.update({"x": 0.5}, 0.0)
+    assert model.nb_fit == 2
+    opt.fit_model(force=True)
+    assert model.nb_fit == 3
+
+
+def test_trust_region_restart():
+    space = Space({"x": Real(-1, 1)})
+    tr = TrustRegion(
+        length=0.8, min_length=0.3, failure_tolerance=1, min_points=2, nb_init=2
+    )
+    opt = BayesianOptimizer(space, score=ucb, trust_region=tr, random_state=42)
+    opt.update_many([{"x": 0.0}], [1.0])
+    assert tr.length_ == 0.8
+    assert not tr.is_active(opt)
+    opt.update_many(opt.suggest_many(2), [0.0, 0.0])
+    assert tr.length_ == 0.4
+    opt.update(opt.suggest(), 0.0)
+    # the region is smaller than min_length, the search restarts
+    assert tr.nb_restarts_ == 1
+    assert tr.length_ == 0.8
+    assert tr.start_ == 4
+    assert not tr.is_active(opt)
+    opt.update(opt.suggest(), 0.5)
+    # a single evaluation of the new run is not enough
+    assert not tr.is_active(opt)
+    opt.update(opt.suggest(), 0.25)
+    assert tr.is_active(opt)
+    # the second evaluation is a failure
+    assert tr.length_ == 0.4
+    assert np.isclose(tr.bounds(opt)[0, 1], min(opt.input_history_[-2]["x"] + 0.4, 1))
+    # the incumbent of the scores is the one of the run
+    assert best_output(opt) == 0.5
+
+
+def test_trust_region_encoding_cache():
+    from fluentopt.history import MemoryHistory
+
+    space = Space({"x": Real(-1, 1), "y": Real(0, 10)})
+    tr = TrustRegion(nb_init=3)
+    opt = BayesianOptimizer(space, trust_region=tr, history=MemoryHistory(), random_state=42)
+    for _ in range(6):
+        x = opt.suggest()
+        opt.update(x, -x["x"] ** 2)
+    X = tr._rescaled_history(opt)
+    assert len(tr._encoded) == 6
+    expected = (space.transform(opt.input_history_) - space.bounds[:, 0]) / (
+        space.bounds[:, 1] - space.bounds[:, 0]
+    )
+    assert np.allclose(X, expected)
+
+
+def test_trust_region_needs_space():
+    with pytest.raises(AssertionError):
+        BayesianOptimizer(lambda rng: rng.uniform(-1, 1), trust_region=TrustRegion())
+
+
+def test_thompson_batch():
+    space = Space({"x": Real(-1, 1), "y": Real(-1, 1)})
+    opt = BayesianOptimizer(
+        space, batch_strategy="thompson", nb_suggestions=500, random_state=42
+    )
+    for _ in range(6):
+        batch = opt.suggest_many(5)
+        assert len(batch) == 5
+        assert len(set((d["x"], d["y"]) for d in batch)) == 5
+        opt.update_many(batch, [-d["x"] ** 2 - (d["y"] - 0.5) ** 2 for d in batch])
+    assert max(opt.output_history_) > -0.05
+
+
+def test_thompson_batch_minimize_and_pending():
+    space = Space({"x": Real(-1, 1), "y": Real(-1, 1)})
+    opt = BayesianOptimizer(
+        space,
+        batch_strategy="thompson",
+        maximize=False,
+        nb_suggestions=500,
+        random_state=42,
+    )
+    for _ in range(6):
+        batch = opt.suggest_many(5)
+        opt.update_many(batch, [d["x"] ** 2 + (d["y"] - 0.5) ** 2 for d in batch])
+    assert min(opt.output_history_) < 0.05
+    x = opt.suggest_many(1)[0]
+    opt.add_pending(x)
+    for d in opt.suggest_many(5):
+        assert (d["x"] - x["x"]) ** 2 + (d["y"] - x["y"]) ** 2 > 0.05 ** 2
+
+
+def test_sample_functions():
+    from fluentopt.models import IncrementalGaussianProcessRegressor
+
+    rng = np.random.RandomState(0)
+    X = rng.uniform(-1, 1, size=(20, 2))
+    y = np.sin(3 * X[:, 0]) + X[:, 1]
+    gp = IncrementalGaussianProcessRegressor().fit(X, y)
+    X_test = rng.uniform(-1, 1, size=(50, 2))
+    functions = gp.sample_functions(500, nb_features=2000, random_state=0)
+    values = functions(X_test)
+    assert values.shape == (500, 50)
+    mu, std = gp.predict(X_test, return_std=True)
+    assert np.allclose(values.mean(axis=0), mu, atol=0.1)
+    assert np.allclose(values.std(axis=0), std, atol=0.1)
+    # the functions interpolate the training set
+    assert np.allclose(functions(X), y, atol=1e-2)
@@ -0,0 +1,87 @@
+import csv
+import json
+
+import pytest
+
+import numpy as np
+
+from fluentopt.benchmarks import Ackley
+from fluentopt.benchmarks import Branin
+from fluentopt.benchmarks import Hartmann
+from fluentopt.benchmarks import Levy
+from fluentopt.benchmarks import Rosenbrock
+from fluentopt.benchmarks import curves_to_csv
+from fluentopt.benchmarks import run_benchmark
+from fluentopt.benchmarks import run_one
+from fluentopt.benchmarks import to_csv
+from fluentopt.benchmarks import to_json
+
+functions = [
+    Branin(),
+    Hartmann(3),
+    Hartmann(6),
+    Rosenbrock(4),
+    Ackley(3),
+    Levy(5),
+]
+
+
+@pytest.mark.parametrize("function", functions)
+def test_functions(function):
+    assert np.isclose(function(function.argmin), function.optimum, atol=1e-4)
+    X = function.space.sample(np.random.RandomState(0), 20)
+    y = function(X)
+    assert y.shape == (20,)
+    assert np.all(y >= function.optimum - 1e-6)
+    assert np.allclose(y, [function(x) for x in X])
+    x = function.space.to_dicts(X[:1])[0]
+    assert np.isclose(function(x), y[0])
+
+
+def test_noisy_function():
+    function = Branin(noise_std=1.0, random_state=0)
+    x = function.argmin
+    y = [function(x) for _ in range(100)]
+    assert np.std(y) > 0.5
+    assert np.isclose(function.regret(x), 0, atol=1e-6)
+
+
+def test_run_one():
+    result = run_one("random_search", Branin(noise_std=0.1), 0, 20, track_memory=True)
+    curve = result["regret_curve"]
+    assert len(curve) == 20
+    assert np.all(np.diff(curve) <= 0)
+    assert result["regret"] == curve[-1]
+    assert result["peak_memory"] > 0
+    assert np.isclose(result["overhead"], result["suggest_time"] + result["update_time"])
+    assert result["duration"] >= result["overhead"] + result["eval_time"]
+
+
+def test_run_benchmark(tmpdir):
+    results = run_benchmark(
+        ["random_search", "cmaes"], ["branin", Levy(2)], seeds=[0, 1], budget=10, nb_workers=2
+    )
+    assert len(results) == 8
+    assert set((r["func"], r["algo"]) for r in results) == set(
+        (f, a) for f in ("branin", "levy") for a in ("random_search", "cmaes")
+    )
+    # same results with and without the process pool
+    sequential = run_benchmark(["cmaes"], ["branin"], seeds=[0], budget=10)
+    assert sequential[0]["regret_curve"] == results[2]["regret_curve"]
+
+    path = str(tmpdir.join("results.csv"))
+    to_csv(results, path)
+    with open(path) as fd:
+        rows = list(csv.DictReader(fd))
+    assert len(rows) == 8
+    assert float(rows[0]["regret"]) == results[0]["regret"]
+
+    path = str(tmpdir.join("curves.csv"))
+    curves_to_csv(results, path)
+    with open(path) as fd:
+        assert len(list(csv.DictReader(fd))) == 80
+
+    path = str(tmpdir.join("results.json"))
+    to_json(results, path)
+    with open(path) as fd:
+        assert json.load(fd) == results
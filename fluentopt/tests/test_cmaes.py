@@ -0,0 +1,75 @@
+import numpy as np
+
+import pytest
+
+from fluentopt.cmaes import CMAES
+from fluentopt.space import Space
+from fluentopt.space import Real
+from fluentopt.space import Categorical
+
+
+def sphere(x):
+    return float(((np.asarray(x) - 0.5) ** 2).sum())
+
+
+def ellipsoid(x):
+    x = np.asarray(x)
+    return float((10 ** (3 * np.arange(len(x)) / (len(x) - 1)) * x ** 2).sum())
+
+
+def _minimize(opt, feval, nb_generations):
+    for _ in range(nb_generations):
+        xlist = opt.suggest_many(opt.popsize)
+        opt.update_many(xlist, [feval(x) for x in xlist])
+    return min(opt.output_history_)
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_cmaes_sphere(diagonal):
+    opt = CMAES(np.zeros(10), sigma0=0.5, diagonal=diagonal, random_state=42)
+    assert opt.popsize == 10
+    assert _minimize(opt, sphere, 150) < 1e-8
+    assert opt.generation_ == 150
+    assert np.allclose(opt.mean_, 0.5, atol=1e-3)
+
+
+def test_cmaes_ellipsoid():
+    opt = CMAES(np.ones(5), sigma0=0.5, random_state=42)
+    assert _minimize(opt, ellipsoid, 150) < 1e-8
+
+
+def test_cmaes_maximize_and_bounds():
+    opt = CMAES(
+        np.zeros(3), bounds=[[-1, 0.2]] * 3, maximize=True, random_state=42
+    )
+    _minimize(opt, lambda x: -sphere(x), 60)
+    assert np.all(np.array(opt.input_history_) <= 0.2)
+    assert np.allclose(opt.mean_, 0.2, atol=1e-2)
+
+
+def test_cmaes_out_of_order_updates():
+    opt = CMAES(np.zeros(2), popsize=4, random_state=42)
+    xlist = opt.suggest_many(6)
+    # results come back in any order, the first 4 update the distribution
+    opt.update_many(xlist[::-1][:3], [sphere(x) for x in xlist[::-1][:3]])
+    assert opt.generation_ == 0
+    opt.update(xlist[0], sphere(xlist[0]))
+    assert opt.generation_ == 1
+    # the results of the old population only go to the history
+    opt.update(xlist[1], sphere(xlist[1]))
+    opt.update(np.ones(2), 1.0)
+    assert opt.generation_ == 1
+    assert len(opt.output_history_) == 6
+
+
+def test_cmaes_space():
+    space = Space({"x": Real(-5, 5), "y": Real(-5, 5), "c": Categorical(["a", "b"])})
+
+    def feval(d):
+        return (d["x"] - 1) ** 2 + (d["y"] + 2) ** 2 + (0 if d["c"] == "b" else 1)
+
+    opt = CMAES(space, random_state=42)
+    _minimize(opt, feval, 60)
+    best = opt.input_history_[int(np.argmin(opt.output_history_))]
+    assert best["c"] == "b"
+    assert abs(best["x"] - 1) < 0.05 and abs(best["y"] + 2) < 0.05
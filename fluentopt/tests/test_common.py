@@ -10,7 +10,7 @@ from fluentopt.bandit import ucb_maximize
 
 opts = [
     RandomSearch,
-    partial(Bandit, score=ucb_minimize),
+    partial(Bandit, score=ucb_minimize, maximize=False),
     partial(Bandit, score=ucb_maximize),
 ]
 
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from fluentopt import BayesianOptimizer
+from fluentopt import RandomSearch
+from fluentopt.history import Column
+from fluentopt.history import MemoryHistory
+from fluentopt.history import SQLiteHistory
+
+
+def unif_sampler(rng):
+    return rng.uniform(-1, 1)
+
+
+def test_memory_history():
+    history = MemoryHistory()
+    history.extend([1, 2], [3, 4])
+    assert history.inputs == [1, 2]
+    assert history.outputs == [3, 4]
+    assert len(history) == 2
+
+
+def test_column():
+    col = Column([1, 2])
+    col.append(3.5)
+    col.extend(y for y in [4, 5])
+    col.extend(np.arange(2))
+    assert len(col) == 7
+    assert col == [1, 2, 3.5, 4, 5, 0, 1]
+    assert col[2] == 3.5 and isinstance(col[2], float)
+    assert col[np.int64(-1)] == 1
+    assert col[1:3] == [2, 3.5]
+    assert list(col) == col.tolist()
+    assert np.asarray(col).dtype == float
+    assert np.argmax(col) == 4
+
+
+def test_memory_history_encoder():
+    from fluentopt.space import Real, Space
+
+    space = Space({"a": Real(0, 1), "b": Real(2, 3)})
+    history = MemoryHistory(encoder=space)
+    xlist = [{"a": 0.1, "b": 2.5}, {"a": 0.2, "b": 2.1}]
+    history.extend(xlist, [1, 2])
+    history.extend(xlist[:1], [3])
+    assert history.encoded_inputs.shape == (3, 2)
+    assert np.allclose(history.encoded_inputs, space.transform(xlist + xlist[:1]))
+    assert MemoryHistory().encoded_inputs is None
+
+
+def test_bulk_update_many():
+    opt = RandomSearch(sampler=unif_sampler)
+    xlist = np.random.uniform(size=10000)
+    ylist = xlist ** 2
+    opt.update_many(xlist, ylist)
+    assert len(opt.output_history_) == 10000
+    assert np.allclose(opt.output_history_, ylist)
+    for ylist in ([None], ["a"], [[1, 2]]):
+        with pytest.raises(AssertionError):
+            opt.update_many([0.5], ylist)
+    with pytest.raises(AssertionError):
+        opt.update_many(["a"], [1])
+    assert len(opt.output_history_) == 10000
+
+
+def test_sqlite_history(tmpdir):
+    path = str(tmpdir.join("history.db"))
+    history = SQLiteHistory(path)
+    history.extend([{"a": 1}, {"a": 2}], [3, 4])
+    history.extend([{"a": np.array([1, 2])}], [5.5])
+    assert len(history) == 3
+    history.close()
+
+    history = SQLiteHistory(path)
+    assert history.inputs[:2] == [{"a": 1}, {"a": 2}]
+    assert np.all(history.inputs[2]["a"] == np.array([1, 2]))
+    assert history.outputs == [3, 4, 5.5]
+
+
+def test_sqlite_history_shared(tmpdir):
+    path = str(tmpdir.join("history.db"))
+    first = SQLiteHistory(path)
+    second = SQLiteHistory(path)
+    first.extend([1], [2])
+    second.extend([3], [4])
+    assert second.inputs == [1, 3]
+    assert first.refresh() == 1
+    assert first.inputs == [1, 3]
+
+
+def test_warm_start(tmpdir):
+    path = str(tmpdir.join("history.db"))
+    opt = RandomSearch(unif_sampler, history=SQLiteHistory(path))
+    opt.update_many([0.1, 0.2, 0.3], [1, 2, 3])
+
+    opt = BayesianOptimizer(unif_sampler, history=SQLiteHistory(path), lazy=True)
+    assert opt.input_history_ == [0.1, 0.2, 0.3]
+    opt.suggest()
+    assert len(opt.model.X_) == 3
+    opt.update(x=0.4, y=4)
+    opt.suggest()
+    assert len(opt.model.X_) == 4
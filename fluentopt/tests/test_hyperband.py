@@ -0,0 +1,137 @@
+import pytest
+
+import numpy as np
+
+from fluentopt.hyperband import hyperband
+from fluentopt.hyperband import bohb
+from fluentopt.hyperband import ASHA
+from fluentopt.hyperband import Hyperband
+from fluentopt.hyperband import BOHB
+from fluentopt.runner import run
+
+
+def sample(rng):
+    return {"x": rng.uniform(-1, 1)}
+
+
+def loss(budget, t):
+    # the loss decreases with the budget, good configs have small |x|
+    return t["x"] ** 2 + 1.0 / budget
+
+
+def run_batch(batch):
+    return [loss(r, t) for r, t in batch]
+
+
+def test_hyperband():
+    inputs, outputs = hyperband(sample, run_batch, max_iter=27, eta=3, random_state=42)
+    assert len(inputs) == len(outputs)
+    budgets = set(r for r, _ in inputs)
+    assert max(budgets) == 27
+
+
+def test_asha():
+    opt = ASHA(sample, max_iter=27, eta=3, random_state=42)
+    assert opt.budgets_ == [[1, 3, 9, 27]]
+    run(opt, lambda x: loss(*x), nb_evaluations=100, nb_workers=4)
+    assert len(opt.input_history_) == 100
+    top = opt.rungs_[0][-1]
+    assert len(top) > 0
+    # only the promoted configurations reach the higher rungs
+    for k in range(1, 4):
+        ids = set(i for i, _ in opt.rungs_[0][k])
+        assert ids <= set(i for i, _ in opt.rungs_[0][k - 1])
+    best = min(top, key=lambda r: r[1])[0]
+    assert abs(opt.configs_[best]["x"]) < 0.3
+
+
+def test_asha_brackets():
+    opt = ASHA(sample, max_iter=9, eta=3, nb_brackets=2, random_state=42)
+    assert opt.budgets_ == [[1, 3, 9], [3, 9]]
+    jobs = [opt.suggest() for _ in range(4)]
+    assert [r for r, _ in jobs] == [1, 3, 1, 3]
+    opt.update_many(jobs, [loss(r, t) for r, t in jobs])
+    assert [len(rung) for rung in opt.rungs_[0]] == [2, 0, 0]
+
+
+def test_asha_equal_configs():
+    # equal configurations are different trials
+    opt = ASHA(lambda rng: {"x": 0.5}, max_iter=9, eta=3, random_state=42)
+    jobs = [opt.suggest() for _ in range(3)]
+    opt.update_many(jobs, [3.0, 1.0, 2.0])
+    assert sorted(opt.rungs_[0][0]) == [(0, 3.0), (1, 1.0), (2, 2.0)]
+    r, t = opt.suggest()
+    assert r == 3 and t is jobs[1][1]
+
+
+class _RecordingBOHB(BOHB):
+    # records the configurations suggested by the surrogate in each bracket
+    def sample_bracket(self, n):
+        T = super(_RecordingBOHB, self).sample_bracket(n)
+        if self.input_history_:
+            nb_random = int(np.ceil(n * self.random_fraction))
+            self.model_configs_.append(T[nb_random:])
+        return T
+
+
+def test_bohb():
+    inputs, outputs = bohb(sample, run_batch, max_iter=27, eta=3, random_state=42)
+    ref_inputs, _ = hyperband(sample, run_batch, max_iter=27, eta=3, random_state=42)
+    assert len(inputs) == len(ref_inputs)
+    assert [r for r, _ in inputs] == [r for r, _ in ref_inputs]
+    # the brackets after the first one are sampled with the surrogate, its
+    # best configuration is close to the optimum (|x| is uniform in [0, 1]
+    # for the random configurations)
+    opt = _RecordingBOHB(sample, max_iter=27, eta=3, min_points=20, random_state=42)
+    opt.model_configs_ = []
+    opt.run(run_batch)
+    assert len(opt.model_configs_) == 3
+    assert all(abs(T[0]["x"]) < 0.05 for T in opt.model_configs_)
+
+
+def test_bohb_sample_bracket():
+    opt = BOHB(sample, random_fraction=0.0, min_points=5, random_state=42)
+    configs = [sample(opt.rng) for _ in range(30)]
+    opt.input_history_ = [(9, t) for t in configs] + [(27, t) for t in configs[:3]]
+    opt.output_history_ = [loss(r, t) for r, t in opt.input_history_]
+    T = opt.sample_bracket(6)
+    assert len(T) == 6
+    # the first configuration of the batch is the best according to the model
+    assert abs(T[0]["x"]) < 0.1
+
+
+def test_resumable(tmpdir):
+    def run_batch(batch):
+        values = []
+        for r, t, trial in batch:
+            # continue the "training" from the previous budget
+            assert trial.budget < r
+            trial.state = (trial.state or 0) + (r - trial.budget)
+            assert trial.state == r
+            values.append(loss(r, t))
+        return values
+
+    ref = Hyperband(sample, max_iter=27, random_state=42, resumable=True).run(run_batch)
+
+    class Crash(Exception):
+        pass
+
+    calls = []
+
+    def crashing_run_batch(batch):
+        calls.append(1)
+        if len(calls) == 5:
+            raise Crash()
+        return run_batch(batch)
+
+    path = str(tmpdir.join("hyperband.pkl"))
+    opt = Hyperband(
+        sample, max_iter=27, random_state=42, checkpoint=path, resumable=True
+    )
+    with pytest.raises(Crash):
+        opt.run(crashing_run_batch)
+    opt = Hyperband(
+        sample, max_iter=27, random_state=42, checkpoint=path, resumable=True
+    )
+    assert len(opt.input_history_) > 0
+    assert opt.run(crashing_run_batch) == ref
@@ -0,0 +1,248 @@
+import numpy as np
+
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel
+from sklearn.gaussian_process.kernels import RBF
+from sklearn.gaussian_process.kernels import WhiteKernel
+
+from fluentopt.models import IncrementalGaussianProcessRegressor
+from fluentopt.models import SparseGaussianProcessRegressor
+from fluentopt.transformers import Wrapper
+from fluentopt.utils import RandomForestRegressorWithUncertainty
+
+
+def _data(n, random_state=0):
+    rng = np.random.RandomState(random_state)
+    X = rng.uniform(-1, 1, size=(n, 2))
+    y = np.sin(3 * X[:, 0]) + X[:, 1] ** 2
+    return X, y
+
+
+def test_incremental_gp_partial_fit():
+    X, y = _data(30)
+    Xtest, _ = _data(10, random_state=1)
+    kernel = RBF(0.5, length_scale_bounds="fixed")
+    gp = IncrementalGaussianProcessRegressor(kernel=kernel, refit_every=None)
+    gp.fit(X[:10], y[:10])
+    gp.partial_fit(X[10:11], y[10:11])
+    gp.partial_fit(X[11:], y[11:])
+    ref = GaussianProcessRegressor(kernel=kernel, normalize_y=True).fit(X, y)
+    mean, std = gp.predict(Xtest, return_std=True)
+    mean_ref, std_ref = ref.predict(Xtest, return_std=True)
+    assert np.allclose(mean, mean_ref, atol=1e-5)
+    assert np.allclose(std, std_ref, atol=1e-5)
+
+
+def test_incremental_gp_refit_every():
+    X, y = _data(10)
+    gp = IncrementalGaussianProcessRegressor(refit_every=3)
+    gp.fit(X[:5], y[:5])
+    gp.partial_fit(X[5:7], y[5:7])
+    assert gp.nb_partial_fit_ == 2
+    gp.partial_fit(X[7:8], y[7:8])
+    assert gp.nb_partial_fit_ == 0
+    assert len(gp.X_train_) == 8
+
+
+def test_incremental_gp_freeze():
+    X, y = _data(30)
+    gp = IncrementalGaussianProcessRegressor(freeze=True, refit_every=5)
+    gp.fit(X[:10], y[:10])
+    kernel = gp.kernel_
+    for n in range(11, 15):
+        gp.fit(X[:n], y[:n])
+    assert gp.nb_optimizations_ == 1
+    assert gp.kernel_ is kernel
+    assert len(gp.X_train_) == 14
+    # same prediction as a fit with the same fixed hyper-parameters
+    ref = GaussianProcessRegressor(
+        kernel=kernel, optimizer=None, alpha=1e-10, normalize_y=True
+    ).fit(X[:14], y[:14])
+    assert np.allclose(gp.predict(X[20:]), ref.predict(X[20:]), atol=1e-5)
+    gp.fit(X[:15], y[:15])
+    assert gp.nb_optimizations_ == 2
+
+
+def test_incremental_gp_warm_start():
+    # the hyper-parameters fitted on the first points are degenerate,
+    # the next optimizations should not stay stuck at them
+    rng = np.random.RandomState(0)
+    X = rng.uniform(-3, 3, size=(30, 1))
+    y = np.sin(X[:, 0])
+    gp = IncrementalGaussianProcessRegressor()
+    for n in range(1, 31):
+        gp.fit(X[:n], y[:n])
+    assert gp.nb_optimizations_ == 30
+    ref = GaussianProcessRegressor(alpha=gp.alpha, normalize_y=True).fit(X, y)
+    ref_lml = ref.log_marginal_likelihood_value_
+    assert gp.log_marginal_likelihood_ * len(X) >= ref_lml - 1e-3 * abs(ref_lml)
+
+
+def test_incremental_gp_lml_tolerance():
+    X, y = _data(30)
+    gp = IncrementalGaussianProcessRegressor(refit_every=None, lml_tolerance=0.5)
+    gp.fit(X[:20], y[:20])
+    gp.partial_fit(X[20:22], y[20:22])
+    assert gp.nb_optimizations_ == 1
+    # outputs which are not explained by the hyper-parameters
+    gp.partial_fit(X[22:], 100 * np.random.RandomState(0).normal(size=8))
+    assert gp.nb_optimizations_ == 2
+
+
+def test_forest_partial_fit():
+    X, y = _data(30)
+    # n_estimators is the first positional parameter, as in `RandomForestRegressor`
+    reg = RandomForestRegressorWithUncertainty(20, random_state=0)
+    reg.fit(X[:20], y[:20])
+    first_tree = reg.estimators_[0]
+    reg.partial_fit(X[20:], y[20:], n_new_estimators=5, max_estimators=22)
+    assert len(reg.estimators_) == reg.nb_estimators_ == 22
+    assert first_tree not in reg.estimators_
+    # the parameters are not changed by `partial_fit`
+    assert reg.get_params()["n_estimators"] == 20
+    assert clone(reg).get_params() == reg.get_params()
+    mean, std = reg.predict(X, return_std=True)
+    assert mean.shape == std.shape == (30,)
+
+
+def test_wrapper_partial_fit():
+    model = Wrapper(IncrementalGaussianProcessRegressor(refit_every=None))
+    model.fit([1.0, 2.0], [1.0, 4.0])
+    model.partial_fit([3.0], [9.0])
+    assert model.X_ == [1.0, 2.0, 3.0]
+    assert len(model.model.X_train_) == 3
+    assert np.allclose(model.predict([3.0]), [9.0], atol=1e-3)
+
+
+def test_wrapper_without_history():
+    gp = SparseGaussianProcessRegressor(nb_inducing=3, keep_training_set=False)
+    model = Wrapper(gp, keep_history=False)
+    model.fit([1.0, 2.0], [1.0, 4.0])
+    model.partial_fit([3.0, 4.0], [9.0, 16.0])
+    assert not hasattr(model, "X_") and not hasattr(model, "Xt_")
+    assert gp.nb_train_ == 4 and gp.X_train_ is None
+    mean = model.predict([2.0])
+    assert mean.shape == (1,)
+
+
+def test_incremental_gp_predict_gradient():
+    X, y = _data(20)
+    Xtest, _ = _data(4, random_state=1)
+    gp = IncrementalGaussianProcessRegressor().fit(X, y)
+    mean, std, mean_grad, std_grad = gp.predict_gradient(Xtest)
+    eps = 1e-6
+    for j in range(X.shape[1]):
+        delta = eps * np.eye(X.shape[1])[j]
+        mean_plus, std_plus = gp.predict(Xtest + delta, return_std=True)
+        mean_minus, std_minus = gp.predict(Xtest - delta, return_std=True)
+        assert np.allclose((mean_plus - mean_minus) / (2 * eps), mean_grad[:, j], atol=1e-4)
+        assert np.allclose((std_plus - std_minus) / (2 * eps), std_grad[:, j], atol=1e-4)
+
+
+def test_incremental_gp_predict_gradient_noise():
+    # the std includes the noise of the `WhiteKernel`, as in `predict`
+    X, y = _data(20)
+    Xtest, _ = _data(4, random_state=1)
+    kernel = ConstantKernel(2.0, "fixed") * RBF(0.5, "fixed") + WhiteKernel(0.1, "fixed")
+    gp = IncrementalGaussianProcessRegressor(kernel=kernel).fit(X, y)
+    mean, std, mean_grad, std_grad = gp.predict_gradient(Xtest)
+    mean_ref, std_ref = gp.predict(Xtest, return_std=True)
+    assert np.allclose(mean, mean_ref)
+    assert np.allclose(std, std_ref)
+    eps = 1e-6
+    for j in range(X.shape[1]):
+        delta = eps * np.eye(X.shape[1])[j]
+        _, std_plus = gp.predict(Xtest + delta, return_std=True)
+        _, std_minus = gp.predict(Xtest - delta, return_std=True)
+        assert np.allclose((std_plus - std_minus) / (2 * eps), std_grad[:, j], atol=1e-4)
+
+
+def test_sparse_gp_exact():
+    # with as many inducing points as training points, it is an exact gp
+    X, y = _data(30)
+    Xtest, _ = _data(10, random_state=1)
+    kernel = RBF(0.5, length_scale_bounds="fixed")
+    gp = SparseGaussianProcessRegressor(kernel=kernel, nb_inducing=30, alpha=1e-4)
+    gp.fit(X[:10], y[:10])
+    gp.partial_fit(X[10:], y[10:])
+    assert len(gp.inducing_points_) == 30
+    ref = GaussianProcessRegressor(kernel=kernel, alpha=1e-4, normalize_y=True).fit(X, y)
+    mean, std = gp.predict(Xtest, return_std=True)
+    mean_ref, std_ref = ref.predict(Xtest, return_std=True)
+    assert np.allclose(mean, mean_ref, atol=1e-4)
+    assert np.allclose(std, std_ref, atol=1e-4)
+
+
+def test_sparse_gp_partial_fit():
+    X, y = _data(500)
+    Xtest, ytest = _data(50, random_state=1)
+    gp = SparseGaussianProcessRegressor(nb_inducing=50, random_state=0)
+    gp.fit(X[:100], y[:100])
+    gp.partial_fit(X[100:300], y[100:300])
+    gp.partial_fit(X[300:], y[300:])
+    assert gp.inducing_points_.shape == (50, 2)
+    mean, std = gp.predict(Xtest, return_std=True)
+    # the statistics updated incrementally are the ones of the whole training set
+    gp._compute_statistics()
+    assert np.allclose(gp.predict(Xtest), mean, atol=1e-4)
+    assert np.abs(mean - ytest).mean() < 0.05
+    assert std.shape == (50,)
+    assert (std >= 0).all()
+
+
+def test_sparse_gp_drop_training_set():
+    X, y = _data(300)
+    Xtest, _ = _data(20, random_state=1)
+    kernel = RBF(0.5, length_scale_bounds="fixed")
+    params = dict(kernel=kernel, nb_inducing=40, random_state=0)
+    gp = SparseGaussianProcessRegressor(keep_training_set=False, **params)
+    ref = SparseGaussianProcessRegressor(**params)
+    for model in (gp, ref):
+        model.fit(X[:20], y[:20])
+        model.partial_fit(X[20:100], y[20:100])
+        model.partial_fit(X[100:], y[100:])
+    assert gp.X_train_ is None and gp.y_train_ is None
+    assert gp.nb_train_ == 300
+    assert np.allclose(gp.inducing_points_, ref.inducing_points_)
+    mean, std = gp.predict(Xtest, return_std=True)
+    mean_ref, std_ref = ref.predict(Xtest, return_std=True)
+    assert np.allclose(mean, mean_ref)
+    assert np.allclose(std, std_ref)
+
+
+def test_forest_predict_std():
+    X, y = _data(50)
+    Xtest, _ = _data(20, random_state=1)
+    reg = RandomForestRegressorWithUncertainty(n_estimators=30, random_state=0)
+    reg.fit(X, y)
+    y_trees = np.array([tree.predict(Xtest) for tree in reg.estimators_])
+    mean, std = reg.predict(Xtest, return_std=True)
+    assert np.allclose(mean, y_trees.mean(axis=0))
+    assert np.allclose(std, y_trees.std(axis=0))
+    reg.set_params(n_jobs=3)
+    mean_par, std_par = reg.predict(Xtest, return_std=True)
+    assert np.allclose(mean_par, mean)
+    assert np.allclose(std_par, std)
+    q = reg.predict_quantiles(Xtest, [0.1, 0.5, 0.9], batch_size=7)
+    assert np.allclose(q, np.quantile(y_trees, [0.1, 0.5, 0.9], axis=0))
+
+
+def test_forest_total_uncertainty():
+    X, y = _data(50)
+    params = dict(n_estimators=10, min_samples_leaf=5, random_state=0)
+    reg = RandomForestRegressorWithUncertainty(**params).fit(X, y)
+    reg_total = RandomForestRegressorWithUncertainty(uncertainty="total", **params)
+    reg_total.fit(X, y)
+    assert reg_total.get_params()["uncertainty"] == "total"
+    # the parameters follow the scikit-learn conventions
+    cloned = clone(reg_total)
+    assert cloned.get_params() == reg_total.get_params()
+    assert set(cloned.get_params()) == set(RandomForestRegressor().get_params()) | {
+        "uncertainty"
+    }
+    _, std = reg.predict(X, return_std=True)
+    _, std_total = reg_total.predict(X, return_std=True)
+    assert (std_total >= std).all()
+    assert (std_total > std).any()
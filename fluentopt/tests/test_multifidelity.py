@@ -0,0 +1,63 @@
+import numpy as np
+
+from fluentopt.multifidelity import MultiFidelityBayesianOptimizer
+from fluentopt.space import Space
+from fluentopt.space import Real
+
+
+def feval(r, t):
+    # the loss decreases with the budget, the best configuration
+    # is the same at all the budgets
+    return (t["x"] - 0.3) ** 2 + 1.0 / r
+
+
+def test_multifidelity():
+    space = Space({"x": Real(-1, 1)})
+    budgets = [1, 3, 9, 27, 81]
+    opt = MultiFidelityBayesianOptimizer(space, budgets, random_state=42)
+    total_cost = 0
+    while total_cost < 500:
+        r, t = opt.suggest()
+        opt.update((r, t), feval(r, t), cost=r)
+        total_cost += r
+    done = np.array([r for r, _ in opt.input_history_])
+    assert set(done) <= set(budgets)
+    # most of the evaluations are done with cheap budgets
+    assert (done <= 3).mean() > 0.5
+    assert done.max() >= 27
+    assert abs(opt.incumbent_["x"] - 0.3) < 0.1
+
+
+def test_predict_cost():
+    opt = MultiFidelityBayesianOptimizer(lambda rng: rng.uniform(0, 1), [1, 10, 100])
+    assert np.allclose(opt.predict_cost([1, 10]), [1, 10])
+    opt.update_many([(1, 0.5), (10, 0.2)], [1.0, 2.0], costs=[4.0, 400.0])
+    # cost = 4 * r ** 2
+    assert np.allclose(opt.predict_cost([100]), [40000.0])
+
+
+def test_suggest_many():
+    opt = MultiFidelityBayesianOptimizer(
+        lambda rng: rng.uniform(0, 1), [1, 10], maximize=True, random_state=42
+    )
+    opt.update_many([(1, 0.1), (1, 0.9), (10, 0.5)], [0.1, 0.9, 0.5])
+    xlist = opt.suggest_many(4)
+    assert len(xlist) == 4
+    assert len(set(t for _, t in xlist)) == 4
+    assert opt.incumbent_ == 0.5
+
+
+def test_pending():
+    space = Space({"x": Real(-1, 1)})
+    distances = []
+    for pending in (False, True):
+        opt = MultiFidelityBayesianOptimizer(space, [1, 3, 9], random_state=42)
+        for x in (-0.8, 0.0, 0.9):
+            opt.update((1, {"x": x}), feval(1, {"x": x}))
+        r, t = opt.suggest()
+        if pending:
+            opt.add_pending((r, t))
+        distances.append([abs(opt.suggest()[1]["x"] - t["x"]) for _ in range(5)])
+    # the candidates close to the pending configuration are penalized
+    assert min(distances[0]) < 0.05
+    assert min(distances[1]) > 0.05
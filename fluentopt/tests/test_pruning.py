@@ -0,0 +1,110 @@
+import numpy as np
+
+from fluentopt import RandomSearch
+from fluentopt.pruning import CurveExtrapolationPruner
+from fluentopt.pruning import LearningCurves
+from fluentopt.pruning import MedianPruner
+from fluentopt.pruning import SuccessiveHalvingPruner
+from fluentopt.runner import run
+from fluentopt.server import OptimizerClient
+from fluentopt.server import OptimizerServer
+
+
+def _report_curve(curves, x, values):
+    stops = [curves.report(x, step, v) for step, v in enumerate(values)]
+    return stops
+
+
+def test_learning_curves():
+    curves = LearningCurves()
+    assert _report_curve(curves, {"a": 1}, [3.0, 2.0, 1.0]) == [False] * 3
+    steps, values = curves.curve({"a": 1})
+    assert np.allclose(steps, [0, 1, 2])
+    assert np.allclose(values, [3.0, 2.0, 1.0])
+    assert curves.pruned_ == [False]
+
+
+def test_median_pruner():
+    curves = LearningCurves(MedianPruner(warmup_steps=1, min_trials=3))
+    for i in range(3):
+        _report_curve(curves, i, [1.0, 0.5, 0.1 * i])
+    # worse than the median, but not before the warmup
+    assert _report_curve(curves, 3, [2.0, 1.0]) == [False, True]
+    assert _report_curve(curves, 4, [0.1, 0.1, 0.1]) == [False] * 3
+    assert curves.pruned_ == [False, False, False, True, False]
+
+
+def test_successive_halving_pruner():
+    pruner = SuccessiveHalvingPruner(min_step=1, eta=2)
+    curves = LearningCurves(pruner)
+    assert _report_curve(curves, 0, [5.0, 4.0, 3.0, 2.0, 1.0]) == [False] * 5
+    # at the rung 1, 2 values: only the best one continues
+    assert _report_curve(curves, 1, [5.0, 4.5]) == [False, True]
+    # better at the rungs 1 and 2, checked only once per rung
+    assert _report_curve(curves, 2, [5.0, 3.0, 2.5, 2.4, 0.5]) == [False] * 5
+    # maximization
+    pruner = SuccessiveHalvingPruner(min_step=1, eta=2, maximize=True)
+    curves = LearningCurves(pruner)
+    _report_curve(curves, 0, [0.0, 1.0])
+    assert _report_curve(curves, 1, [0.0, 2.0]) == [False, False]
+    assert _report_curve(curves, 2, [0.0, 0.5]) == [False, True]
+
+
+def test_curve_extrapolation_pruner():
+    pruner = CurveExtrapolationPruner(target_step=100, min_points=3)
+    curves = LearningCurves(pruner)
+    _report_curve(curves, 0, [1.0, 0.5, 0.3, 0.2])
+    # flat curve far above the best value
+    assert _report_curve(curves, 1, [2.0, 2.0, 2.0]) == [False, False, True]
+    # decreasing fast, its extrapolation reaches the best value
+    assert _report_curve(curves, 2, [3.0, 2.0, 1.5]) == [False, False, False]
+
+
+def feval(x, report):
+    value = None
+    for step in range(1, 21):
+        value = (x - 0.3) ** 2 + 1.0 / step
+        if report(step, value):
+            break
+    return value
+
+
+def test_run_report():
+    opt = RandomSearch(lambda rng: rng.uniform(-1, 1), random_state=42)
+    opt.learning_curves.pruner = MedianPruner(min_trials=3)
+    run(opt, feval, nb_evaluations=20, nb_workers=1, report=True)
+    curves = opt.learning_curves
+    assert len(curves.inputs_) == 20
+    lengths = [len(steps) for steps, _ in curves.curves_]
+    assert any(curves.pruned_)
+    assert all(
+        length < 20 for length, pruned in zip(lengths, curves.pruned_) if pruned
+    )
+
+
+def test_client_report():
+    opt = RandomSearch(lambda rng: rng.uniform(-1, 1), random_state=42)
+    opt.learning_curves.pruner = MedianPruner(min_trials=1)
+    with OptimizerServer(opt) as server:
+        client = OptimizerClient(server.url)
+        assert not client.report(0.1, 1, 1.0)
+        assert client.report(0.2, 1, 2.0)
+    assert opt.learning_curves.pruned_ == [False, True]
+
+
+def test_learning_curves_keys():
+    curves = LearningCurves()
+    inputs = [{"a": i, "b": [i, 2.0]} for i in range(100)] + [np.array([1.0, 2.0]), 1.5]
+    for x in inputs:
+        _report_curve(curves, x, [1.0, 0.5])
+    # equal inputs share their curve
+    curves.report({"b": [3, 2.0], "a": 3}, 2, 0.1)
+    curves.report(np.float64(1.5), 2, 0.2)
+    curves.report([1.0, 2.0], 2, 0.3)
+    assert len(curves.inputs_) == len(inputs)
+    assert np.allclose(curves.curve({"a": 3, "b": [3, 2.0]})[1], [1.0, 0.5, 0.1])
+    assert np.allclose(curves.curve(1.5)[1], [1.0, 0.5, 0.2])
+    assert np.allclose(curves.curve(np.array([1.0, 2.0]))[1], [1.0, 0.5, 0.3])
+    # inputs without a hashable key are still found
+    _report_curve(curves, {"a": {1, 2}}, [1.0])
+    assert np.allclose(curves.curve({"a": {1, 2}})[1], [1.0])
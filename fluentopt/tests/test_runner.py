@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+import numpy as np
+
+from fluentopt import BayesianOptimizer
+from fluentopt import RandomSearch
+from fluentopt.runner import run
+
+
+def unif_sampler(rng):
+    return rng.uniform(-1, 1)
+
+
+def feval(x):
+    return -(x ** 2)
+
+
+def slow_feval(x):
+    time.sleep(0.01)
+    return -(x ** 2)
+
+
+@pytest.mark.parametrize("optimizer_cls", [RandomSearch, BayesianOptimizer])
+def test_run_thread(optimizer_cls):
+    opt = optimizer_cls(unif_sampler, random_state=42)
+    calls = []
+    run(
+        opt,
+        slow_feval,
+        nb_evaluations=10,
+        nb_workers=3,
+        callback=lambda opt, xlist, ylist: calls.append(len(xlist)),
+    )
+    assert len(opt.input_history_) == 10
+    assert sum(calls) == 10
+    assert opt.pending_ == []
+    assert opt.output_history_ == [feval(x) for x in opt.input_history_]
+
+
+def test_run_process():
+    opt = RandomSearch(unif_sampler, random_state=42)
+    run(opt, feval, nb_evaluations=4, nb_workers=2, executor="process")
+    assert len(opt.input_history_) == 4
+
+
+def failing_feval(x):
+    if x > 0.5:
+        raise ValueError("failed")
+    return -(x ** 2)
+
+
+def test_run_error():
+    opt = RandomSearch(unif_sampler, random_state=42)
+    run(opt, failing_feval, nb_evaluations=20, nb_workers=3, on_error="skip")
+    assert 0 < len(opt.input_history_) < 20
+    assert all(x <= 0.5 for x in opt.input_history_)
+    assert opt.pending_ == []
+
+    opt = RandomSearch(unif_sampler, random_state=42)
+    with pytest.raises(ValueError):
+        run(opt, failing_feval, nb_evaluations=20, nb_workers=1)
+    assert opt.pending_ == []
+    assert all(x <= 0.5 for x in opt.input_history_)
+
+
+def test_pending():
+    opt = BayesianOptimizer(unif_sampler, nb_suggestions=200, random_state=42)
+    xlist = [-0.8, -0.3, 0.1, 0.5, 0.9]
+    opt.update_many(xlist, [feval(x) for x in xlist])
+    x = opt.suggest()
+    opt.add_pending(x)
+    assert opt.pending_ == [x]
+    for _ in range(5):
+        assert np.abs(opt.suggest() - x) > 0.05
+    opt.update(x=x, y=feval(x))
+    assert opt.pending_ == []
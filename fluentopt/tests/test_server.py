@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+
+from fluentopt import BayesianOptimizer
+from fluentopt import RandomSearch
+from fluentopt.hyperband import ASHA
+from fluentopt.multifidelity import MultiFidelityBayesianOptimizer
+from fluentopt.runner import run
+from fluentopt.server import OptimizerClient
+from fluentopt.server import OptimizerServer
+
+
+def unif_sampler(rng):
+    return rng.uniform(-1, 1)
+
+
+def feval(x):
+    return -(x ** 2)
+
+
+class _CountingRandomSearch(RandomSearch):
+    def __init__(self, *args, **kwargs):
+        super(_CountingRandomSearch, self).__init__(*args, **kwargs)
+        self.nb_calls = 0
+
+    def suggest_many(self, n):
+        self.nb_calls += 1
+        return super(_CountingRandomSearch, self).suggest_many(n)
+
+
+def test_client():
+    opt = BayesianOptimizer(unif_sampler, random_state=42)
+    with OptimizerServer(opt) as server:
+        client = OptimizerClient(server.url)
+        for _ in range(5):
+            x = client.suggest()
+            client.update(x, feval(x))
+        xlist = client.suggest_many(3)
+        assert len(xlist) == 3
+        client.update_many(xlist, [feval(x) for x in xlist])
+    assert len(opt.input_history_) == 8
+    assert opt.output_history_ == [feval(x) for x in opt.input_history_]
+    assert opt.pending_ == []
+
+
+@pytest.mark.parametrize(
+    "optimizer",
+    [
+        MultiFidelityBayesianOptimizer(unif_sampler, [1, 3, 9], random_state=42),
+        ASHA(unif_sampler, max_iter=9, random_state=42),
+    ],
+)
+def test_client_multifidelity(optimizer):
+    # the (r, t) pairs are received as lists by the clients
+    with OptimizerServer(optimizer) as server:
+        client = OptimizerClient(server.url)
+        for _ in range(3):
+            xlist = client.suggest_many(2)
+            client.update_many(xlist, [r * feval(t) for r, t in xlist])
+        x = client.suggest()
+        client.remove_pending(x)
+        client.add_pending(x)
+        client.add_pending(x)
+        assert len(optimizer.pending_) == 1
+        client.update(x, feval(x[1]))
+    assert len(optimizer.input_history_) == 7
+    assert optimizer.pending_ == []
+
+
+def test_batching():
+    opt = _CountingRandomSearch(unif_sampler, random_state=42)
+    nb_workers = 8
+    barrier = threading.Barrier(nb_workers)
+    results = []
+
+    def worker():
+        client = OptimizerClient(server.url)
+        barrier.wait()
+        x = client.suggest()
+        client.update(x, feval(x))
+        results.append(x)
+
+    with OptimizerServer(opt, batch_window=0.2) as server:
+        threads = [threading.Thread(target=worker) for _ in range(nb_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(results) == nb_workers
+    assert len(set(results)) == nb_workers
+    assert len(opt.input_history_) == nb_workers
+    # the concurrent suggestions are done with less calls than workers
+    assert opt.nb_calls < nb_workers
+
+
+def test_runner():
+    opt = RandomSearch(unif_sampler, random_state=42)
+    with OptimizerServer(opt) as server:
+        run(OptimizerClient(server.url), feval, nb_evaluations=10, nb_workers=3)
+    assert len(opt.input_history_) == 10
+    assert opt.pending_ == []
+
+
+def test_error():
+    opt = RandomSearch(unif_sampler, random_state=42)
+    with OptimizerServer(opt) as server:
+        client = OptimizerClient(server.url)
+        with pytest.raises(RuntimeError):
+            client.update_many([0.1, 0.2], [1.0])
+        # the server still works after an error
+        x = client.suggest()
+        client.update(x, feval(x))
+    assert len(opt.input_history_) == 1
+
+
+def test_invalid_payloads():
+    opt = RandomSearch(unif_sampler, random_state=42)
+    with OptimizerServer(opt) as server:
+        client = OptimizerClient(server.url)
+        for route, payload in [
+            ("/update", {"ylist": [1.0]}),
+            ("/update", {"xlist": [0.1], "ylist": ["a"]}),
+            ("/update", [0.1]),
+            ("/suggest", {"n": None}),
+            ("/suggest", {"n": 0}),
+            ("/report", {"x": 0.1}),
+            ("/pending", {}),
+        ]:
+            with pytest.raises(RuntimeError):
+                client._post(route, payload)
+        # the dispatcher is still alive
+        x = client.suggest()
+        client.update(x, feval(x))
+    assert len(opt.input_history_) == 1
+
+
+class _FailingFitRandomSearch(RandomSearch):
+    # the evaluations are added to the history before the failure
+    def update_many(self, xlist, ylist):
+        super(_FailingFitRandomSearch, self).update_many(xlist, ylist)
+        raise RuntimeError("fit failed")
+
+
+def test_update_error_no_duplicates():
+    opt = _FailingFitRandomSearch(unif_sampler, random_state=42)
+    with OptimizerServer(opt) as server:
+        client = OptimizerClient(server.url)
+        with pytest.raises(RuntimeError):
+            client.update_many([0.1, 0.2], [1.0, 2.0])
+    assert opt.input_history_ == [0.1, 0.2]
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+from fluentopt import BayesianOptimizer
+from fluentopt.space import Categorical
+from fluentopt.space import Conditional
+from fluentopt.space import Integer
+from fluentopt.space import LogReal
+from fluentopt.space import Real
+from fluentopt.space import Space
+
+
+def _space():
+    return Space(
+        [
+            ("model", Categorical(["rf", "svm"])),
+            ("n_estimators", Conditional(Integer(10, 500), parent="model", values=["rf"])),
+            ("C", Conditional(LogReal(1e-3, 1e3), parent="model", values=["svm"])),
+            ("opt", Space({"lr": Real(0, 1)})),
+        ]
+    )
+
+
+def test_sample():
+    space = _space()
+    assert space.n_columns == 5
+    out = np.empty((100, space.n_columns))
+    X = space.sample(np.random.RandomState(42), 100, out=out)
+    assert X is out
+    bounds = space.bounds
+    assert bounds.shape == (5, 2)
+    assert np.all(X >= bounds[:, 0]) and np.all(X <= bounds[:, 1])
+
+
+def test_to_dicts_and_from_dicts():
+    space = _space()
+    X = space.sample(np.random.RandomState(42), 100)
+    dlist = space.to_dicts(X)
+    for d in dlist:
+        assert ("n_estimators" in d) == (d["model"] == "rf")
+        assert ("C" in d) == (d["model"] == "svm")
+        assert 0 <= d["opt"]["lr"] <= 1
+        if d["model"] == "rf":
+            assert isinstance(d["n_estimators"], int)
+            assert 10 <= d["n_estimators"] <= 500
+        else:
+            assert 1e-3 <= d["C"] <= 1e3
+    assert np.allclose(space.from_dicts(dlist), X)
+    assert space.to_dicts(space.from_dicts(dlist)) == dlist
+
+
+def test_project():
+    space = Space({"a": Integer(0, 10), "b": Categorical(["x", "y", "z"])})
+    X = space.project(np.array([[3.4, 0.2, 0.7, 0.1], [12, 0.5, 0.1, 0.6]]))
+    assert np.all(X == np.array([[3, 0, 1, 0], [10, 0, 0, 1]]))
+
+
+def test_space_parent_is_rejected():
+    dimensions = [
+        ("opt", Space({"lr": Real(0, 1)})),
+        ("momentum", Conditional(Real(0, 1), parent="opt", values=[0.5])),
+    ]
+    with pytest.raises(AssertionError):
+        Space(dimensions)
+
+
+def test_space_as_sampler():
+    space = _space()
+    d = space(random.Random(42))
+    assert d["model"] in ("rf", "svm")
+
+
+def test_bayesian_optimizer_with_space():
+    space = Space({"x": Real(-1, 1), "y": Real(-1, 1)})
+    opt = BayesianOptimizer(space, random_state=42)
+    for _ in range(10):
+        d = opt.suggest()
+        assert set(d.keys()) == set(["x", "y"])
+        opt.update(x=d, y=-d["x"] ** 2 - d["y"] ** 2)
+    assert len(opt.suggest_many(4)) == 4
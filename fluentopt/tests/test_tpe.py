@@ -0,0 +1,89 @@
+import pytest
+
+import numpy as np
+
+from fluentopt import RandomSearch
+from fluentopt.tpe import TPE
+
+
+def conditional_sampler(rng):
+    model = rng.choice(["a", "b", "c"])
+    if model == "a":
+        return {"model": model, "lr": 10 ** rng.uniform(-5, 0), "depth": rng.randint(1, 10)}
+    elif model == "b":
+        return {"model": model, "c": rng.uniform(0, 1)}
+    else:
+        return {"model": model}
+
+
+def conditional_feval(d):
+    if d["model"] == "a":
+        return -(np.log10(d["lr"]) + 2) ** 2 - 0.1 * abs(d["depth"] - 3)
+    elif d["model"] == "b":
+        return -1 - d["c"]
+    else:
+        return -3.0
+
+
+def _optimize(opt, feval, n):
+    for _ in range(n):
+        x = opt.suggest()
+        opt.update(x, feval(x))
+    return opt
+
+
+def test_tpe_conditional():
+    # the best outputs are compared over several seeds, a single run of
+    # TPE can stay a while on the branch "b" (a local optimum)
+    best, best_rs, models = [], [], []
+    for seed in range(5):
+        opt = TPE(conditional_sampler, maximize=True, random_state=seed)
+        best.append(max(_optimize(opt, conditional_feval, 60).output_history_))
+        rs = RandomSearch(conditional_sampler, random_state=seed)
+        best_rs.append(max(_optimize(rs, conditional_feval, 60).output_history_))
+        models.extend(d["model"] for d in opt.input_history_[30:])
+        # the integers sampled from the good group stay integers
+        assert all(isinstance(d["depth"], int) for d in opt.input_history_ if "depth" in d)
+    assert np.median(best) > np.median(best_rs)
+    # after the startup, most suggestions are on the best branch
+    assert models.count("a") > 5 * 20
+
+
+def test_tpe_quadratic():
+    def sampler(rng):
+        return rng.uniform(-5, 5)
+
+    def feval(x):
+        return (x - 1) ** 2
+
+    best, best_rs = [], []
+    for seed in range(5):
+        opt = _optimize(TPE(sampler, random_state=seed), feval, 60)
+        best.append(min(opt.output_history_))
+        rs = _optimize(RandomSearch(sampler, random_state=seed), feval, 60)
+        best_rs.append(min(rs.output_history_))
+        # the numeric values are sampled in the range of the prior
+        assert all(-5 <= x <= 5 for x in opt.input_history_)
+    assert np.median(best) < np.median(best_rs)
+
+
+def test_tpe_minimize_scalars():
+    # the outputs are minimized by default
+    opt = TPE(lambda rng: rng.uniform(-1, 1), random_state=42)
+    _optimize(opt, lambda x: (x - 0.3) ** 2, 50)
+    assert min(opt.output_history_) < 1e-3
+
+
+def test_tpe_suggest_many():
+    opt = TPE(conditional_sampler, nb_startup=5, maximize=True, random_state=42)
+    _optimize(opt, conditional_feval, 10)
+    xlist = opt.suggest_many(5)
+    assert len(xlist) == 5
+    assert all(xlist[i] is not xlist[j] for i in range(5) for j in range(i))
+    opt.add_pending(xlist[0])
+    assert opt.suggest() != xlist[0]
+
+
+def test_tpe_prior_weight():
+    with pytest.raises(AssertionError):
+        TPE(conditional_sampler, prior_weight=0)
@@ -4,11 +4,14 @@ import numpy as np
 
 from fluentopt.transformers import as_2d
 from fluentopt.transformers import Wrapper
+from fluentopt.transformers import Vectorizer
 from fluentopt.transformers import is_list_of_dicts
 from fluentopt.transformers import is_list_of_varying_length_lists
 from fluentopt.transformers import vectorize_list_of_varying_length_lists
 from fluentopt.transformers import vectorize_list_of_dicts
 from fluentopt.transformers import vectorize
+from fluentopt.transformers import nb_rows
+from fluentopt.transformers import take_inputs
 
 
 def test_is_list_of_dicts():
@@ -47,3 +50,58 @@ def test_vectorize_list_of_dicts():
     assert not np.isnan(v[1, 1])
     assert v[1, 1] == 2
     assert np.isnan(v[2, 1])
+
+
+def test_vectorize_dict_of_arrays():
+    dlist = [{"b": 1, "a": 2}, {"b": 3, "a": 4}]
+    columns = {"b": np.array([1, 3]), "a": np.array([2, 4])}
+    assert np.all(vectorize(columns) == vectorize(dlist))
+
+
+def test_take_inputs():
+    assert take_inputs([{"a": 1}, {"a": 2}], [1]) == [{"a": 2}]
+    assert take_inputs(np.array([1.0, 2.0, 3.0]), [2, 0]) == [3.0, 1.0]
+    rows = take_inputs(np.array([[1, 2], [3, 4]]), [1])
+    assert np.all(rows[0] == np.array([3, 4]))
+    columns = {"a": np.array([1, 2]), "b": {"c": np.array(["x", "y"])}}
+    assert take_inputs(columns, [1]) == [{"a": 2, "b": {"c": "y"}}]
+    assert nb_rows(columns) == 2
+
+
+def test_vectorizer():
+    vect = Vectorizer().fit([{"b": 1, "a": 2}, {"a": 3}])
+    assert vect.colnames_ == ["a", "b"]
+    v = vect.transform([{"a": 5}, {"a": 1, "c": 7}])
+    assert v.shape == (2, 2)
+    assert v[0, 0] == 5 and np.isnan(v[0, 1])
+    v = vect.transform({"b": np.array([1, 2])})
+    assert v.shape == (2, 2)
+    assert np.all(np.isnan(v[:, 0])) and np.all(v[:, 1] == [1, 2])
+    vect.partial_fit([{"c": 1}])
+    assert vect.colnames_ == ["a", "b", "c"]
+
+    vect = Vectorizer().fit([1, 2, 3])
+    assert vect.transform([4, 5]).shape == (2, 1)
+
+    vect = Vectorizer().fit([[1, 2], [3, 4]])
+    assert vect.colnames_ is None
+    vect.partial_fit([[1, 2, 3]])
+    assert vect.colnames_ == ["list_0", "list_1", "list_2"]
+
+
+def test_wrapper_caches_transformed_inputs():
+    class Model(object):
+        def fit(self, X, y):
+            self.X = X
+
+        def predict(self, X):
+            return X
+
+    model = Wrapper(Model())
+    model.fit([{"a": 1}, {"a": 2}], [1, 2])
+    model.partial_fit([{"a": 3}], [3])
+    assert model.Xt_.array.shape == (3, 1)
+    assert np.all(model.model.X == np.array([[1], [2], [3]]))
+    model.partial_fit([{"a": 4, "b": 1}], [4])
+    assert model.Xt_.array.shape == (4, 2)
+    assert model.predict([{"b": 2}]).shape == (1, 2)
@@ -0,0 +1,302 @@
+"""
+This module contains the TPE class, an implementation of the
+Tree-structured Parzen Estimator[1], which is suited to dict
+inputs with categorical and conditional keys: each key is modeled
+separately, and a missing key is just a possible outcome of the key.
+
+[1] James Bergstra, Rémi Bardenet, Yoshua Bengio and Balázs Kégl,
+    Algorithms for Hyper-Parameter Optimization, NIPS 2011
+"""
+import numbers
+from collections.abc import Mapping
+
+import numpy as np
+from scipy.special import logsumexp
+
+from .base import OptimizerWithHistory
+from .utils import check_numpy_random_state
+from .utils import check_random_state
+from .utils import check_sampler
+from .utils import flatten_dict
+
+__all__ = ["TPE"]
+
+
+class TPE(OptimizerWithHistory):
+    """
+    Tree-structured Parzen Estimator optimizer.
+    The evaluations are split into the `ceil(gamma * sqrt(n))` best ones (good)
+    and the others (bad), where `n` is the nb of evaluations (as in hyperopt,
+    the good group grows slowly, so the search does not get stuck on the
+    first good region). A density is estimated for each group and each key
+    of the (flattened) inputs: a mixture of gaussians (Parzen window) for the
+    numeric keys, a smoothed histogram for the other ones, times the
+    probability of the key being present. `nb_suggestions` candidates are
+    sampled from `sampler`, then their numeric values are replaced by values
+    sampled from the density of the good group, and the candidate which
+    maximizes the ratio of the densities of the good and the bad groups
+    is suggested. As in [1], the gaussians of a numeric key are centered
+    on the values of the group, and the std of each one is the largest
+    distance to its neighbours (so they are wide where the values are sparse).
+    The cost of a suggestion is linear in the size of the history.
+
+    Parameters
+    ----------
+
+    sampler : callable or fluentopt.space.Space
+        a callable used to sample an input, it takes a random number
+        generator and returns a dict, a list or a scalar.
+        Dicts can have missing keys (e.g conditional hyper-parameters).
+
+    gamma : float, optional[default=0.25]
+        the `ceil(gamma * sqrt(n))` best of the `n` evaluations
+        are considered as good.
+
+    nb_suggestions : int, optional[default=100]
+        nb of candidates sampled in each call of `suggest`.
+
+    nb_startup : int, optional[default=10]
+        the inputs are sampled randomly from `sampler` until there
+        are `nb_startup` evaluations.
+
+    prior_weight : float, optional[default=1.0]
+        weight of the prior in the densities: a wide gaussian for the numeric
+        keys, a uniform distribution for the other ones. It should be
+        positive, so that the densities are never zero.
+
+    maximize : bool, optional[default=False]
+        if True, maximize the outputs, otherwise minimize them
+        (like `fluentopt.cmaes.CMAES`).
+
+    random_state : int or None, optional
+
+    history : history backend instance or None
+        where to store the evaluations, see `fluentopt.history`.
+
+    Attributes
+    ----------
+        input_history_ : list of inputs evaluated
+        output_history_ : outputs corresponding to the evaluated inputs
+    """
+
+    def __init__(
+        self,
+        sampler,
+        gamma=0.25,
+        nb_suggestions=100,
+        nb_startup=10,
+        prior_weight=1.0,
+        maximize=False,
+        random_state=None,
+        history=None,
+    ):
+        super(TPE, self).__init__(history=history)
+        assert 0 < gamma < 1, "gamma should be between 0 and 1"
+        assert prior_weight > 0, "prior_weight should be positive"
+        self.sampler = check_sampler(sampler)
+        self.gamma = gamma
+        self.nb_suggestions = nb_suggestions
+        self.nb_startup = nb_startup
+        self.prior_weight = prior_weight
+        self.maximize = maximize
+        self.rng = check_random_state(random_state)
+        # samples the numeric values of the candidates
+        self.numpy_rng = check_numpy_random_state(random_state)
+
+    def suggest(self):
+        return self.suggest_many(1)[0]
+
+    def suggest_many(self, n):
+        """
+        Suggest `n` inputs. The inputs already selected in the batch
+        and the pending ones (see `add_pending`) are added to the bad group,
+        so that the next ones are not suggested close to them.
+        """
+        if len(self.output_history_) < self.nb_startup:
+            return [self.sampler(self.rng) for _ in range(n)]
+        candidates = [self.sampler(self.rng) for _ in range(max(self.nb_suggestions, n))]
+        flat_candidates = [_as_flat_dict(x) for x in candidates]
+        good, bad = self._split()
+        bad = bad + [_as_flat_dict(x) for x in self.pending_]
+        # the values sampled from the good group stay in the range of the
+        # columns and the selected candidates are already in them,
+        # so the columns are built once
+        columns = _columns(flat_candidates + good + bad)
+        candidates = self._sample_numbers(candidates, flat_candidates, good, columns)
+        flat_candidates = [_as_flat_dict(x) for x in candidates]
+        selected = []
+        for _ in range(n):
+            scores = self.get_scores(flat_candidates, good, bad, columns=columns)
+            scores[selected] = -np.inf
+            i = int(np.argmax(scores))
+            selected.append(i)
+            bad = bad + [flat_candidates[i]]
+        return [candidates[i] for i in selected]
+
+    def _split(self):
+        outputs = np.asarray(self.output_history_, dtype=float)
+        if self.maximize:
+            outputs = -outputs
+        order = np.argsort(outputs, kind="mergesort")
+        nb_good = max(1, int(np.ceil(self.gamma * np.sqrt(len(outputs)))))
+        inputs = self.input_history_
+        good = [_as_flat_dict(inputs[i]) for i in order[:nb_good]]
+        bad = [_as_flat_dict(inputs[i]) for i in order[nb_good:]]
+        return good, bad
+
+    def _sample_numbers(self, candidates, flat_candidates, good, columns):
+        """
+        replace the numeric values of the candidates by values sampled
+        from the density of the good group, the integers stay integers.
+        """
+        new_values = [{} for _ in candidates]
+        for column in columns:
+            if not column.numeric:
+                continue
+            key = column.key
+            indices = [i for i, d in enumerate(flat_candidates) if key in d]
+            values = [d[key] for d in good if key in d]
+            x = column.sample(values, self.prior_weight, len(indices), self.numpy_rng)
+            for i, xi in zip(indices, x):
+                if isinstance(flat_candidates[i][key], numbers.Integral):
+                    new_values[i][key] = int(np.round(xi))
+                else:
+                    new_values[i][key] = float(xi)
+        return [_replace_values(x, v) for x, v in zip(candidates, new_values)]
+
+    def get_scores(self, candidates, good, bad, columns=None):
+        """
+        log ratio of the densities of the good and the bad groups
+        for each candidate, all the inputs are flattened dicts.
+        `columns` are the `_Column` of all the keys, they are built
+        from the candidates and the groups if not provided.
+        """
+        scores = np.zeros(len(candidates))
+        if columns is None:
+            columns = _columns(candidates + good + bad)
+        for column in columns:
+            scores += self._log_density(column, candidates, good)
+            scores -= self._log_density(column, candidates, bad)
+        return scores
+
+    def _log_density(self, column, candidates, group):
+        w = self.prior_weight
+        values = [d[column.key] for d in group if column.key in d]
+        # the key being present or not is a bernoulli outcome
+        p_present = (len(values) + 0.5 * w) / (len(group) + w)
+        present = np.array([column.key in d for d in candidates])
+        x = [d[column.key] for d in candidates if column.key in d]
+        out = np.full(len(candidates), np.log(1 - p_present))
+        if len(x):
+            out[present] = np.log(p_present) + column.log_density(x, values, w)
+        return out
+
+
+class _Column(object):
+    """the values of a key in a list of flattened dicts"""
+
+    def __init__(self, key, dlist):
+        self.key = key
+        values = [d[key] for d in dlist if key in d]
+        self.numeric = all(_is_number(v) for v in values)
+        if self.numeric:
+            values = np.asarray(values, dtype=float)
+            # keys spanning several orders of magnitude are modeled in log-scale
+            self.log = values.min() > 0 and values.max() / values.min() > 100
+            values = self._scale(values)
+            self.low, self.high = values.min(), values.max()
+        else:
+            self.categories = set(values)
+
+    def _scale(self, x):
+        x = np.asarray(x, dtype=float)
+        return np.log(x) if self.log else x
+
+    def log_density(self, x, values, prior_weight):
+        if self.numeric:
+            return self._log_parzen(self._scale(x), self._scale(values), prior_weight)
+        counts = {}
+        for v in values:
+            counts[v] = counts.get(v, 0) + 1
+        total = len(values) + prior_weight
+        prior = prior_weight / len(self.categories)
+        return np.log(np.array([(counts.get(v, 0) + prior) / total for v in x]))
+
+    def sample(self, values, prior_weight, size, rng):
+        """sample `size` values from the parzen density of the numeric `values`"""
+        mus, sigmas, weights = self._parzen(self._scale(values), prior_weight)
+        k = rng.choice(len(mus), size=size, p=weights / weights.sum())
+        x = np.clip(rng.normal(mus[k], sigmas[k]), self.low, self.high)
+        return np.exp(x) if self.log else x
+
+    def _parzen(self, centers, prior_weight):
+        # gaussians centered on the values and a wide one for the prior, the
+        # std of each gaussian is the largest distance to its neighbours
+        width = max(self.high - self.low, 1e-12)
+        mus = np.append(centers, (self.low + self.high) / 2)
+        order = np.argsort(mus, kind="mergesort")
+        gaps = np.diff(mus[order])
+        sigmas = np.full(len(mus), width)
+        if len(gaps):
+            sigmas[order] = np.maximum(np.append(gaps[0], gaps), np.append(gaps, gaps[-1]))
+        sigmas = np.clip(sigmas, width / min(100.0, 1.0 + len(mus)), width)
+        sigmas[-1] = width
+        weights = np.append(np.ones(len(centers)), prior_weight)
+        return mus, sigmas, weights
+
+    def _log_parzen(self, x, centers, prior_weight):
+        mus, sigmas, weights = self._parzen(centers, prior_weight)
+        z = (x[:, np.newaxis] - mus) / sigmas
+        log_pdf = -0.5 * z ** 2 - np.log(sigmas) - 0.5 * np.log(2 * np.pi)
+        return logsumexp(log_pdf + np.log(weights / weights.sum()), axis=1)
+
+
+def _columns(dlist):
+    keys = set(k for d in dlist for k in d)
+    return [_Column(key, dlist) for key in sorted(keys)]
+
+
+def _is_number(v):
+    return isinstance(v, numbers.Number) and not isinstance(v, bool)
+
+
+def _as_flat_dict(x):
+    if isinstance(x, dict):
+        return flatten_dict(x)
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return flatten_dict({"list": list(x)})
+    return {"x": x}
+
+
+def _replace_values(x, values):
+    """
+    `x` where the values of the keys of its flattened dict
+    (see `_as_flat_dict`) are replaced by the ones in `values`
+    """
+    if not values:
+        return x
+    if isinstance(x, dict):
+        return _replace_dict_values(x, values)
+    if isinstance(x, (list, tuple, np.ndarray)):
+        new = [values.get("list_{}".format(i), v) for i, v in enumerate(x)]
+        return np.array(new) if isinstance(x, np.ndarray) else type(x)(new)
+    return values.get("x", x)
+
+
+def _replace_dict_values(D, values):
+    # same traversal as `flatten_dict`
+    out = {}
+    for k, v in D.items():
+        if isinstance(v, Mapping):
+            out[k] = _replace_dict_values(v, values)
+        elif isinstance(v, (list, tuple)):
+            new = [
+                _replace_dict_values(e, values)
+                if isinstance(e, Mapping)
+                else values.get(k + "_{}".format(i), e)
+                for i, e in enumerate(v)
+            ]
+            out[k] = type(v)(new)
+        else:
+            out[k] = values.get(k, v)
+    return out
@@ -8,12 +8,17 @@ from sklearn.feature_extraction import DictVectorizer
 
 from .utils import flatten_dict
 from .utils import dict_vectorizer
+from .utils import GrowableArray
 
 __all__ = [
     "Wrapper",
+    "Vectorizer",
     "vectorize",
     "vectorize_list_of_varying_length_lists",
     "vectorize_list_of_dicts",
+    "vectorize_dict_of_arrays",
+    "nb_rows",
+    "take_inputs",
 ]
 
 
@@ -50,19 +55,23 @@ def vectorize(X):
     vectorizes `X` depending on its type:
         - if it is a list of dicts, use `vectorize_list_of_dicts`.
         - it it is a list of lists of varying length across examples, use `vectorize_list_of_varying_length_lists`.
+        - if it is a dict of arrays (one array per column), use `vectorize_dict_of_arrays`.
         - if it is a list of fixed length lists or list of scalars, just convert to numpy array.
 
     Parameters
     ----------
 
-    `X` : a list of dicts or a list of varying length lists or a list of fixed length lists or list of scalars.
+    `X` : a list of dicts or a list of varying length lists or a list of fixed length lists or list of scalars
+          or a dict of arrays or a numpy array.
 
     Returns
     -------
     2D numpy array.
 
     """
-    if is_list_of_dicts(X):
+    if isinstance(X, dict):
+        X = vectorize_dict_of_arrays(X)
+    elif is_list_of_dicts(X):
         X = vectorize_list_of_dicts(X)
     elif is_list_of_varying_length_lists(X):
         X = vectorize_list_of_varying_length_lists(X)
@@ -94,12 +103,172 @@ def vectorize_list_of_dicts(dlist):
     return arr
 
 
+def vectorize_dict_of_arrays(columns):
+    """
+    vectorize a dict of arrays, where each array contains
+    the values of a column for all the rows.
+    The columns are named and ordered like in
+    `vectorize_list_of_dicts`, so that both give the same
+    result for the same inputs.
+
+    Parameters
+    ----------
+    columns : dict of 1D arrays (it can be nested)
+
+    Returns
+    -------
+    2D numpy array
+    """
+    columns = flatten_dict(columns)
+    colnames = sorted(columns.keys())
+    return np.column_stack([np.asarray(columns[col], dtype=float) for col in colnames])
+
+
 def vectorize_list_of_varying_length_lists(X):
     # just consider it as a dict and use vectorize_list_of_dicts
     dlist = [flatten_dict({"list": x}) for x in X]
     return vectorize_list_of_dicts(dlist)
 
 
+class Vectorizer(object):
+    """
+    a stateful version of `vectorize`.
+    `fit` learns the format of the inputs and, if they are dicts or
+    varying length lists, the set of columns. Then, `transform` always
+    returns arrays with the columns learned by `fit`, whatever the
+    inputs it gets: rows that have missing columns get `np.nan` and
+    the columns that were not seen by `fit` are ignored.
+    `partial_fit` adds the new columns found in new inputs, they
+    are put after the existing ones.
+
+    Attributes
+    ----------
+        colnames_ : list of str, the columns, or None if the inputs
+                    are scalars or fixed length lists
+        n_columns_ : int, nb of columns of the transformed arrays
+    """
+
+    def fit(self, X, y=None):
+        self.colnames_ = None
+        self.n_columns_ = None
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, "n_columns_"):
+            return self.fit(X)
+        dlist = self._as_list_of_dicts(X)
+        if dlist is None and self.colnames_ is None:
+            n_columns = as_2d(X).shape[1] if len(X) else self.n_columns_
+            if self.n_columns_ is None or n_columns == self.n_columns_:
+                self.n_columns_ = n_columns
+                return self
+            # fixed length lists which length changed, consider
+            # them as varying length lists from now on
+            dlist = [flatten_dict({"list": x}) for x in X]
+        if dlist is None:
+            return self
+        if self.colnames_ is None:
+            self.colnames_ = []
+        known = set(self.colnames_)
+        new = set(k for d in dlist for k in d.keys()) - known
+        self.colnames_ = self.colnames_ + sorted(new)
+        self.n_columns_ = len(self.colnames_)
+        return self
+
+    def _as_list_of_dicts(self, X):
+        if isinstance(X, dict):
+            return [flatten_dict(X)]
+        elif is_list_of_dicts(X):
+            return [flatten_dict(d) for d in X]
+        elif is_list_of_varying_length_lists(X) or (
+            self.colnames_ is not None and type(X) == list
+        ):
+            return [flatten_dict({"list": x}) for x in X]
+        else:
+            return None
+
+    def transform(self, X):
+        if isinstance(X, np.ndarray):
+            X = as_2d(X)
+        elif isinstance(X, dict):
+            columns = flatten_dict(X)
+            n = nb_rows(columns)
+            X = np.column_stack(
+                [
+                    np.asarray(columns[col], dtype=float)
+                    if col in columns
+                    else np.full(n, np.nan)
+                    for col in self.colnames_
+                ]
+            )
+        elif self.colnames_ is not None:
+            dlist = self._as_list_of_dicts(X)
+            X = dict_vectorizer(dlist, self.colnames_, missing=np.nan)
+            X = X.reshape((len(dlist), self.n_columns_))
+        else:
+            X = as_2d(X)
+        assert X.shape[1] == self.n_columns_, "Expected {} columns, got {}".format(
+            self.n_columns_, X.shape[1]
+        )
+        return X
+
+    def __call__(self, X):
+        return self.transform(X)
+
+
+def nb_rows(X):
+    """
+    returns the number of inputs in `X`, where `X` is a list
+    of inputs, a numpy array or a dict of arrays.
+    """
+    if isinstance(X, dict):
+        return nb_rows(next(iter(X.values())))
+    return len(X)
+
+
+def take_inputs(X, indices):
+    """
+    take the inputs of `X` which are at the given `indices`,
+    in the format that the user expects.
+
+    Parameters
+    ----------
+    X : list of inputs, or numpy array or dict of arrays
+        - if it is a list, the elements are returned as is.
+        - if it is a 1D numpy array, each element is a scalar input.
+        - if it is a 2D numpy array, each row is an input.
+        - if it is a dict of arrays, each input is a dict
+          built from the values of the arrays at a given index.
+
+    indices : list of int
+
+    Returns
+    -------
+    list of inputs
+    """
+    if isinstance(X, dict):
+        return [_take_dict_row(X, i) for i in indices]
+    elif isinstance(X, np.ndarray):
+        if X.ndim == 1:
+            return [_as_python_scalar(X[i]) for i in indices]
+        else:
+            # copy so that the inputs do not keep `X` alive
+            return [X[i].copy() for i in indices]
+    else:
+        return [X[i] for i in indices]
+
+
+def _take_dict_row(columns, i):
+    return {
+        k: _take_dict_row(v, i) if isinstance(v, dict) else _as_python_scalar(v[i])
+        for k, v in columns.items()
+    }
+
+
+def _as_python_scalar(x):
+    return x.item() if isinstance(x, np.generic) else x
+
+
 class Wrapper(object):
     """
     wraps a scikit-learn like estimator `model` to transform
@@ -112,26 +281,122 @@ class Wrapper(object):
 
     model : scikit-learn like estimator instance to wrap
 
-    transform_X : callable
-        used to transform the inputs before passing them to fit and predict
+    transform_X : callable or transformer instance or None
+        used to transform the inputs before passing them to fit and predict.
+        if it has `fit`, `partial_fit` and `transform` methods (like `Vectorizer`
+        or `fluentopt.space.Space`), it is fitted on the inputs and
+        the transformed inputs are cached, so that `partial_fit`
+        only transforms the new inputs.
+        if None, a new `Vectorizer` is used.
 
     transform_y : callable
         used to transform the outputs before passing them to fit
+
+    keep_history : bool, optional[default=True]
+        if True, the examples are kept (`X_`, `y_` and the transformed
+        inputs `Xt_`), so the memory grows linearly with the nb of
+        examples. If False, they are not kept, the wrapped model should
+        then have a `partial_fit` method, and `partial_fit` raises
+        a `ValueError` if the transformed inputs get new columns.
     """
 
-    def __init__(self, model, transform_X=vectorize, transform_y=lambda y: y):
+    def __init__(self, model, transform_X=None, transform_y=lambda y: y, keep_history=True):
+        assert keep_history or hasattr(
+            model, "partial_fit"
+        ), "the model should have a partial_fit method if keep_history is False"
         self.model = model
-        self.transform_X = transform_X
+        self.transform_X = Vectorizer() if transform_X is None else transform_X
         self.transform_y = transform_y
+        self.keep_history = keep_history
+
+    def _is_stateful(self):
+        return all(
+            hasattr(self.transform_X, name)
+            for name in ("fit", "partial_fit", "transform")
+        )
+
+    def _transform(self, X):
+        if self._is_stateful():
+            return self.transform_X.transform(X)
+        else:
+            return self.transform_X(X)
 
     def fit(self, X, y=None):
-        X = self.transform_X(X)
+        if self.keep_history:
+            self.X_ = list(X)
+            self.y_ = list(y) if y else []
+        if self._is_stateful():
+            self.transform_X.fit(X)
+        X = self._transform(X)
+        self.n_columns_ = X.shape[1]
+        if self.keep_history:
+            self.Xt_ = GrowableArray(X.shape[1]).extend(X)
         if y:
             y = self.transform_y(y)
         return self.model.fit(X, y=y)
 
+    def partial_fit(self, X, y):
+        """
+        add the inputs `X` and outputs `y` to the ones
+        previously given to `fit` or `partial_fit`.
+        If the wrapped model has a `partial_fit` method, only the new
+        examples are passed to it, otherwise the wrapped
+        model is fitted again on all the examples.
+        """
+        if not hasattr(self, "n_columns_"):
+            return self.fit(X, y)
+        if self.keep_history:
+            self.X_.extend(X)
+            self.y_.extend(y)
+        if self._is_stateful():
+            self.transform_X.partial_fit(X)
+            Xt = self._transform(X)
+        elif self.keep_history:
+            Xt = self._transform(self.X_)[-len(X) :]
+        else:
+            Xt = self._transform(X)
+        if Xt.shape[1] != self.n_columns_:
+            if not self.keep_history:
+                raise ValueError(
+                    "The inputs have new columns, the model can not be fitted "
+                    "again without the previous examples (keep_history=False)"
+                )
+            # new columns, the model has to be fitted again on all the examples
+            return self.fit(self.X_, self.y_)
+        if not self.keep_history:
+            return self.model.partial_fit(Xt, self.transform_y(y))
+        self.Xt_.extend(Xt)
+        if hasattr(self.model, "partial_fit"):
+            return self.model.partial_fit(Xt, self.transform_y(y))
+        return self.model.fit(self.Xt_.array, self.transform_y(self.y_))
+
     def predict(self, X, **kwargs):
         # kwargs for handling models which have for instance
         # return_std
-        X = self.transform_X(X)
+        X = self._transform(X)
         return self.model.predict(X, **kwargs)
+
+    def predict_gradient(self, X):
+        """
+        calls `predict_gradient` of the wrapped model. The gradients
+        are with respect to the transformed inputs, so `X` should already
+        be a 2D numpy array for them to be meaningful.
+        """
+        if not hasattr(self.model, "predict_gradient"):
+            raise NotImplementedError(
+                "{} does not support gradients".format(type(self.model).__name__)
+            )
+        X = self._transform(X)
+        return self.model.predict_gradient(X)
+
+    def sample_functions(self, nb_samples=1, **kwargs):
+        """
+        calls `sample_functions` of the wrapped model, the returned
+        functions take untransformed inputs.
+        """
+        if not hasattr(self.model, "sample_functions"):
+            raise NotImplementedError(
+                "{} does not support sampling functions".format(type(self.model).__name__)
+            )
+        functions = self.model.sample_functions(nb_samples, **kwargs)
+        return lambda X: functions(self._transform(X))
@@ -4,22 +4,29 @@ It contains mostly validation functions to check for validity
 of the parameters that a function or a class gets as an input.
 """
 from __future__ import absolute_import
-import collections
+from collections.abc import Mapping
 
 import numpy as np
+from joblib import Parallel
+from joblib import delayed
+from joblib import effective_n_jobs
 from sklearn.ensemble import RandomForestRegressor
 
 import random
 
 __all__ = [
     "check_sampler",
+    "check_batch_sampler",
     "check_types_coherence",
     "check_if_list_of_scalars",
     "argmax",
+    "index_of",
     "flatten_dict",
     "dict_vectorizer",
     "RandomForestRegressorWithUncertainty",
+    "GrowableArray",
     "check_random_state",
+    "check_numpy_random_state",
 ]
 
 
@@ -27,18 +34,40 @@ def check_random_state(seed):
     return random.Random(seed)
 
 
+def check_numpy_random_state(seed):
+    if isinstance(seed, np.random.RandomState):
+        return seed
+    return np.random.RandomState(seed)
+
+
 def check_sampler(sampler):
     """check whether sampler is a callable"""
     assert callable(sampler), "The sampler should be callable"
     return sampler
 
 
+def check_batch_sampler(sampler, batch_sampler):
+    """
+    check whether at least one of sampler and batch_sampler
+    is provided and that batch_sampler is a callable.
+    """
+    assert (
+        sampler is not None or batch_sampler is not None
+    ), "Either sampler or batch_sampler should be provided"
+    if batch_sampler is not None:
+        assert callable(batch_sampler), "The batch sampler should be callable"
+    return batch_sampler
+
+
 def _types_are_coherent(xlist):
     """return True if the elements of xlist all have the same type"""
-    x0 = xlist[0]
-    types = map(lambda x: type(x), xlist)
-    types = list(types)
-    return all(map(lambda t: t == type(x0) or t == type(None), types))
+    if not len(xlist):
+        return True
+    # a set of the types is built at C speed, whatever the size of xlist
+    types = set(map(type, xlist))
+    types.discard(type(xlist[0]))
+    types.discard(type(None))
+    return not types
 
 
 def check_types_coherence(xlist, varname="xlist"):
@@ -47,8 +76,14 @@ def check_types_coherence(xlist, varname="xlist"):
 
 
 def check_if_list_of_scalars(ylist, varname="ylist"):
-    assert all(
-        isinstance(y, float) or isinstance(y, int) for y in ylist
+    # converting to a numpy array is vectorized, a list with anything else
+    # than numbers (None, strings, lists...) gives a non numeric or 2D array
+    try:
+        y = np.asarray(ylist)
+    except ValueError:
+        y = None
+    assert (
+        y is not None and y.ndim == 1 and y.dtype.kind in "biuf"
     ), "The list {} should only contain scalars".format(varname)
     return ylist
 
@@ -57,6 +92,27 @@ def argmax(x):
     return max(range(len(x)), key=lambda i: x[i])
 
 
+def index_of(xlist, x):
+    """
+    returns the index of the first element of `xlist` which is `x`
+    or is equal to `x` (inputs can be numpy arrays, so `list.index`
+    can not be used), or None if there is no such element.
+    """
+    for i, xi in enumerate(xlist):
+        if xi is x:
+            return i
+    for i, xi in enumerate(xlist):
+        if _is_equal(xi, x):
+            return i
+    return None
+
+
+def _is_equal(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b)
+    return a == b
+
+
 def flatten_dict(D):
     """
     converts a deep dict `D` into a flattened version `d`.
@@ -74,11 +130,11 @@ def flatten_dict(D):
     """
     d = {}
     for k, v in D.items():
-        if isinstance(v, collections.Mapping):
+        if isinstance(v, Mapping):
             d.update(flatten_dict(v))
         elif isinstance(v, list) or isinstance(v, tuple):
             for i, l in enumerate(v):
-                if not isinstance(l, collections.Mapping):
+                if not isinstance(l, Mapping):
                     d[k + "_{}".format(i)] = l
                 else:
                     for e in v:
@@ -116,21 +172,248 @@ def dict_vectorizer(dlist, colnames, missing=np.nan):
     return np.array(dlist_)
 
 
+class GrowableArray(object):
+    """
+    a numpy array which rows can be appended with an amortized
+    constant cost, by doubling the capacity of the underlying
+    buffer when it is full.
+
+    Parameters
+    ----------
+    n_columns : int or None
+        nb of columns. If None, the array is 1D.
+    dtype : numpy dtype
+    """
+
+    def __init__(self, n_columns=None, dtype=float):
+        self.n_columns = n_columns
+        shape = (0,) if n_columns is None else (0, n_columns)
+        self._buffer = np.empty(shape, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def array(self):
+        """view of the filled part of the buffer"""
+        return self._buffer[: self._size]
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=self._buffer.dtype)
+        n = len(rows)
+        if self._size + n > len(self._buffer):
+            capacity = max(2 * len(self._buffer), self._size + n, 16)
+            shape = (capacity,) + self._buffer.shape[1:]
+            buffer = np.empty(shape, dtype=self._buffer.dtype)
+            buffer[: self._size] = self.array
+            self._buffer = buffer
+        self._buffer[self._size : self._size + n] = rows
+        self._size += n
+        return self
+
+
 class RandomForestRegressorWithUncertainty(RandomForestRegressor):
     """
     an extension of RandomForestRegressor with support of returning uncertainty.
-    it just takes the trees and compute the std of the predicted values for each
-    tree.
+    The per-tree predictions are computed in parallel with `n_jobs` and
+    accumulated with a streaming mean/variance, so the memory used does not
+    grow with the nb of trees.
+
+    Parameters
+    ----------
+
+    the parameters are the ones of `RandomForestRegressor`, and:
+
+    uncertainty : "trees" or "total", optional[default="trees"]
+        if "trees", the std is the std of the predictions of the trees.
+        if "total", the variance of the outputs in the leaves
+        (the impurity of the leaves) is added to the variance of
+        the predictions of the trees (law of total variance), so that
+        the std does not collapse to zero where all the trees agree.
+        It assumes the default criterion ("squared_error"), whose impurity
+        is the variance.
+
+    Attributes
+    ----------
+        nb_estimators_ : nb of trees of the forest, it differs from
+            `n_estimators` after `partial_fit`.
     """
 
+    def __init__(
+        self,
+        n_estimators=100,
+        criterion="squared_error",
+        max_depth=None,
+        min_samples_split=2,
+        min_samples_leaf=1,
+        min_weight_fraction_leaf=0.0,
+        max_features=1.0,
+        max_leaf_nodes=None,
+        min_impurity_decrease=0.0,
+        bootstrap=True,
+        oob_score=False,
+        n_jobs=None,
+        random_state=None,
+        verbose=0,
+        warm_start=False,
+        ccp_alpha=0.0,
+        max_samples=None,
+        monotonic_cst=None,
+        uncertainty="trees",
+    ):
+        super(RandomForestRegressorWithUncertainty, self).__init__(
+            n_estimators=n_estimators,
+            criterion=criterion,
+            max_depth=max_depth,
+            min_samples_split=min_samples_split,
+            min_samples_leaf=min_samples_leaf,
+            min_weight_fraction_leaf=min_weight_fraction_leaf,
+            max_features=max_features,
+            max_leaf_nodes=max_leaf_nodes,
+            min_impurity_decrease=min_impurity_decrease,
+            bootstrap=bootstrap,
+            oob_score=oob_score,
+            n_jobs=n_jobs,
+            random_state=random_state,
+            verbose=verbose,
+            warm_start=warm_start,
+            ccp_alpha=ccp_alpha,
+            max_samples=max_samples,
+            monotonic_cst=monotonic_cst,
+        )
+        self.uncertainty = uncertainty
+
     def predict(self, X, return_std=False):
-        if return_std:
-            trees = self.estimators_
-            y = np.concatenate(
-                [tree.predict(X)[np.newaxis, :] for tree in trees], axis=0
+        if not return_std:
+            return super(RandomForestRegressorWithUncertainty, self).predict(X)
+        assert self.uncertainty in (
+            "trees",
+            "total",
+        ), "uncertainty should be 'trees' or 'total'"
+        X = self._validate_X_predict(X)
+        total = self.uncertainty == "total"
+        results = Parallel(n_jobs=self._nb_jobs(), prefer="threads")(
+            delayed(_predict_trees)(trees, X, total) for trees in self._partition_trees()
+        )
+        count, mean, m2, leaf_var = results[0]
+        for count_b, mean_b, m2_b, leaf_var_b in results[1:]:
+            # merge the mean and the sum of squared deviations
+            # of two groups of trees (Chan et al.)
+            delta = mean_b - mean
+            n = count + count_b
+            mean = mean + delta * count_b / n
+            m2 = m2 + m2_b + delta ** 2 * count * count_b / n
+            leaf_var = leaf_var + leaf_var_b
+            count = n
+        var = m2 / count
+        if total:
+            var += leaf_var / count
+        return mean, np.sqrt(var)
+
+    def predict_quantiles(self, X, quantiles, batch_size=1000):
+        """
+        predict the quantiles of the predictions of the trees.
+
+        Parameters
+        ----------
+        X : 2D numpy array
+        quantiles : list of float
+            quantiles to predict, between 0 and 1
+        batch_size : int
+            the predictions of all the trees are only kept for `batch_size`
+            inputs at a time, to bound the memory used.
+
+        Returns
+        -------
+        2D numpy array of shape (len(quantiles), len(X))
+        """
+        X = self._validate_X_predict(X)
+        out = np.empty((len(quantiles), len(X)))
+        for start in range(0, len(X), batch_size):
+            Xb = X[start : start + batch_size]
+            y = Parallel(n_jobs=self._nb_jobs(), prefer="threads")(
+                delayed(_stack_predictions)(trees, Xb) for trees in self._partition_trees()
             )
-            mean = y.mean(axis=0)
-            std = y.std(axis=0)
-            return mean, std
-        else:
-            return super(RandomForestRegressor, self).predict(X)
+            y = np.concatenate(y, axis=0)
+            out[:, start : start + batch_size] = np.quantile(y, quantiles, axis=0)
+        return out
+
+    def _nb_jobs(self):
+        return min(effective_n_jobs(self.n_jobs), len(self.estimators_))
+
+    def _partition_trees(self):
+        nb_jobs = self._nb_jobs()
+        bounds = np.linspace(0, len(self.estimators_), nb_jobs + 1).astype(int)
+        return [self.estimators_[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def fit(self, X, y, sample_weight=None):
+        self._X_train = np.asarray(X)
+        self._y_train = np.asarray(y)
+        self._max_estimators = self.n_estimators
+        super(RandomForestRegressorWithUncertainty, self).fit(
+            X, y, sample_weight=sample_weight
+        )
+        self.nb_estimators_ = len(self.estimators_)
+        return self
+
+    def partial_fit(self, X, y, n_new_estimators=10, max_estimators=None):
+        """
+        add the examples `X` and `y` to the training set and grow
+        `n_new_estimators` new trees on the whole training set
+        using warm start, the existing trees are kept as is.
+        The oldest trees are then removed so that the forest does not
+        have more than `max_estimators` trees.
+
+        Parameters
+        ----------
+        X : 2D numpy array
+            new inputs
+        y : 1D numpy array
+            new outputs
+        n_new_estimators : int
+            nb of trees to grow
+        max_estimators : int or None
+            maximum nb of trees to keep. If None, use the nb of trees
+            of the forest after the last call to `fit`.
+        """
+        if not hasattr(self, "estimators_"):
+            return self.fit(X, y)
+        if max_estimators is None:
+            max_estimators = self._max_estimators
+        X = np.concatenate((self._X_train, np.asarray(X)), axis=0)
+        y = np.concatenate((self._y_train, np.asarray(y)), axis=0)
+        self._X_train = X
+        self._y_train = y
+        # the parameters are only changed during the fit, so that
+        # `get_params` still returns the ones given by the user
+        warm_start, n_estimators = self.warm_start, self.n_estimators
+        self.warm_start = True
+        self.n_estimators = len(self.estimators_) + n_new_estimators
+        try:
+            super(RandomForestRegressorWithUncertainty, self).fit(X, y)
+        finally:
+            self.warm_start, self.n_estimators = warm_start, n_estimators
+        self.estimators_ = self.estimators_[-max_estimators:]
+        self.nb_estimators_ = len(self.estimators_)
+        return self
+
+
+def _predict_trees(trees, X, total):
+    # streaming mean and sum of squared deviations (Welford) of the
+    # predictions of `trees`, and the sum of the variances of their leaves
+    mean = np.zeros(len(X))
+    m2 = np.zeros(len(X))
+    leaf_var = np.zeros(len(X))
+    for i, tree in enumerate(trees):
+        y = tree.predict(X, check_input=False)
+        delta = y - mean
+        mean += delta / (i + 1)
+        m2 += delta * (y - mean)
+        if total:
+            leaf_var += tree.tree_.impurity[tree.apply(X, check_input=False)]
+    return len(trees), mean, m2, leaf_var
+
+
+def _stack_predictions(trees, X):
+    return np.array([tree.predict(X, check_input=False) for tree in trees])